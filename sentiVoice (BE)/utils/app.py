@@ -1,103 +1,60 @@
 import sys
-import numpy as np
-import librosa
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-import pickle
-import os
-import pandas as pd
-import joblib
-from pathlib import Path
 import traceback
-import json
+from functools import partial
+import numpy as np
+
+from model_registry import get_artifacts
+from stream_features import open_audio, StreamedAudio
+from feature_engine import extract_features, N_FEATURES
 
 def extract_feature(file_name, **kwargs):
     """Extract feature from audio file"""
-    mfcc = kwargs.get("mfcc")
-    chroma = kwargs.get("chroma")
-    mel = kwargs.get("mel")
-    contrast = kwargs.get("contrast")
-    tonnetz = kwargs.get("tonnetz")
-
     try:
         print(f"Loading audio file: {file_name}")
-        X, sample_rate = librosa.load(file_name, sr=None)
-        print(f"Audio loaded - Duration: {len(X)/sample_rate:.2f}s, Sample rate: {sample_rate}Hz")
-        print(f"Audio range: {np.min(X):.4f} to {np.max(X):.4f}")
-        
-        # Check if audio is too short or silent
-        if len(X) < sample_rate * 0.1:  # Less than 0.1 seconds
-            print("Warning: Audio file is too short!")
-            return np.zeros(60)  # Return zeros for expected feature length
-            
-        if np.max(np.abs(X)) < 0.01:  # Very quiet audio
-            print("Warning: Audio file is very quiet!")
-            
+        audio = open_audio(file_name)
     except Exception as e:
         print(f"Error loading audio file: {e}")
         raise
-    
-    result = np.array([])
-
-    if chroma or contrast:
-        stft = np.abs(librosa.stft(X))
-        print(f"STFT shape: {stft.shape}")
 
-    if mfcc:
-        try:
-            mfccs = np.mean(librosa.feature.mfcc(y=X, sr=sample_rate, n_mfcc=40).T, axis=0)
-            print(f"MFCC features shape: {mfccs.shape}, range: {np.min(mfccs):.4f} to {np.max(mfccs):.4f}")
-            result = np.hstack((result, mfccs))
-        except Exception as e:
-            print(f"Error extracting MFCC features: {e}")
-            mfccs = np.zeros(40)
-            result = np.hstack((result, mfccs))
+    # Same optional VAD trim as the service pipeline (VAD_TRIM)
+    audio, _ = audio.trimmed()
+    return extract_feature_from_audio(audio, **kwargs)
 
-    if chroma:
-        try:
-            chroma_features = np.mean(librosa.feature.chroma_stft(S=stft, sr=sample_rate).T, axis=0)
-            print(f"Chroma features shape: {chroma_features.shape}, range: {np.min(chroma_features):.4f} to {np.max(chroma_features):.4f}")
-            result = np.hstack((result, chroma_features))
-        except Exception as e:
-            print(f"Error extracting chroma features: {e}")
-            chroma_features = np.zeros(12)
-            result = np.hstack((result, chroma_features))
-
-    if mel:
-        try:
-            mel_features = np.mean(librosa.feature.melspectrogram(y=X, sr=sample_rate).T, axis=0)
-            print(f"Mel features shape: {mel_features.shape}, range: {np.min(mel_features):.4f} to {np.max(mel_features):.4f}")
-            result = np.hstack((result, mel_features))
-        except Exception as e:
-            print(f"Error extracting mel features: {e}")
-            mel_features = np.zeros(128)
-            result = np.hstack((result, mel_features))
-
-    if contrast:
-        try:
-            contrast_features = np.mean(librosa.feature.spectral_contrast(S=stft, sr=sample_rate).T, axis=0)
-            print(f"Contrast features shape: {contrast_features.shape}, range: {np.min(contrast_features):.4f} to {np.max(contrast_features):.4f}")
-            result = np.hstack((result, contrast_features))
-        except Exception as e:
-            print(f"Error extracting contrast features: {e}")
-            contrast_features = np.zeros(7)
-            result = np.hstack((result, contrast_features))
+def extract_feature_from_audio(audio, **kwargs):
+    """Extract feature from already decoded audio"""
+    mfcc = kwargs.get("mfcc")
+    chroma = kwargs.get("chroma")
+    mel = kwargs.get("mel")
+    contrast = kwargs.get("contrast")
+    tonnetz = kwargs.get("tonnetz")
 
-    if tonnetz:
-        try:
-            tonnetz_features = np.mean(librosa.feature.tonnetz(y=librosa.effects.harmonic(X), sr=sample_rate).T, axis=0)
-            print(f"Tonnetz features shape: {tonnetz_features.shape}, range: {np.min(tonnetz_features):.4f} to {np.max(tonnetz_features):.4f}")
-            result = np.hstack((result, tonnetz_features))
-        except Exception as e:
-            print(f"Error extracting tonnetz features: {e}")
-            tonnetz_features = np.zeros(6)
-            result = np.hstack((result, tonnetz_features))
+    sample_rate = audio.sample_rate
+    print(f"Audio loaded - Duration: {audio.duration:.2f}s, Sample rate: {sample_rate}Hz")
+    print(f"Audio peak amplitude: {audio.max_amplitude:.4f}")
+    
+    # Check if audio is too short or silent
+    if len(audio) < sample_rate * 0.1:  # Less than 0.1 seconds
+        print("Warning: Audio file is too short!")
+        return np.zeros(60)  # Return zeros for expected feature length
+        
+    if audio.max_amplitude < 0.01:  # Very quiet audio
+        print("Warning: Audio file is very quiet!")
+    
+    # All families come from one shared STFT / mel spectrogram, or from running sums when streamed
+    extract = audio.extract if isinstance(audio, StreamedAudio) else partial(extract_features, audio)
+    result = extract(
+        mfcc=mfcc,
+        chroma=chroma,
+        mel=mel,
+        contrast=contrast,
+        tonnetz=tonnetz
+    )
 
     print(f"Final feature vector length: {len(result)}")
     print(f"Final feature range: {np.min(result):.4f} to {np.max(result):.4f}")
     
     # Ensure we have the expected number of features (40+12+128+7+6 = 193)
-    expected_length = 40 + 12 + 128 + 7 + 6  # mfcc + chroma + mel + contrast + tonnetz
+    expected_length = N_FEATURES  # mfcc + chroma + mel + contrast + tonnetz
     if len(result) != expected_length:
         print(f"Warning: Expected {expected_length} features, got {len(result)}")
         # Pad or truncate to expected length
@@ -110,16 +67,8 @@ def extract_feature(file_name, **kwargs):
 
 def predict_emotion(audio_path):
     try:
-        # Load artifacts from the correct path
-        output_dir = os.path.join(os.path.dirname(__file__), "audio_feature_extracted")
-        scaler_path = os.path.join(output_dir, 'scaler.pkl')
-        encoder_path = os.path.join(output_dir, 'encoder.pkl')
-        model_path = os.path.join(output_dir, 'model.h5')
-
-        # Load the saved artifacts
-        loaded_scaler = joblib.load(scaler_path)
-        loaded_encoder = joblib.load(encoder_path)
-        loaded_model = load_model(model_path, compile=False)
+        # Shared artifacts, loaded once per process
+        artifacts = get_artifacts()
 
         # Extract features
         features = extract_feature(
@@ -138,14 +87,8 @@ def predict_emotion(audio_path):
         contrast = features[53] if len(features) > 53 else None
         tonnetz = features[59] if len(features) > 59 else None
         
-        # Scale and reshape
-        features_df = pd.DataFrame([features], columns=[f'feature_{i}' for i in range(len(features))])
-        features_scaled = loaded_scaler.transform(features_df)
-        features_reshaped = np.expand_dims(features_scaled, axis=2)
-        
-        # Make prediction
-        prediction_probs = loaded_model.predict(features_reshaped, verbose=0)
-        predicted_emotion = loaded_encoder.inverse_transform(prediction_probs)
+        # Scale, predict and decode
+        prediction_probs, predicted_emotion = artifacts.predict(features)
         # Print result in requested format
         output = (
             f"predicted emotion: {predicted_emotion.flatten()[0]}\n"
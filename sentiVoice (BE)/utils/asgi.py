@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point with an asyncio prediction path.
+
+    python asgi.py
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+/api/predict and /api/predict_upload run decode + feature extraction in an
+executor (the feature process pool when FEATURE_WORKERS > 0, otherwise a thread
+pool) and inference on a pool of inference threads that hand their rows to the
+micro-batching scheduler, which serialises the model calls. The event loop never runs
+CPU work itself, so /health and other cheap requests stay responsive while long
+recordings are processed. Every other route is served by the Flask app through
+uvicorn's WSGI adapter. The fast routes record the same /metrics stages as the
+Flask endpoints and honour ?timings=1.
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import traceback
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+import flaskapp
+from flaskapp import (
+    health_payload,
+    ready_payload,
+    prepare_recording,
+    predict_prepared,
+    prediction_response,
+    prediction_cache_key,
+    convert_numpy_to_python,
+    metrics_payload,
+    wants_timings,
+    BATCH_WORKERS,
+)
+from feature_pool import get_feature_executor
+from prediction_cache import get_prediction_cache, audio_digest
+from inference_scheduler import INFERENCE_MAX_BATCH
+from startup import STARTUP_WARMUP, start_warmup
+from metrics import stage, collect_timings, add_timings, timed_job, record_request, timings_field, CONTENT_TYPE
+
+ASYNC_FEATURE_THREADS = int(os.environ.get('ASYNC_FEATURE_THREADS', BATCH_WORKERS))
+ASYNC_INFERENCE_THREADS = int(os.environ.get('ASYNC_INFERENCE_THREADS', INFERENCE_MAX_BATCH))
+
+# Threads that wait on the scheduler; it batches their rows and runs one model call at a time
+_inference_executor = ThreadPoolExecutor(max_workers=max(1, ASYNC_INFERENCE_THREADS), thread_name_prefix="inference")
+_feature_threads = None
+
+flask_app = WSGIMiddleware(flaskapp.app)
+
+
+def feature_threads():
+    """Thread pool for CPU work that is not worth shipping to another process"""
+    global _feature_threads
+    if _feature_threads is None:
+        _feature_threads = ThreadPoolExecutor(max_workers=max(1, ASYNC_FEATURE_THREADS), thread_name_prefix="features")
+    return _feature_threads
+
+
+def feature_executor():
+    """The feature process pool if enabled, else the thread pool for decode + extraction"""
+    executor = get_feature_executor()
+    return executor if executor is not None else feature_threads()
+
+
+async def run_timed_in(executor, fn, *args):
+    """Run fn in an executor and merge the stages it timed there into this request"""
+    result, timings = await asyncio.get_running_loop().run_in_executor(executor, timed_job, fn, *args)
+    add_timings(timings)
+    return result
+
+
+async def predict_source(source, audio_hash=None):
+    """Decode + extract in the feature executor, then predict on an inference thread"""
+    loop = asyncio.get_running_loop()
+    cache = get_prediction_cache()
+
+    key = None
+    if audio_hash is not None:
+        # Resolving the key may load the model on first use, so keep it off the loop, and off
+        # the inference threads so cache hits never wait behind running predictions
+        with stage("cache_lookup"):
+            key = await loop.run_in_executor(feature_threads(), prediction_cache_key, audio_hash)
+            cached = cache.get(key) if key else None
+        if cached is not None:
+            return cached
+
+    prepared = await run_timed_in(feature_executor(), prepare_recording, source)
+    result = await run_timed_in(_inference_executor, predict_prepared, prepared, audio_hash)
+
+    if key:
+        cache.put(key, result)
+    return result
+
+
+async def predict_json(body):
+    """Async twin of flaskapp.get_features"""
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    if not data:
+        return 400, {"status": "error", "message": "No data provided"}
+
+    if 'audio_data' in data:
+        loop = asyncio.get_running_loop()
+        try:
+            # A thread, not the feature process pool: pickling the upload both ways would cost more than decoding it
+            with stage("base64_decode"):
+                audio_binary = await loop.run_in_executor(feature_threads(), base64.b64decode, data['audio_data'])
+            result = await predict_source(audio_binary, audio_digest(audio_binary))
+        except Exception as e:
+            traceback.print_exc()
+            return 500, {"status": "error", "message": f"Error processing audio data: {str(e)}"}
+        body, status_code = prediction_response(result)
+        return status_code, body
+
+    if 'file_path' in data:
+        file_path = data['file_path']
+        if not os.path.exists(file_path):
+            return 400, {"status": "error", "message": "File does not exist"}
+        result = await predict_source(file_path)
+        if "error" in result:
+            return 500, {"status": "error", "message": result["error"]}
+        return 200, {"status": "success", "data": result}
+
+    return 400, {"status": "error", "message": "No audio_data or file_path provided"}
+
+
+async def predict_upload(body):
+    """Async twin of flaskapp.get_features_upload for raw audio bodies"""
+    if not body:
+        return 400, {"status": "error", "message": "No audio data provided"}
+    try:
+        result = await predict_source(body, audio_digest(body))
+    except Exception as e:
+        traceback.print_exc()
+        return 500, {"status": "error", "message": f"Error processing audio data: {str(e)}"}
+    body, status_code = prediction_response(result)
+    return status_code, body
+
+
+async def health(body):
+    return 200, health_payload()
+
+
+async def ready(body):
+    payload, status_code = ready_payload()
+    return status_code, payload
+
+
+async def prometheus_metrics(send):
+    body = metrics_payload().encode()
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", CONTENT_TYPE.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _content_type(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"content-type":
+            return value.decode("latin-1").split(";")[0].strip().lower()
+    return ""
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send_json(send, status_code, payload):
+    body = json.dumps(convert_numpy_to_python(payload), default=str).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"access-control-allow-origin", b"*"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _route(scope):
+    """(handler, metrics endpoint name or None) for the fast routes, else (None, None)"""
+    method, path = scope["method"], scope["path"]
+    if method == "GET" and path == "/health":
+        return health, None
+    if method == "GET" and path == "/ready":
+        return ready, None
+    if method == "POST" and path == "/api/predict" and _content_type(scope) == "application/json":
+        return predict_json, "predict"
+    if method == "POST" and path == "/api/predict_upload":
+        content_type = _content_type(scope)
+        if content_type.startswith("audio/") or content_type == "application/octet-stream":
+            return predict_upload, "predict_upload"
+    return None, None
+
+
+async def _instrumented(handler, endpoint, scope, body):
+    """Run a prediction handler, record it like flaskapp.instrumented does and add ?timings=1"""
+    start = time.perf_counter()
+    with collect_timings() as timings:
+        status_code, payload = await handler(body)
+    seconds = time.perf_counter() - start
+    record_request(endpoint, status_code, timings, seconds, payload)
+    query = {name: values[-1] for name, values in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+    if wants_timings(query):
+        payload["timings"] = timings_field(timings, seconds)
+    return status_code, payload
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                flaskapp.job_queue.start()
+                if STARTUP_WARMUP == "blocking":
+                    # Keep the event loop free for the lifespan protocol while the warm-up runs
+                    await asyncio.get_running_loop().run_in_executor(None, start_warmup, "blocking")
+                else:
+                    start_warmup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                _inference_executor.shutdown(wait=True)
+                if _feature_threads is not None:
+                    _feature_threads.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] == "/metrics":
+        await prometheus_metrics(send)
+        return
+
+    handler, endpoint = _route(scope) if scope["type"] == "http" else (None, None)
+    if handler is None:
+        # Multipart uploads, batch, CORS preflight and everything else
+        await flask_app(scope, receive, send)
+        return
+
+    body = await _read_body(receive)
+    if endpoint is None:
+        status_code, payload = await handler(body)
+    else:
+        status_code, payload = await _instrumented(handler, endpoint, scope, body)
+    await _send_json(send, status_code, payload)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get('PORT', 8080))
+    print(f"Starting ASGI app on 0.0.0.0:{port}")
+    uvicorn.run(app, host='0.0.0.0', port=port, timeout_graceful_shutdown=30)
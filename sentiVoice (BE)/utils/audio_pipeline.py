@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Decoded audio shared by every stage of a prediction request.
+The file is decoded once with librosa and the resulting DecodedAudio is handed to
+the quality gate, feature extraction and response building, which reuse its
+cached derived quantities instead of reloading the file.
+"""
+
+from functools import cached_property
+import io
+import os
+import tempfile
+import numpy as np
+
+from metrics import stage
+from audio_quality import QualityStats, QUALITY_BLOCK_SAMPLES, SILENCE_THRESHOLD, VAD_TRIM, VAD_TRIM_MIN_SECONDS, trim_mask
+
+
+class DecodedAudio:
+    """Mono samples at their native sample rate plus lazily computed derived values"""
+
+    def __init__(self, samples, sample_rate, source=None):
+        self.samples = samples
+        self.sample_rate = int(sample_rate)
+        self.source = source
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def duration(self):
+        return float(len(self.samples) / self.sample_rate)
+
+    @cached_property
+    def quality(self):
+        """Quality-gate and VAD statistics from one blockwise pass (see audio_quality.py)"""
+        return QualityStats.from_samples(self.samples)
+
+    @property
+    def max_amplitude(self):
+        return self.quality.peak
+
+    @property
+    def rms_energy(self):
+        return self.quality.rms_energy
+
+    def silence_ratio(self, threshold=SILENCE_THRESHOLD):
+        """Fraction of samples quieter than threshold"""
+        if threshold == SILENCE_THRESHOLD:
+            return self.quality.silence_ratio
+        return float(np.count_nonzero(np.abs(self.samples) < threshold) / len(self.samples))
+
+    def trimmed(self, mode=VAD_TRIM):
+        """
+        The recording without the non-speech frames the energy VAD found, plus a report.
+        Returns self when trimming is off, finds nothing to drop or would leave too little.
+        """
+        quality = self.quality
+        frame_length = quality.frame_length
+        n_frames = -(-len(self.samples) // frame_length)  # the partial tail frame counts too
+        report = {"mode": mode, "frames": n_frames, "frames_dropped": 0, "seconds_dropped": 0.0}
+        if mode == "off":
+            return self, report
+        speech = quality.speech_frames()
+        if len(speech) < n_frames:
+            # The partial tail frame has no VAD decision and follows its neighbour
+            speech = np.append(speech, speech[-1:] if len(speech) else False)
+        keep = trim_mask(speech, mode)
+        if keep is None or keep.sum() * frame_length < VAD_TRIM_MIN_SECONDS * self.sample_rate:
+            return self, report
+        samples = self.samples[np.repeat(keep, frame_length)[:len(self.samples)]]
+        report["frames_dropped"] = int(n_frames - keep.sum())
+        report["seconds_dropped"] = float((len(self.samples) - len(samples)) / self.sample_rate)
+        return DecodedAudio(samples, self.sample_rate, self.source), report
+
+    @cached_property
+    def stft_magnitude(self):
+        """|STFT| with librosa defaults, shared by the spectral features"""
+        from filterbanks import get_filterbanks
+        return get_filterbanks(self.sample_rate).stft_magnitude(self.samples)
+
+
+def decode_audio_bytes(audio_binary):
+    """
+    Decode an in-memory upload without a temp-file round trip.
+    soundfile reads WAV/FLAC/OGG straight from a BytesIO, downmixed exactly like
+    librosa.load(sr=None); other containers fall back to a temp file for audioread.
+    """
+    import soundfile as sf
+    try:
+        X, sample_rate = sf.read(io.BytesIO(audio_binary), dtype='float32', always_2d=True)
+    except Exception:
+        return _decode_via_temp_file(audio_binary)
+    X = X[:, 0] if X.shape[1] == 1 else np.mean(X, axis=1, dtype=np.float32)
+    return DecodedAudio(np.ascontiguousarray(X), sample_rate, source="<upload>")
+
+
+def _decode_via_temp_file(audio_binary):
+    import librosa
+    with stage("temp_file_write"), tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+        temp_file.write(audio_binary)
+        temp_file_path = temp_file.name
+    try:
+        X, sample_rate = librosa.load(temp_file_path, sr=None)
+    finally:
+        try:
+            os.unlink(temp_file_path)
+        except OSError:
+            pass
+    return DecodedAudio(X, sample_rate, source="<upload>")
+
+
+def probe_audio(source, n_windows=0, coverage=0.0, min_window_seconds=0.1, scan_if=None, confirm_if=None):
+    """
+    Header info of a path or upload bytes plus up to n_windows evenly spaced windows
+    of mono samples that together cover about `coverage` of the clip, read with
+    soundfile without decoding the whole file. The windows are only read when
+    scan_if(info) is true (or scan_if is None).
+    When confirm_if(QualityStats of the windows) is true, the whole file is then read
+    block by block into QualityStats, without keeping the samples.
+    Returns (info, windows, stats), where stats covers every sample or is None, or
+    None when soundfile cannot read the container.
+    """
+    import soundfile as sf
+    target = io.BytesIO(bytes(source)) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        with sf.SoundFile(target) as f:
+            info = {"duration": f.frames / f.samplerate, "sample_rate": int(f.samplerate),
+                    "channels": int(f.channels), "frames": int(f.frames)}
+            windows = []
+            stats = None
+            if n_windows > 0 and f.frames > 0 and (scan_if is None or scan_if(info)):
+                window_frames = max(int(min_window_seconds * f.samplerate), int(coverage * f.frames / n_windows), 1)
+                # The first window is the prefix; unseekable streams stop after it
+                last_start = max(f.frames - window_frames, 0)
+                starts = np.unique(np.linspace(0, last_start, n_windows).astype(np.int64))
+                for start in starts:
+                    if start and not f.seekable():
+                        break
+                    try:
+                        f.seek(int(start))
+                        block = f.read(window_frames, dtype='float32', always_2d=True)
+                    except Exception:
+                        break  # keep the windows read so far
+                    windows.append(_mono(block))
+            if confirm_if is not None and windows and f.seekable() and confirm_if(QualityStats.from_samples(np.concatenate(windows))):
+                f.seek(0)
+                stats = QualityStats()
+                for block in f.blocks(blocksize=QUALITY_BLOCK_SAMPLES, dtype='float32', always_2d=True):
+                    stats.add(_mono(block))
+    except Exception:
+        return None
+    return info, windows, stats
+
+
+def _mono(block):
+    return block[:, 0] if block.shape[1] == 1 else np.mean(block, axis=1, dtype=np.float32)
+
+
+def load_audio(source):
+    """Decode an audio file path, or raw upload bytes, once at the native sample rate"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode_audio_bytes(bytes(source))
+    import librosa
+    X, sample_rate = librosa.load(source, sr=None)
+    return DecodedAudio(X, sample_rate, source=source)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Quality-gate statistics gathered in one blockwise pass over the samples.
+Peak amplitude, RMS energy, the silence and clipping counts and the per-frame
+energies for voice-activity detection all come from the same cache-sized
+blocks, instead of separate full-length passes that each allocate a temporary
+as large as the recording. DecodedAudio and StreamedAudio both feed their
+samples through QualityStats.
+"""
+
+import os
+import numpy as np
+
+SILENCE_THRESHOLD = 0.001
+# Samples at or above this magnitude count as clipped (full scale is 1.0)
+CLIPPING_THRESHOLD = float(os.environ.get('CLIPPING_THRESHOLD', 0.999))
+
+# VAD frames are non-overlapping and as long as the STFT hop, so frame i covers the
+# samples STFT frame i is centred on
+VAD_FRAME_LENGTH = 512
+# A frame is speech when its RMS is above this level and VAD_MARGIN_DB above the noise floor
+VAD_THRESHOLD_DB = float(os.environ.get('VAD_THRESHOLD_DB', -45.0))
+VAD_MARGIN_DB = float(os.environ.get('VAD_MARGIN_DB', 6.0))
+VAD_NOISE_PERCENTILE = 10
+
+# Samples per block of the one-pass scan (a multiple of VAD_FRAME_LENGTH)
+QUALITY_BLOCK_SAMPLES = 64 * VAD_FRAME_LENGTH
+
+# Optional trim before feature extraction: "off", "edges" (lead-in and tail) or "all"
+# (every non-speech run). Speech runs are widened by VAD_TRIM_PAD_FRAMES on each side
+# (about 0.1 s at 22.05-48 kHz) so word onsets and decays survive
+VAD_TRIM_MODES = ("off", "edges", "all")
+VAD_TRIM = os.environ.get('VAD_TRIM', 'off')
+if VAD_TRIM not in VAD_TRIM_MODES:
+    raise ValueError(f"Unknown VAD_TRIM {VAD_TRIM!r}, expected one of {VAD_TRIM_MODES}")
+VAD_TRIM_PAD_FRAMES = int(os.environ.get('VAD_TRIM_PAD_FRAMES', 8))
+# Less speech than this is not trimmed at all
+VAD_TRIM_MIN_SECONDS = 1.0
+
+
+class QualityStats:
+    """Running quality statistics; add() mono float32 blocks in order"""
+
+    def __init__(self, frame_length=VAD_FRAME_LENGTH):
+        self.frame_length = frame_length
+        self.n_samples = 0
+        self.peak = 0.0
+        self.sum_squares = 0.0
+        self.silent = 0
+        self.clipped = 0
+        self._frame_energy = []
+        self._remainder = np.zeros(0, dtype=np.float32)
+
+    @classmethod
+    def from_samples(cls, samples, block_samples=QUALITY_BLOCK_SAMPLES):
+        stats = cls()
+        for start in range(0, len(samples), block_samples):
+            stats.add(samples[start:start + block_samples])
+        return stats
+
+    def add(self, block):
+        if not len(block):
+            return
+        magnitude = np.abs(block)
+        self.n_samples += len(block)
+        self.peak = max(self.peak, float(magnitude.max()))
+        self.silent += int(np.count_nonzero(magnitude < SILENCE_THRESHOLD))
+        self.clipped += int(np.count_nonzero(magnitude >= CLIPPING_THRESHOLD))
+
+        # Whole frames get their energy here; a partial frame waits for the next block
+        if len(self._remainder):
+            block = np.concatenate([self._remainder, block])
+        n_frames = len(block) // self.frame_length
+        frames = block[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        # float32 within a frame, float64 across frames
+        energy = np.einsum('ij,ij->i', frames, frames).astype(np.float64)
+        self.sum_squares += float(energy.sum())
+        self._frame_energy.append(energy)
+        self._remainder = block[n_frames * self.frame_length:]
+
+    @property
+    def rms_energy(self):
+        tail = self._remainder.astype(np.float64)
+        total = self.sum_squares + float(np.dot(tail, tail))
+        return float(np.sqrt(total / self.n_samples)) if self.n_samples else 0.0
+
+    @property
+    def silence_ratio(self):
+        return float(self.silent / self.n_samples) if self.n_samples else 1.0
+
+    @property
+    def clipping_ratio(self):
+        return float(self.clipped / self.n_samples) if self.n_samples else 0.0
+
+    @property
+    def frame_rms(self):
+        """RMS of every complete VAD frame"""
+        if not self._frame_energy:
+            return np.zeros(0)
+        return np.sqrt(np.concatenate(self._frame_energy) / self.frame_length)
+
+    def speech_frames(self):
+        """Boolean mask of frames the energy VAD marks as speech"""
+        frame_db = 20.0 * np.log10(np.maximum(self.frame_rms, 1e-10))
+        if not len(frame_db):
+            return np.zeros(0, dtype=bool)
+        noise_floor = np.percentile(frame_db, VAD_NOISE_PERCENTILE)
+        return frame_db > max(VAD_THRESHOLD_DB, noise_floor + VAD_MARGIN_DB)
+
+    @property
+    def speech_ratio(self):
+        speech = self.speech_frames()
+        return float(np.mean(speech)) if len(speech) else 0.0
+
+
+def trim_mask(speech, mode=VAD_TRIM, pad_frames=VAD_TRIM_PAD_FRAMES):
+    """Frames to keep for a VAD speech mask, or None when nothing is trimmed"""
+    if mode not in ("edges", "all") or not speech.any():
+        return None
+    if mode == "edges":
+        indices = np.flatnonzero(speech)
+        keep = np.zeros_like(speech)
+        keep[max(indices[0] - pad_frames, 0):indices[-1] + pad_frames + 1] = True
+    else:
+        # Widen every speech run by pad_frames on both sides
+        kernel = np.ones(2 * pad_frames + 1)
+        keep = np.convolve(speech.astype(float), kernel, mode='same') > 0
+    return None if keep.all() else keep
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Cost of the mel / chroma / MFCC / contrast stage with the filterbank cache,
+next to the librosa.feature calls it replaces. Both work on the same shared
+magnitude spectrogram, so only filterbank construction and application differ.
+Also prints how long building the filterbanks for one sample rate takes, the
+cost every worker pays once at warm-up instead of on a request.
+
+Usage: python bench_filterbanks.py [duration_seconds]
+"""
+
+import sys
+import numpy as np
+import librosa
+
+from audio_pipeline import DecodedAudio
+from feature_engine import SpectralFrontEnd, mfcc_features, chroma_features, mel_features, contrast_features
+from filterbanks import FilterBanks, chroma_basis
+from feature_pool import WARM_SAMPLE_RATES
+from bench_tonnetz import make_clip
+from bench_resample import best_of
+
+def librosa_families(front):
+    """The per-call librosa.feature path feature_engine used before the cache"""
+    S, sr = front.magnitude, front.sample_rate
+    mel_power = librosa.feature.melspectrogram(S=S ** 2, sr=sr)
+    np.mean(librosa.feature.mfcc(S=librosa.power_to_db(mel_power), sr=sr, n_mfcc=40).T, axis=0)
+    np.mean(librosa.feature.chroma_stft(S=S, sr=sr).T, axis=0)
+    np.mean(mel_power.T, axis=0)
+    np.mean(librosa.feature.spectral_contrast(S=S, sr=sr).T, axis=0)
+
+def cached_families(front):
+    front.__dict__.pop("mel_power", None)
+    for family in (mfcc_features, chroma_features, mel_features, contrast_features):
+        family(front)
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+
+    print(f"🔧 Filterbank cache, {duration:.0f}s clips")
+    print("=" * 60)
+    print(f"{'rate':>7} {'build':>9} {'librosa.feature':>16} {'cached':>9} {'saved':>8}")
+    for sample_rate in WARM_SAMPLE_RATES:
+        def build():
+            chroma_basis.cache_clear()
+            FilterBanks(sample_rate).chroma(0.0)
+        t_build = best_of(build)
+        front = SpectralFrontEnd(DecodedAudio(make_clip(duration, sample_rate).astype(np.float32), sample_rate))
+        front.power  # the STFT is shared by both paths, keep it out of the timing
+        cached_families(front)
+        t_librosa = best_of(lambda: librosa_families(front), repeats=7)
+        t_cached = best_of(lambda: cached_families(front), repeats=7)
+        print(f"{sample_rate:>7} {t_build * 1000:>7.1f}ms {t_librosa * 1000:>14.1f}ms "
+              f"{t_cached * 1000:>7.1f}ms {(t_librosa - t_cached) * 1000:>6.1f}ms")
+
+if __name__ == "__main__":
+    main()
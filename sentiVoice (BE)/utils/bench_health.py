@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+/health latency while the prediction API is saturated with long recordings.
+Starts an entry point, keeps N clients posting 120 s clips to /api/predict and
+polls /health from a separate client, then reports /health latency percentiles
+next to the prediction throughput.
+
+Usage:
+    python bench_health.py asgi gunicorn dev      # compare entry points
+    python bench_health.py --url http://host:port # an already running service
+"""
+
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+
+from bench_serving import ENTRY_POINTS, make_payload, start_server, stop_server
+
+def saturate(base_url, entry_point, payload, clients, duration, poll_interval):
+    stop = threading.Event()
+    predictions = []
+
+    def predict_loop(_):
+        while not stop.is_set():
+            try:
+                response = requests.post(f"{base_url}/api/predict", json=payload, timeout=600)
+                predictions.append(response.status_code)
+            except requests.RequestException:
+                predictions.append(None)
+
+    health_latencies = []
+    health_failures = 0
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for i in range(clients):
+            executor.submit(predict_loop, i)
+        time.sleep(1.0)  # let the prediction requests reach the CPU stages
+
+        started = time.perf_counter()
+        while time.perf_counter() - started < duration:
+            start = time.perf_counter()
+            try:
+                ok = requests.get(f"{base_url}/health", timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                health_latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                health_failures += 1
+            time.sleep(poll_interval)
+        stop.set()
+
+    latencies = np.array(health_latencies) if health_latencies else np.array([np.nan])
+    completed = sum(1 for status in predictions if status == 200)
+    print(f"{entry_point:>10} {len(health_latencies):>7} {np.percentile(latencies, 50):>8.1f} "
+          f"{np.percentile(latencies, 95):>8.1f} {np.max(latencies):>8.1f} {health_failures:>8} {completed:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /health latency under prediction load")
+    parser.add_argument("entry_points", nargs="*", choices=sorted(ENTRY_POINTS))
+    parser.add_argument("--url", help="measure an already running service instead")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent prediction clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of /health polling")
+    parser.add_argument("--clip-seconds", type=float, default=120.0)
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    args = parser.parse_args()
+    if not args.url and not args.entry_points:
+        parser.error("give one or more entry points or --url")
+
+    print(f"🔧 /health under load: {args.clients} clients posting {args.clip_seconds:.0f}s clips")
+    payload = make_payload(args.clip_seconds)
+    print(f"{'server':>10} {'polls':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'failed':>8} {'predicts':>8}")
+
+    targets = [(args.url, args.url)] if args.url else [(name, None) for name in args.entry_points]
+    for name, base_url in targets:
+        process = None
+        if base_url is None:
+            process, base_url = start_server(name, args.port)
+        try:
+            saturate(base_url, name, payload, args.clients, args.duration, args.poll_interval)
+        finally:
+            if process is not None:
+                stop_server(process)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Time and peak memory of the quality-gate statistics: the previous separate
+full-length NumPy passes (peak, RMS, silence ratio) against the one blockwise
+pass of audio_quality.QualityStats, which also yields the VAD statistics.
+
+Usage: python bench_quality_gate.py [sample_rate]
+"""
+
+import sys
+import tracemalloc
+import numpy as np
+
+from audio_quality import QualityStats
+from bench_resample import best_of
+from test_audio_quality import naive_stats
+
+DURATIONS = (10, 60, 120)
+
+def one_pass(X):
+    stats = QualityStats.from_samples(X)
+    return stats.peak, stats.rms_energy, stats.silence_ratio, stats.speech_ratio, stats.clipping_ratio
+
+def previous_gate(X):
+    # As DecodedAudio did: np.abs kept for the clip, plus a squared copy for the RMS
+    abs_samples = np.abs(X)
+    return (float(np.max(abs_samples)), float(np.sqrt(np.mean(X ** 2))),
+            float(np.sum(abs_samples < 0.001) / len(X)))
+
+def peak_memory(fn, X):
+    tracemalloc.start()
+    fn(X)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    sample_rate = int(sys.argv[1]) if len(sys.argv) > 1 else 48000
+
+    print(f"🔧 Quality gate statistics @ {sample_rate}Hz")
+    print("=" * 60)
+    print(f"{'clip':>6} {'separate':>10} {'one pass':>10} {'separate peak':>14} {'one-pass peak':>14}")
+    rng = np.random.default_rng(0)
+    for duration in DURATIONS:
+        X = (rng.standard_normal(duration * sample_rate) * 0.1).astype(np.float32)
+        naive_stats(X[:sample_rate])  # warm NumPy outside the measurement
+        t_previous = best_of(lambda: previous_gate(X), repeats=5)
+        t_one_pass = best_of(lambda: one_pass(X), repeats=5)
+        print(f"{duration:>5}s {t_previous * 1000:>8.1f}ms {t_one_pass * 1000:>8.1f}ms "
+              f"{peak_memory(previous_gate, X) / 1e6:>12.1f}MB {peak_memory(one_pass, X) / 1e6:>12.1f}MB")
+
+if __name__ == "__main__":
+    main()
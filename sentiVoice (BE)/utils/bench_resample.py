@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Cost of resampling to the canonical analysis rate, measured on its own, next to
+the feature extraction time it saves. Each available resampler is timed on
+browser-rate clips. Extraction is then timed at the native rate and at the
+analysis rate.
+
+Usage: python bench_resample.py [duration_seconds] [analysis_rate]
+"""
+
+import sys
+import time
+import numpy as np
+
+from audio_pipeline import DecodedAudio
+from feature_engine import extract_features, resample, SOXR_QUALITIES
+from bench_tonnetz import make_clip
+
+SOURCE_RATES = (44100, 48000)
+RESAMPLERS = ("polyphase",) + tuple(SOXR_QUALITIES) + ("kaiser_fast", "fft")
+FLAGS = dict(mfcc=True, chroma=True, mel=True, contrast=True, tonnetz=True)
+
+def best_of(fn, repeats=3):
+    """Fastest of a few runs, in seconds"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 120.0
+    analysis_rate = int(sys.argv[2]) if len(sys.argv) > 2 else 22050
+
+    print(f"🔧 Resampling to {analysis_rate}Hz, {duration:.0f}s clips")
+    print("=" * 60)
+    clips = {rate: make_clip(duration, rate).astype(np.float32) for rate in SOURCE_RATES}
+
+    print(f"{'resampler':<12}" + "".join(f"{f'{rate}Hz':>14}" for rate in SOURCE_RATES))
+    for res_type in RESAMPLERS:
+        cells = []
+        for rate, X in clips.items():
+            try:
+                resample(X[:rate], rate, analysis_rate, res_type)  # first call builds filters / imports
+                elapsed = best_of(lambda: resample(X, rate, analysis_rate, res_type))
+                cells.append(f"{elapsed * 1000:>10.0f} ms")
+            except Exception as e:
+                cells.append(f"{'n/a':>13}")
+                print(f"   {res_type}: {e}")
+        print(f"{res_type:<12}" + "".join(f"{cell:>14}" for cell in cells))
+
+    print(f"\n{'source':<10} {'native extract':>15} {'resample':>10} {'extract @' + str(analysis_rate):>15} {'saved':>8}")
+    for rate, X in clips.items():
+        native = best_of(lambda: extract_features(DecodedAudio(X, rate), **FLAGS), repeats=1)
+        resampled = resample(X, rate, analysis_rate, "polyphase")
+        t_resample = best_of(lambda: resample(X, rate, analysis_rate, "polyphase"))
+        canonical = best_of(lambda: extract_features(DecodedAudio(resampled, analysis_rate), **FLAGS), repeats=1)
+        saved = native - (t_resample + canonical)
+        print(f"{rate:<10} {native:>14.2f}s {t_resample * 1000:>8.0f}ms {canonical:>14.2f}s {saved:>7.2f}s")
+
+if __name__ == "__main__":
+    main()
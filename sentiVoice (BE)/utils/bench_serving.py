@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load benchmark of the serving entry points.
+Starts the service with the chosen entry point, sends /api/predict requests at
+1, 4 and 16 concurrent clients and reports latency percentiles and throughput,
+then stops it with SIGTERM so graceful shutdown is exercised too.
+
+Usage:
+    python bench_serving.py dev          # python flaskapp.py (Werkzeug dev server)
+    python bench_serving.py gunicorn     # gunicorn -c gunicorn.conf.py wsgi:app
+    python bench_serving.py asgi         # python asgi.py (uvicorn, async prediction path)
+    python bench_serving.py --url http://host:port   # an already running service
+"""
+
+import io
+import os
+import sys
+import time
+import base64
+import signal
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+import soundfile as sf
+
+from quick_test import create_good_test_audio
+
+ENTRY_POINTS = {
+    "dev": [sys.executable, "flaskapp.py"],
+    "gunicorn": ["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+    "asgi": [sys.executable, "asgi.py"],
+}
+CONCURRENCY_LEVELS = (1, 4, 16)
+
+def make_payload(duration=15.0):
+    """base64 WAV of the quick_test speech-like signal, tiled to the requested duration"""
+    signal, sample_rate = create_good_test_audio()
+    signal = np.tile(signal, int(np.ceil(duration * sample_rate / len(signal))))[:int(duration * sample_rate)]
+    buffer = io.BytesIO()
+    sf.write(buffer, signal, sample_rate, format='WAV')
+    return {"audio_data": base64.b64encode(buffer.getvalue()).decode()}
+
+def start_server(entry_point, port):
+    env = dict(os.environ, PORT=str(port), FLASK_ENV="production")
+    # The same clip is sent over and over, so keep the prediction cache out of the measurement
+    env["PREDICTION_CACHE_SIZE"] = "0"
+    env.pop("PREDICTION_CACHE_DB", None)
+    process = subprocess.Popen(
+        ENTRY_POINTS[entry_point],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    while time.perf_counter() - started < 300:
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                print(f"   {entry_point} answered /health after {time.perf_counter() - started:.1f}s")
+                return process, base_url
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"{entry_point} exited with code {process.returncode}")
+        time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"{entry_point} did not become healthy")
+
+def stop_server(process):
+    started = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+        print(f"   Stopped in {time.perf_counter() - started:.1f}s (exit code {process.returncode})")
+    except subprocess.TimeoutExpired:
+        process.kill()
+        print("   ⚠️  Did not stop within 60s, killed")
+
+def run_level(base_url, payload, concurrency, requests_per_client):
+    def one_request(_):
+        start = time.perf_counter()
+        response = requests.post(f"{base_url}/api/predict", json=payload, timeout=600)
+        return time.perf_counter() - start, response.status_code
+
+    total = concurrency * requests_per_client
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(1 for _, status in results if status != 200)
+    print(f"{concurrency:>11} {total:>9} {np.percentile(latencies, 50):>9.0f} {np.percentile(latencies, 95):>9.0f} "
+          f"{np.percentile(latencies, 99):>9.0f} {total / wall:>8.2f} {errors:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the serving entry points")
+    parser.add_argument("entry_point", nargs="?", choices=sorted(ENTRY_POINTS))
+    parser.add_argument("--url", help="benchmark an already running service instead")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    args = parser.parse_args()
+    if not args.url and not args.entry_point:
+        parser.error("give an entry point or --url")
+
+    print(f"🔧 Serving benchmark: {args.url or args.entry_point}")
+    payload = make_payload()
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_server(args.entry_point, args.port)
+
+    try:
+        # One untimed request so model loading and first-call compilation are not measured
+        requests.post(f"{base_url}/api/predict", json=payload, timeout=600)
+        print(f"{'concurrency':>11} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>7}")
+        for concurrency in CONCURRENCY_LEVELS:
+            run_level(base_url, payload, concurrency, args.requests_per_client)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+if __name__ == "__main__":
+    main()
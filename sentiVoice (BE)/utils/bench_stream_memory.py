@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Peak memory and time of feature extraction, full load vs streaming.
+Measures with tracemalloc (NumPy buffers included) from the upload bytes to the
+193-dim vector, for increasing clip lengths: the full-load peak grows with the
+clip, the streaming peak should stay flat.
+
+Usage: python bench_stream_memory.py [sample_rate]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from audio_pipeline import decode_audio_bytes
+from feature_engine import extract_features
+from stream_features import StreamedAudio
+from bench_upload_memory import make_wav
+
+DURATIONS = (30, 60, 120)
+FLAGS = dict(mfcc=True, chroma=True, mel=True, contrast=True, tonnetz=True)
+
+def full_load(wav):
+    return extract_features(decode_audio_bytes(wav), **FLAGS)
+
+def streaming(wav):
+    return StreamedAudio(wav).extract(**FLAGS)
+
+def measure(fn, wav):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(wav)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+def main():
+    sample_rate = int(sys.argv[1]) if len(sys.argv) > 1 else 48000
+
+    print(f"🔧 Feature extraction memory @ {sample_rate}Hz")
+    print("=" * 60)
+    streaming(make_wav(5, sample_rate))  # import and warm librosa outside the measurement
+    print(f"{'clip':>6} {'full peak':>10} {'full time':>10} {'stream peak':>12} {'stream time':>12}")
+    for duration in DURATIONS:
+        wav = make_wav(duration, sample_rate)
+        full_peak, full_time = measure(full_load, wav)
+        stream_peak, stream_time = measure(streaming, wav)
+        print(f"{duration:>5}s {full_peak / 1e6:>8.1f}MB {full_time:>9.2f}s {stream_peak / 1e6:>10.1f}MB {stream_time:>11.2f}s")
+
+if __name__ == "__main__":
+    main()
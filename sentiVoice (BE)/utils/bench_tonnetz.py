@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Accuracy and per-stage timing comparison of the tonnetz modes in feature_engine.py.
+Runs the exact (waveform HPSS + chroma_cqt) path and the fast spectrogram path
+with several decimation factors over synthetic speech-like clips.
+
+Usage: python bench_tonnetz.py [duration_seconds ...]
+"""
+
+import sys
+import time
+import numpy as np
+import librosa
+import joblib
+
+from audio_pipeline import DecodedAudio
+from feature_engine import SpectralFrontEnd, FEATURE_LAYOUT
+from model_registry import get_registry
+from quick_test import create_good_test_audio
+
+DECIMATIONS = (1, 2, 4)
+SAMPLE_RATES = (22050, 48000)
+
+def make_clip(duration, sample_rate):
+    """Tile the quick_test speech-like signal to the requested duration"""
+    signal, base_rate = create_good_test_audio()
+    signal = librosa.resample(signal.astype(np.float32), orig_sr=base_rate, target_sr=sample_rate)
+    repeats = int(np.ceil(duration * sample_rate / len(signal)))
+    return np.tile(signal, repeats)[:int(duration * sample_rate)]
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+def exact_stages(X, sample_rate):
+    harmonic, t_hpss = timed(librosa.effects.harmonic, X)
+    tonnetz, t_tonnetz = timed(librosa.feature.tonnetz, y=harmonic, sr=sample_rate)
+    return np.mean(tonnetz.T, axis=0), {"hpss": t_hpss, "chroma+tonnetz": t_tonnetz}
+
+def fast_stages(front, decimation):
+    S = front.magnitude
+    kernel_size = 31
+    if decimation > 1:
+        S = S[:, ::decimation]
+        kernel_size = max(3, (kernel_size // decimation) | 1)
+    (harmonic, _), t_hpss = timed(librosa.decompose.hpss, S, kernel_size=kernel_size)
+    chroma, t_chroma = timed(librosa.feature.chroma_stft, S=harmonic, sr=front.sample_rate)
+    tonnetz, t_tonnetz = timed(librosa.feature.tonnetz, chroma=chroma, sr=front.sample_rate)
+    return np.mean(tonnetz.T, axis=0), {"hpss": t_hpss, "chroma": t_chroma, "tonnetz": t_tonnetz}
+
+def tonnetz_scale():
+    """Scaler standard deviations for the 6 tonnetz columns, to express deltas in model units"""
+    scaler_path = get_registry().paths()["scaler"]
+    scaler = joblib.load(scaler_path)
+    return scaler.scale_[-FEATURE_LAYOUT[-1][1]:]
+
+def main():
+    durations = [float(d) for d in sys.argv[1:]] or [10.0, 60.0, 120.0]
+    scale = tonnetz_scale()
+
+    print("🔧 Tonnetz mode benchmark")
+    print("=" * 78)
+    print(f"{'clip':<14}{'mode':<10}{'stages (s)':<42}{'total':>7}{'max|Δ|/σ':>10}")
+    for sample_rate in SAMPLE_RATES:
+        for duration in durations:
+            X = make_clip(duration, sample_rate)
+            audio = DecodedAudio(X, sample_rate)
+            front = SpectralFrontEnd(audio)
+            _, t_stft = timed(lambda: front.magnitude)
+            clip = f"{duration:.0f}s@{sample_rate}"
+
+            expected, stages = exact_stages(X, sample_rate)
+            stage_text = " ".join(f"{k}={v:.3f}" for k, v in stages.items())
+            print(f"{clip:<14}{'exact':<10}{stage_text:<42}{sum(stages.values()):>7.3f}{0.0:>10.3f}")
+
+            for decimation in DECIMATIONS:
+                actual, stages = fast_stages(front, decimation)
+                delta = float(np.max(np.abs(actual - expected) / scale))
+                stage_text = " ".join(f"{k}={v:.3f}" for k, v in stages.items())
+                print(f"{'':<14}{f'fast/{decimation}':<10}{stage_text:<42}{sum(stages.values()):>7.3f}{delta:>10.3f}")
+            print(f"{'':<14}(shared STFT, already paid for chroma/contrast: {t_stft:.3f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the upload ingest + decode stage, before and after in-memory decoding.
+Measures with tracemalloc (NumPy buffers included) from the raw request body up to
+the decoded float32 samples; everything after decoding is identical for all paths.
+
+Usage: python bench_upload_memory.py [duration_seconds] [sample_rate]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import base64
+import tempfile
+import tracemalloc
+import numpy as np
+import soundfile as sf
+
+from audio_pipeline import decode_audio_bytes
+from test_audio_processing import create_test_audio
+
+def make_wav(duration, sample_rate):
+    """16-bit PCM WAV bytes of the speech-like test signal"""
+    import librosa
+    signal, base_rate = create_test_audio()
+    signal = librosa.resample(signal, orig_sr=base_rate, target_sr=sample_rate)
+    signal = np.tile(signal, int(np.ceil(duration * sample_rate / len(signal))))[:int(duration * sample_rate)]
+    buffer = io.BytesIO()
+    sf.write(buffer, signal, sample_rate, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+def base64_temp_file(body):
+    """Previous /api/predict path: JSON -> b64decode -> temp file -> librosa.load"""
+    import librosa
+    data = json.loads(body)
+    audio_binary = base64.b64decode(data['audio_data'])
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+        temp_file.write(audio_binary)
+        temp_file_path = temp_file.name
+    X, sample_rate = librosa.load(temp_file_path, sr=None)
+    os.unlink(temp_file_path)
+    return X
+
+def base64_in_memory(body):
+    """Current /api/predict path: JSON -> b64decode -> soundfile on BytesIO"""
+    data = json.loads(body)
+    return decode_audio_bytes(base64.b64decode(data['audio_data'])).samples
+
+def raw_in_memory(body):
+    """/api/predict_upload path: raw body -> soundfile on BytesIO"""
+    return decode_audio_bytes(body).samples
+
+def measure(fn, body):
+    fn(body)  # import and warm everything outside the measurement
+    tracemalloc.start()
+    start = time.perf_counter()
+    samples = fn(body)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed, samples
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 120.0
+    sample_rate = int(sys.argv[2]) if len(sys.argv) > 2 else 48000
+
+    wav = make_wav(duration, sample_rate)
+    json_body = json.dumps({"audio_data": base64.b64encode(wav).decode()}).encode()
+    decoded_mb = duration * sample_rate * 4 / 1e6
+
+    print(f"🔧 Upload ingest memory: {duration:.0f}s @ {sample_rate}Hz")
+    print(f"   WAV {len(wav) / 1e6:.1f} MB, JSON body {len(json_body) / 1e6:.1f} MB, float32 samples {decoded_mb:.1f} MB")
+    print("=" * 60)
+
+    reference = None
+    for name, fn, body in (
+        ("base64 + temp file (before)", base64_temp_file, json_body),
+        ("base64 + BytesIO", base64_in_memory, json_body),
+        ("raw body + BytesIO", raw_in_memory, wav),
+    ):
+        peak, elapsed, samples = measure(fn, body)
+        if reference is None:
+            reference = samples
+        same = np.array_equal(samples, reference)
+        print(f"{name:<30} peak {peak / 1e6:6.1f} MB  {elapsed * 1000:7.1f} ms  {'identical' if same else 'DIFFERENT'}")
+
+if __name__ == "__main__":
+    main()
@@ -6,51 +6,45 @@ This script helps identify issues with model files, feature extraction, and pred
 
 import os
 import numpy as np
-import joblib
 import pandas as pd
-from tensorflow.keras.models import load_model
+from model_registry import get_registry, get_artifacts
 import traceback
 import tempfile
-from pathlib import Path
 
 def check_model_files():
     """Check if all required model files exist and are valid"""
     print("🔍 Checking model files...")
     
-    script_dir = Path(__file__).parent
-    output_dir = script_dir / "audio_feature_extracted"
-    
-    required_files = {
-        'scaler.pkl': output_dir / 'scaler.pkl',
-        'encoder.pkl': output_dir / 'encoder.pkl',
-        'model.h5': output_dir / 'model.h5'
-    }
-    
-    all_good = True
-    
-    for name, file_path in required_files.items():
-        if file_path.exists():
-            print(f"✅ {name} exists")
-            try:
-                if name.endswith('.pkl'):
-                    obj = joblib.load(file_path)
-                    print(f"   Type: {type(obj)}")
-                    if hasattr(obj, 'n_features_in_'):
-                        print(f"   Expected features: {obj.n_features_in_}")
-                    if hasattr(obj, 'classes_'):
-                        print(f"   Classes: {obj.classes_}")
-                elif name.endswith('.h5'):
-                    model = load_model(file_path, compile=False)
-                    print(f"   Model summary:")
-                    model.summary()
-            except Exception as e:
-                print(f"❌ Error loading {name}: {e}")
-                all_good = False
+    registry = get_registry()
+    missing = registry.missing_files()
+    
+    for name, file_path in registry.paths().items():
+        file_name = os.path.basename(file_path)
+        if file_path in missing:
+            print(f"❌ {file_name} missing")
         else:
-            print(f"❌ {name} missing")
-            all_good = False
+            print(f"✅ {file_name} exists")
+    
+    if missing:
+        return False
+    
+    try:
+        artifacts = registry.get()
+    except Exception as e:
+        print(f"❌ Error loading model artifacts: {e}")
+        return False
     
-    return all_good
+    for obj in (artifacts.scaler, artifacts.encoder):
+        print(f"   Type: {type(obj)}")
+        if hasattr(obj, 'n_features_in_'):
+            print(f"   Expected features: {obj.n_features_in_}")
+        if hasattr(obj, 'classes_'):
+            print(f"   Classes: {obj.classes_}")
+    print(f"   Artifact version: {artifacts.version}")
+    print(f"   Model summary:")
+    artifacts.model.summary()
+    
+    return True
 
 def test_feature_extraction():
     """Test feature extraction with a dummy audio signal"""
@@ -107,13 +101,11 @@ def test_model_prediction(features):
     print("\n🔍 Testing model prediction...")
     
     try:
-        script_dir = Path(__file__).parent
-        output_dir = script_dir / "audio_feature_extracted"
-        
         # Load model components
-        scaler = joblib.load(output_dir / 'scaler.pkl')
-        encoder = joblib.load(output_dir / 'encoder.pkl')
-        model = load_model(output_dir / 'model.h5', compile=False)
+        artifacts = get_artifacts()
+        scaler = artifacts.scaler
+        encoder = artifacts.encoder
+        model = artifacts.model
         
         print(f"Model components loaded successfully")
         
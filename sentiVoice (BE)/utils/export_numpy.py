@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Export audio_feature_extracted/model.h5 to model.npz for the "numpy" model backend.
+Reading the .h5 needs TensorFlow; serving the exported file (numpy_model.py) only
+needs NumPy. Every layer must be one numpy_model supports, and after writing the
+file the Keras and NumPy outputs are compared on random scaled feature vectors.
+
+Usage: python export_numpy.py [--output PATH]
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+
+from model_registry import ARTIFACT_DIR
+from model_backends import BACKEND_FILES
+from numpy_model import NumpyModel, SUPPORTED_LAYERS
+
+N_CHECK = 64
+
+def _single(value):
+    return int(value[0]) if isinstance(value, (list, tuple)) else int(value)
+
+def layer_spec(layer):
+    """The settings numpy_model needs for one Keras layer"""
+    kind = type(layer).__name__
+    config = layer.get_config()
+    if kind not in SUPPORTED_LAYERS:
+        raise ValueError(f"Layer {layer.name!r} ({kind}) is not supported by numpy_model")
+    if config.get("data_format", "channels_last") != "channels_last":
+        raise ValueError(f"Layer {layer.name!r} uses {config['data_format']}; only channels_last is supported")
+
+    spec = {"name": layer.name, "type": kind, "n_weights": len(layer.get_weights())}
+    if "activation" in config:
+        spec["activation"] = config["activation"]
+    if kind == "Conv1D":
+        if config.get("groups", 1) != 1:
+            raise ValueError(f"Layer {layer.name!r} is a grouped convolution")
+        spec.update(strides=_single(config["strides"]), dilation_rate=_single(config["dilation_rate"]),
+                    padding=config["padding"], use_bias=config["use_bias"])
+    elif kind == "Dense":
+        spec.update(use_bias=config["use_bias"])
+    elif kind in ("MaxPooling1D", "AveragePooling1D"):
+        pool_size = _single(config["pool_size"])
+        strides = config.get("strides") or pool_size
+        spec.update(pool_size=pool_size, strides=_single(strides), padding=config["padding"])
+    elif kind == "GlobalMaxPooling1D" or kind == "GlobalAveragePooling1D":
+        if config.get("keepdims"):
+            raise ValueError(f"Layer {layer.name!r} keeps the pooled axis")
+    elif kind == "BatchNormalization":
+        if config["axis"] not in (-1, 2, [-1], [2]):
+            raise ValueError(f"Layer {layer.name!r} normalizes axis {config['axis']}; only the channel axis is supported")
+        spec.update(epsilon=float(config["epsilon"]), center=config["center"], scale=config["scale"])
+    return spec
+
+def export(model, path):
+    """Write the layer stack and weights of a sequential Keras model to path"""
+    layers = [layer for layer in model.layers if type(layer).__name__ != "InputLayer"]
+    spec = {"input_shape": [int(d) for d in model.input_shape[1:]], "layers": [layer_spec(layer) for layer in layers]}
+    arrays = {"spec": np.array(json.dumps(spec))}
+    for i, layer in enumerate(layers):
+        for j, weight in enumerate(layer.get_weights()):
+            arrays[f"{i}/{j}"] = np.asarray(weight, dtype=np.float32)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model.h5 to a NumPy weight file")
+    parser.add_argument("--output", default=os.path.join(ARTIFACT_DIR, BACKEND_FILES["numpy"]))
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    source = os.path.join(ARTIFACT_DIR, BACKEND_FILES["keras"])
+    print(f"🔧 Exporting {source}")
+    model = load_model(source, compile=False)
+    export(model, args.output)
+    print(f"✅ Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB, "
+          f"{os.path.getsize(source) / 1024:.0f} KB as .h5)")
+
+    # The scaler centres every column, so standard-normal rows look like real scaled input
+    x = np.random.default_rng(0).standard_normal((N_CHECK,) + tuple(model.input_shape[1:])).astype(np.float32)
+    expected = model.predict(x, verbose=0)
+    actual = NumpyModel(args.output).predict(x)
+    max_abs = float(np.max(np.abs(expected - actual)))
+    same_label = int(np.sum(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+    print(f"📊 max |Δp| over {N_CHECK} rows: {max_abs:.2e}, same label: {same_label}/{N_CHECK}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Export audio_feature_extracted/model.h5 to model.tflite for the "tflite" model backend.
+The export itself needs the full TensorFlow package; serving the exported file only
+needs tflite-runtime (or ai-edge-litert). After writing the file the Keras and TFLite
+outputs are compared on random scaled feature vectors.
+
+Usage: python export_tflite.py [--float16] [--output PATH]
+"""
+
+import os
+import argparse
+import numpy as np
+
+from model_registry import ARTIFACT_DIR
+from model_backends import BACKEND_FILES, TFLiteModel
+
+N_CHECK = 64
+
+def convert(model, float16=False):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if float16:
+        # Halves the file; weights are dequantized to float32 at load time
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model.h5 to TFLite")
+    parser.add_argument("--float16", action="store_true", help="store weights as float16")
+    parser.add_argument("--output", default=os.path.join(ARTIFACT_DIR, BACKEND_FILES["tflite"]))
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    source = os.path.join(ARTIFACT_DIR, BACKEND_FILES["keras"])
+    print(f"🔧 Exporting {source}")
+    model = load_model(source, compile=False)
+    flatbuffer = convert(model, float16=args.float16)
+    with open(args.output, "wb") as f:
+        f.write(flatbuffer)
+    print(f"✅ Wrote {args.output} ({len(flatbuffer) / 1024:.0f} KB, {os.path.getsize(source) / 1024:.0f} KB as .h5)")
+
+    # The scaler centres every column, so standard-normal rows look like real scaled input
+    x = np.random.default_rng(0).standard_normal((N_CHECK,) + tuple(model.input_shape[1:])).astype(np.float32)
+    expected = model.predict(x, verbose=0)
+    actual = TFLiteModel(args.output).predict(x)
+    max_abs = float(np.max(np.abs(expected - actual)))
+    same_label = int(np.sum(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+    print(f"📊 max |Δp| over {N_CHECK} rows: {max_abs:.2e}, same label: {same_label}/{N_CHECK}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Shared spectral front-end for the 193-dim emotion feature vector.
+One magnitude STFT and one mel power spectrogram are computed per clip and every
+feature family (MFCC, chroma, mel, contrast) is derived from those intermediates
+instead of letting each librosa.feature call redo its own STFT and filterbank.
+The filterbanks themselves come from the per-rate cache in filterbanks.py.
+"""
+
+from functools import cached_property
+from math import gcd
+import os
+import numpy as np
+import librosa
+
+from audio_pipeline import DecodedAudio
+from filterbanks import get_filterbanks
+from metrics import stage
+
+# Feature families in the order the model was trained on
+FEATURE_LAYOUT = (
+    ("mfcc", 40),
+    ("chroma", 12),
+    ("mel", 128),
+    ("contrast", 7),
+    ("tonnetz", 6),
+)
+N_FEATURES = sum(size for _, size in FEATURE_LAYOUT)  # 193
+
+# "exact" keeps the waveform HPSS + chroma_cqt tonnetz the model was trained with,
+# "fast" derives it from the shared spectrogram (see fast_tonnetz_features)
+TONNETZ_MODE = os.environ.get("TONNETZ_MODE", "exact")
+TONNETZ_DECIMATION = int(os.environ.get("TONNETZ_DECIMATION", 1))
+
+# Resample every recording to this rate before analysis; 0 keeps the native rate the
+# current model was trained with. RESAMPLE_TYPE picks the resampler (see resample)
+ANALYSIS_SAMPLE_RATE = int(os.environ.get("ANALYSIS_SAMPLE_RATE", 0))
+RESAMPLE_TYPE = os.environ.get("RESAMPLE_TYPE", "polyphase")
+SOXR_QUALITIES = {"soxr_vhq": "VHQ", "soxr_hq": "HQ", "soxr_mq": "MQ", "soxr_lq": "LQ"}
+
+
+def resample(samples, orig_sr, target_sr, res_type=RESAMPLE_TYPE):
+    """
+    Resample mono float32 samples.
+    "polyphase" is scipy's resample_poly (no extra dependency), "soxr_vhq/hq/mq/lq"
+    use the optional soxr package, any other name is passed to librosa.resample.
+    """
+    if orig_sr == target_sr:
+        return samples
+    if res_type == "polyphase":
+        import scipy.signal
+        divisor = gcd(int(orig_sr), int(target_sr))
+        resampled = scipy.signal.resample_poly(samples, int(target_sr) // divisor, int(orig_sr) // divisor)
+    elif res_type in SOXR_QUALITIES:
+        import soxr
+        resampled = soxr.resample(samples, orig_sr, target_sr, quality=SOXR_QUALITIES[res_type])
+    else:
+        resampled = librosa.resample(samples, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type)
+    return np.ascontiguousarray(resampled, dtype=np.float32)
+
+
+def to_analysis_rate(audio, target_rate=ANALYSIS_SAMPLE_RATE, res_type=RESAMPLE_TYPE):
+    """The recording at the canonical analysis rate, or unchanged when no rate is configured"""
+    if not target_rate or audio.sample_rate == target_rate:
+        return audio
+    return DecodedAudio(resample(audio.samples, audio.sample_rate, target_rate, res_type), target_rate, audio.source)
+
+
+class SpectralFrontEnd:
+    """Spectrogram intermediates for one clip, each computed at most once"""
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.sample_rate = audio.sample_rate
+        self.banks = get_filterbanks(audio.sample_rate)
+
+    @property
+    def magnitude(self):
+        return self.audio.stft_magnitude
+
+    @cached_property
+    def power(self):
+        return self.magnitude ** 2
+
+    @cached_property
+    def mel_power(self):
+        return self.banks.mel_basis @ self.power
+
+
+def mfcc_features(front):
+    # The DCT is linear, so it is applied once to the frame-mean of the mel dB spectrogram
+    mel_db = librosa.power_to_db(front.mel_power)
+    return front.banks.dct @ np.mean(mel_db, axis=1)
+
+
+def chroma_features(front):
+    return np.mean(front.banks.chroma_from(front.magnitude).T, axis=0)
+
+
+def mel_features(front):
+    return np.mean(front.mel_power.T, axis=0)
+
+
+def contrast_features(front):
+    peak, valley = front.banks.contrast_peak_valley(front.magnitude)
+    return np.mean((librosa.power_to_db(peak) - librosa.power_to_db(valley)).T, axis=0)
+
+
+def tonnetz_features(front):
+    if TONNETZ_MODE == "fast":
+        return fast_tonnetz_features(front, decimation=TONNETZ_DECIMATION)
+    X = front.audio.samples
+    return np.mean(librosa.feature.tonnetz(y=librosa.effects.harmonic(X), sr=front.sample_rate).T, axis=0)
+
+
+def fast_tonnetz_features(front, decimation=1):
+    """
+    Tonnetz from the shared magnitude spectrogram.
+    Harmonic/percussive separation runs on the magnitude frames (no istft and no CQT
+    re-analysis) and the harmonic part feeds chroma_stft. With decimation > 1 only
+    every n-th frame is analysed and the median kernel shrinks to the same time span.
+    """
+    S = front.magnitude
+    kernel_size = 31
+    if decimation > 1:
+        S = S[:, ::decimation]
+        kernel_size = max(3, (kernel_size // decimation) | 1)
+    harmonic, _ = librosa.decompose.hpss(S, kernel_size=kernel_size)
+    chroma = front.banks.chroma_from(harmonic)
+    return np.mean(librosa.feature.tonnetz(chroma=chroma, sr=front.sample_rate).T, axis=0)
+
+
+FEATURE_FUNCTIONS = {
+    "mfcc": mfcc_features,
+    "chroma": chroma_features,
+    "mel": mel_features,
+    "contrast": contrast_features,
+    "tonnetz": tonnetz_features,
+}
+
+
+def extract_features(audio, **kwargs):
+    """
+    Compute the requested feature families from one shared front-end and
+    concatenate them in FEATURE_LAYOUT order. A family that fails is replaced
+    by zeros of its size, matching the behaviour of the original extractor.
+    The shared STFT is timed as its own stage; mfcc also pays for the mel
+    spectrogram it shares with mel.
+    """
+    with stage("features.resample"):
+        front = SpectralFrontEnd(to_analysis_rate(audio))
+    parts = []
+
+    if any(kwargs.get(name) for name, _ in FEATURE_LAYOUT):
+        with stage("features.stft"):
+            front.magnitude
+    for name, size in FEATURE_LAYOUT:
+        if not kwargs.get(name):
+            continue
+        try:
+            with stage(f"features.{name}"):
+                values = FEATURE_FUNCTIONS[name](front)
+            print(f"{name.capitalize()} features shape: {values.shape}, range: {np.min(values):.4f} to {np.max(values):.4f}")
+        except Exception as e:
+            print(f"Error extracting {name} features: {e}")
+            values = np.zeros(size)
+        parts.append(values)
+
+    return np.hstack(parts).astype(np.float64) if parts else np.array([])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Process pool for the CPU-bound decode + feature extraction stage.
+With FEATURE_WORKERS > 0 the Flask handlers send decode/extract jobs to worker
+processes so librosa work spreads over every vCPU, while TensorFlow and the model
+stay in the parent process. With FEATURE_WORKERS=0 (default) jobs run in the
+calling thread as before.
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+FEATURE_WORKERS = int(os.environ.get('FEATURE_WORKERS', 0))
+FEATURE_POOL_START_METHOD = os.environ.get('FEATURE_POOL_START_METHOD', 'spawn')
+
+# Sample rates browsers usually record at; workers build their filterbanks for these up front
+WARM_SAMPLE_RATES = (16000, 22050, 44100, 48000)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def warm_worker():
+    """Build the filterbanks and run the feature engine once per common sample rate"""
+    import numpy as np
+    from audio_pipeline import DecodedAudio
+    from feature_engine import extract_features, ANALYSIS_SAMPLE_RATE
+    from filterbanks import warm_filterbanks
+
+    warm_filterbanks(WARM_SAMPLE_RATES + ((ANALYSIS_SAMPLE_RATE,) if ANALYSIS_SAMPLE_RATE else ()))
+    for sample_rate in WARM_SAMPLE_RATES:
+        t = np.arange(sample_rate, dtype=np.float32) / sample_rate
+        signal = (0.1 * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+        extract_features(
+            DecodedAudio(signal, sample_rate),
+            mfcc=True,
+            chroma=True,
+            mel=True,
+            contrast=True,
+            tonnetz=True
+        )
+    print(f"Feature worker {os.getpid()} warmed up")
+
+
+def get_feature_executor():
+    """Return the process pool, or None when FEATURE_WORKERS is 0"""
+    global _executor, _executor_pid
+    if FEATURE_WORKERS <= 0:
+        return None
+    # A pool inherited through fork is unusable, so every process builds its own
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(
+                    max_workers=FEATURE_WORKERS,
+                    mp_context=multiprocessing.get_context(FEATURE_POOL_START_METHOD),
+                    initializer=warm_worker
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def run_job(fn, *args):
+    """Run one job in the pool (or inline) and return its result"""
+    executor = get_feature_executor()
+    if executor is None:
+        return fn(*args)
+    return executor.submit(fn, *args).result()
+
+
+def map_jobs(fn, items, thread_workers=1):
+    """Run fn over items in the pool, or in a thread pool when the process pool is disabled"""
+    executor = get_feature_executor()
+    if executor is not None:
+        return list(executor.map(fn, items))
+    with ThreadPoolExecutor(max_workers=max(1, thread_workers)) as threads:
+        return list(threads.map(fn, items))
+
+
+def shutdown(wait=True):
+    """Stop the worker processes of this process's pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=wait)
+        _executor = None
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Persistent store of extracted 193-dim feature vectors.
+Vectors live in fixed-size memory-mapped float32 .npy shards, and an SQLite index
+maps each audio hash to its shard row plus the model version that last scored it.
+After model.h5 / scaler.pkl are swapped, `rescore` streams the stored vectors
+through the new artifacts in large batches without decoding any audio again.
+
+Usage:
+    python feature_store.py stats
+    python feature_store.py rescore [--batch-size 1024] [--all]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import numpy as np
+
+from feature_engine import N_FEATURES, TONNETZ_MODE, TONNETZ_DECIMATION, ANALYSIS_SAMPLE_RATE, RESAMPLE_TYPE
+from stream_features import FEATURE_STREAMING_MIN_SECONDS
+from audio_quality import VAD_TRIM, VAD_TRIM_PAD_FRAMES
+
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR', '')
+SHARD_ROWS = 4096
+
+# Vectors extracted with different feature settings cannot be rescored, only re-extracted
+FEATURE_VERSION = f"v1-tonnetz_{TONNETZ_MODE}_{TONNETZ_DECIMATION}"
+if ANALYSIS_SAMPLE_RATE:
+    FEATURE_VERSION += f"-sr_{ANALYSIS_SAMPLE_RATE}_{RESAMPLE_TYPE}"
+if FEATURE_STREAMING_MIN_SECONDS > 0:
+    FEATURE_VERSION += f"-stream_{FEATURE_STREAMING_MIN_SECONDS:g}s"
+if VAD_TRIM != "off":
+    FEATURE_VERSION += f"-trim_{VAD_TRIM}_{VAD_TRIM_PAD_FRAMES}"
+
+
+class FeatureStore:
+    """Append-mostly float32 vector shards with an SQLite index keyed by audio hash"""
+
+    def __init__(self, directory, shard_rows=SHARD_ROWS, n_features=N_FEATURES):
+        self.directory = directory
+        self.shard_rows = shard_rows
+        self.n_features = n_features
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._shards = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # SQLite connections and memmaps must not cross a fork
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    audio_hash TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL,
+                    feature_version TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    model_version TEXT,
+                    emotion TEXT,
+                    probabilities TEXT
+                );
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('next_slot', 0);
+            """)
+            self._db.commit()
+            self._db_pid = os.getpid()
+            self._shards = {}
+        return self._db
+
+    def _shard_path(self, shard):
+        return os.path.join(self.directory, f"shard_{shard:05d}.npy")
+
+    def _shard(self, shard, writable):
+        key = (shard, writable)
+        if key not in self._shards:
+            path = self._shard_path(shard)
+            if writable and not os.path.exists(path):
+                array = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(self.shard_rows, self.n_features))
+            else:
+                array = np.load(path, mmap_mode="r+" if writable else "r")
+            self._shards[key] = array
+        return self._shards[key]
+
+    def put(self, audio_hash, features, model_version=None, emotion=None, probabilities=None):
+        """Store (or overwrite) the vector for one recording"""
+        features = np.asarray(features, dtype=np.float32).reshape(-1)
+        if features.shape[0] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {features.shape[0]}")
+
+        with self._lock:
+            db = self._connection()
+            # IMMEDIATE serialises slot allocation across worker processes
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT slot FROM vectors WHERE audio_hash = ?", (audio_hash,)).fetchone()
+                if row is not None:
+                    slot = row[0]
+                else:
+                    slot = db.execute("SELECT value FROM meta WHERE key = 'next_slot'").fetchone()[0]
+                    db.execute("UPDATE meta SET value = ? WHERE key = 'next_slot'", (slot + 1,))
+
+                shard = self._shard(slot // self.shard_rows, writable=True)
+                shard[slot % self.shard_rows] = features
+                shard.flush()
+
+                db.execute(
+                    "INSERT OR REPLACE INTO vectors (audio_hash, slot, feature_version, stored_at, model_version, emotion, probabilities) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (audio_hash, slot, FEATURE_VERSION, time.time(), model_version,
+                     None if emotion is None else str(emotion),
+                     None if probabilities is None else json.dumps([float(p) for p in probabilities]))
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def get(self, audio_hash):
+        """Return the stored vector or None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT slot FROM vectors WHERE audio_hash = ? AND feature_version = ?", (audio_hash, FEATURE_VERSION)
+            ).fetchone()
+            if row is None:
+                return None
+            slot = row[0]
+            return np.array(self._shard(slot // self.shard_rows, writable=False)[slot % self.shard_rows])
+
+    def stats(self, model_version=None):
+        with self._lock:
+            db = self._connection()
+            total = db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            current = db.execute("SELECT COUNT(*) FROM vectors WHERE feature_version = ?", (FEATURE_VERSION,)).fetchone()[0]
+            result = {"vectors": total, "current_feature_version": current, "feature_version": FEATURE_VERSION}
+            if model_version is not None:
+                result["stale_scores"] = db.execute(
+                    "SELECT COUNT(*) FROM vectors WHERE feature_version = ? AND (model_version IS NULL OR model_version != ?)",
+                    (FEATURE_VERSION, model_version)
+                ).fetchone()[0]
+            return result
+
+    def iter_batches(self, batch_size, stale_for=None):
+        """Yield (audio_hashes, float32 matrix) in slot order, optionally only rows not scored by stale_for"""
+        with self._lock:
+            query = "SELECT audio_hash, slot FROM vectors WHERE feature_version = ?"
+            params = [FEATURE_VERSION]
+            if stale_for is not None:
+                query += " AND (model_version IS NULL OR model_version != ?)"
+                params.append(stale_for)
+            rows = self._connection().execute(query + " ORDER BY slot", params).fetchall()
+
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            matrix = np.empty((len(chunk), self.n_features), dtype=np.float32)
+            for i, (_, slot) in enumerate(chunk):
+                matrix[i] = self._shard(slot // self.shard_rows, writable=False)[slot % self.shard_rows]
+            yield [audio_hash for audio_hash, _ in chunk], matrix
+
+    def record_scores(self, audio_hashes, model_version, labels, probabilities):
+        """Store the result of scoring a batch of stored vectors"""
+        with self._lock:
+            db = self._connection()
+            db.executemany(
+                "UPDATE vectors SET model_version = ?, emotion = ?, probabilities = ? WHERE audio_hash = ?",
+                [(model_version, str(label), json.dumps([float(p) for p in probs]), audio_hash)
+                 for audio_hash, label, probs in zip(audio_hashes, labels, probabilities)]
+            )
+            db.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store():
+    """Return the process-wide store, or None when FEATURE_STORE_DIR is unset"""
+    global _store
+    if not FEATURE_STORE_DIR:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeatureStore(FEATURE_STORE_DIR)
+    return _store
+
+
+def rescore(store, artifacts, batch_size=1024, rescore_all=False):
+    """Run stored vectors through the current scaler and model; returns the number rescored"""
+    version = artifacts.version
+    count = 0
+    started = time.perf_counter()
+    for audio_hashes, matrix in store.iter_batches(batch_size, stale_for=None if rescore_all else version):
+        probabilities, labels = artifacts.predict(matrix)
+        store.record_scores(audio_hashes, version, labels, probabilities)
+        count += len(audio_hashes)
+        print(f"   Rescored {count} vectors ({count / (time.perf_counter() - started):.0f}/s)")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature-vector store maintenance")
+    parser.add_argument("command", choices=["stats", "rescore"])
+    parser.add_argument("--dir", default=FEATURE_STORE_DIR, help="store directory (default: $FEATURE_STORE_DIR)")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--all", action="store_true", help="rescore every vector, not only ones scored by another model")
+    args = parser.parse_args()
+
+    if not args.dir:
+        print("❌ No store directory: pass --dir or set FEATURE_STORE_DIR")
+        return 1
+
+    from model_registry import get_artifacts
+
+    store = FeatureStore(args.dir)
+    artifacts = get_artifacts()
+    print(f"📦 Feature store: {args.dir}")
+    print(f"🧠 Model artifact version: {artifacts.version}")
+
+    if args.command == "stats":
+        print(json.dumps(store.stats(model_version=artifacts.version), indent=2))
+        return 0
+
+    count = rescore(store, artifacts, batch_size=args.batch_size, rescore_all=args.all)
+    print(f"✅ Rescored {count} vectors with model {artifacts.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
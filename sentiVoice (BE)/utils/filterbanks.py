@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Precomputed analysis matrices for the spectral features.
+librosa.feature rebuilds its mel / chroma filterbanks, the STFT window and the
+spectral-contrast bands on every call. Here they are built once per
+(sample_rate, n_fft, hop_length, n_mels) and kept in an LRU cache, and the
+features apply them as plain matrix products on the shared spectrogram.
+feature_pool.warm_worker fills the cache for the common browser sample rates.
+"""
+
+import os
+from functools import lru_cache, cached_property
+import numpy as np
+import librosa
+
+# librosa defaults used by the extractor the model was trained with
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+N_MFCC = 40
+N_CHROMA = 12
+
+FILTERBANK_CACHE_SIZE = int(os.environ.get('FILTERBANK_CACHE_SIZE', 16))
+# Chroma filterbanks also depend on the estimated tuning (0.01 steps in [-0.5, 0.5))
+CHROMA_CACHE_SIZE = int(os.environ.get('CHROMA_CACHE_SIZE', 128))
+
+
+class FilterBanks:
+    """Window, mel filterbank, DCT matrix and contrast bands for one analysis setting"""
+
+    def __init__(self, sample_rate, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS):
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.window = librosa.filters.get_window('hann', n_fft, fftbins=True)
+        self.mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels)
+        # scipy.fftpack takes a quarter of a second to import, so it waits for the first bank
+        import scipy.fftpack
+
+        # Rows of the orthonormal DCT-II, so dct @ mel_db equals librosa.feature.mfcc
+        self.dct = scipy.fftpack.dct(np.eye(n_mels), type=2, norm='ortho', axis=0)[:N_MFCC]
+
+    @cached_property
+    def contrast_bands(self):
+        """Rows of each spectral_contrast band, or None when the top band exceeds Nyquist"""
+        return _contrast_bands(self.sample_rate, self.n_fft)
+
+    def stft_magnitude(self, samples, center=True):
+        """|STFT| with the cached window, identical to np.abs(librosa.stft(samples))"""
+        return np.abs(librosa.stft(samples, n_fft=self.n_fft, hop_length=self.hop_length,
+                                   window=self.window, center=center))
+
+    def chroma(self, tuning):
+        return chroma_basis(self.sample_rate, self.n_fft, float(tuning))
+
+    def chroma_from(self, S, tuning=None):
+        """librosa.feature.chroma_stft(S=S) as one matrix product"""
+        if tuning is None:
+            tuning = librosa.estimate_tuning(S=S, sr=self.sample_rate, bins_per_octave=N_CHROMA)
+        return librosa.util.normalize(self.chroma(tuning) @ S, norm=np.inf, axis=0)
+
+    def contrast_peak_valley(self, S, quantile=0.02):
+        """Peak and valley energies of librosa.feature.spectral_contrast, before power_to_db"""
+        if self.contrast_bands is None:
+            # Same failure as librosa (e.g. at 16kHz), so the family falls back to zeros as before
+            raise librosa.ParameterError("Frequency band exceeds Nyquist. Reduce either fmin or n_bands.")
+        valley = np.zeros((len(self.contrast_bands), S.shape[1]))
+        peak = np.zeros_like(valley)
+        for k, (band, drop_last) in enumerate(self.contrast_bands):
+            sub_band = S[band]
+            if drop_last:
+                sub_band = sub_band[:-1]
+            idx = int(np.maximum(np.rint(quantile * len(band)), 1))
+            sortedr = np.sort(sub_band, axis=0)
+            valley[k] = np.mean(sortedr[:idx], axis=0)
+            peak[k] = np.mean(sortedr[-idx:], axis=0)
+        return peak, valley
+
+
+def _contrast_bands(sample_rate, n_fft, fmin=200.0, n_bands=6):
+    """Frequency rows of each spectral_contrast octave band, as librosa selects them"""
+    freq = librosa.fft_frequencies(sr=sample_rate, n_fft=n_fft)
+    octa = np.zeros(n_bands + 2)
+    octa[1:] = fmin * (2.0 ** np.arange(0, n_bands + 1))
+    if np.any(octa[:-1] >= 0.5 * sample_rate):
+        return None
+    bands = []
+    for k, (f_low, f_high) in enumerate(zip(octa[:-1], octa[1:])):
+        current_band = np.logical_and(freq >= f_low, freq <= f_high)
+        idx = np.flatnonzero(current_band)
+        if k > 0:
+            current_band[idx[0] - 1] = True
+        if k == n_bands:
+            current_band[idx[-1] + 1:] = True
+        bands.append((np.flatnonzero(current_band), k < n_bands))
+    return bands
+
+
+@lru_cache(maxsize=FILTERBANK_CACHE_SIZE)
+def get_filterbanks(sample_rate, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS):
+    """The FilterBanks for this analysis setting, built on first use"""
+    return FilterBanks(int(sample_rate), n_fft, hop_length, n_mels)
+
+
+@lru_cache(maxsize=CHROMA_CACHE_SIZE)
+def chroma_basis(sample_rate, n_fft, tuning):
+    return librosa.filters.chroma(sr=sample_rate, n_fft=n_fft, tuning=tuning, n_chroma=N_CHROMA)
+
+
+def warm_filterbanks(sample_rates):
+    """Build the filterbanks (and the zero-tuning chroma basis) for each rate up front"""
+    for sample_rate in sample_rates:
+        get_filterbanks(sample_rate).chroma(0.0)
+
+
+def cache_info():
+    """Hit / miss counters of both caches, for /health"""
+    return {
+        "filterbanks": get_filterbanks.cache_info()._asdict(),
+        "chroma": chroma_basis.cache_info()._asdict(),
+    }
@@ -1,16 +1,47 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, url_for
 from flask_cors import CORS
 import numpy as np
+import io
 import os
-import pandas as pd
-import joblib
 import traceback
 import json
+import time
 import base64
-import tempfile
-from tensorflow.keras.models import load_model
+from functools import partial, wraps
+from datetime import datetime
 from werkzeug.utils import secure_filename
-from app import extract_feature
+from app import extract_feature_from_audio
+from audio_pipeline import load_audio, probe_audio
+from stream_features import open_audio
+from model_registry import get_registry
+from inference_scheduler import get_scheduler
+from feature_pool import run_job, map_jobs
+from prediction_cache import get_prediction_cache, cache_key, audio_digest
+from feature_store import get_feature_store, FEATURE_VERSION
+from filterbanks import cache_info as filterbank_cache_info
+from job_queue import JobQueue, JobQueueFull, valid_callback_url, public_job
+from startup import get_warmup, start_warmup
+from metrics import (
+    stage, collect_timings, add_timings, timed_job, record_request, timings_field,
+    render as render_metrics, sample_lines, CONTENT_TYPE as METRICS_CONTENT_TYPE
+)
+
+# Batch endpoint limits
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 32))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))  # threads when FEATURE_WORKERS=0
+
+# Quality thresholds
+MIN_DURATION = 10.0  # Minimum 10 seconds
+MAX_DURATION = 120.0  # Maximum 2 minutes
+MIN_AMPLITUDE = 0.01  # Minimum amplitude
+MIN_ENERGY = 0.005  # Minimum RMS energy
+MAX_SILENCE_RATIO = 0.8
+
+# Pre-check before the full decode: header checks plus PRECHECK_WINDOWS evenly spaced windows
+# covering PRECHECK_COVERAGE of the clip (0 windows = header only)
+PRECHECK_WINDOWS = int(os.environ.get('PRECHECK_WINDOWS', 32))
+PRECHECK_COVERAGE = float(os.environ.get('PRECHECK_COVERAGE', 0.1))
+PRECHECK_MIN_WINDOW_SECONDS = 0.1
 
 def convert_numpy_to_python(obj):
     """Convert numpy types to Python types for JSON serialization"""
@@ -30,53 +61,42 @@ def convert_numpy_to_python(obj):
 def analyze_audio_quality(audio_path):
     """Analyze audio quality and return detailed feedback"""
     try:
-        import librosa
-        
-        # Load audio
-        X, sample_rate = librosa.load(audio_path, sr=None)
-        duration = float(len(X) / sample_rate)
-        max_amplitude = float(np.max(np.abs(X)))
-        rms_energy = float(np.sqrt(np.mean(X**2)))
-        
-        # Define quality thresholds
-        min_duration = 10.0  # Minimum 10 seconds
-        max_duration = 120.0  # Maximum 2 minutes
-        min_amplitude = 0.01  # Minimum amplitude
-        min_energy = 0.005   # Minimum RMS energy
+        audio = load_audio(audio_path)
+    except Exception as e:
+        return {
+            "error": f"Could not analyze audio quality: {str(e)}",
+            "is_good_quality": False
+        }
+    return analyze_decoded_audio_quality(audio)
+
+def analyze_decoded_audio_quality(audio):
+    """Analyze the quality of already decoded audio and return detailed feedback"""
+    try:
+        sample_rate = audio.sample_rate
+        duration = audio.duration
+        # Every statistic below comes from the same single pass over the samples
+        quality = audio.quality
+        max_amplitude = quality.peak
+        rms_energy = quality.rms_energy
         
         issues = []
         suggestions = []
         
         # Check duration
-        if duration < min_duration:
-            issues.append("Audio is too short")
-            suggestions.append("Speak for at least 10 seconds to capture enough audio for accurate analysis")
-        elif duration > max_duration:
-            issues.append("Audio is too long")
-            suggestions.append("Please keep your recording under 2 minutes for optimal analysis")
+        check_duration(duration, issues, suggestions)
         
-        # Check amplitude
-        if max_amplitude < min_amplitude:
-            issues.append("Audio is too quiet")
-            suggestions.append("Speak at a consistent volume - not too quiet or too loud")
-        
-        # Check energy
-        if rms_energy < min_energy:
-            issues.append("Audio has very low energy")
-            suggestions.append("Record in a quiet room without echo or background noise")
-        
-        # Check if audio is mostly silence
-        silence_threshold = 0.001
-        silence_ratio = float(np.sum(np.abs(X) < silence_threshold) / len(X))
-        if silence_ratio > 0.8:
-            issues.append("Audio appears to be mostly silence")
-            suggestions.append("Test your microphone before recording to ensure it's working")
+        # Check amplitude, energy and whether the audio is mostly silence
+        silence_ratio = quality.silence_ratio
+        check_levels(max_amplitude, rms_energy, silence_ratio, issues, suggestions)
         
         return {
             "duration": duration,
             "max_amplitude": max_amplitude,
             "rms_energy": rms_energy,
             "silence_ratio": silence_ratio,
+            # Frame-level VAD statistics, reported for the client but not gated on
+            "speech_ratio": quality.speech_ratio,
+            "clipping_ratio": quality.clipping_ratio,
             "sample_rate": int(sample_rate),
             "issues": issues,
             "suggestions": suggestions,
@@ -89,135 +109,428 @@ def analyze_audio_quality(audio_path):
             "is_good_quality": False
         }
 
-def predict_emotion(audio_path):
+def check_duration(duration, issues, suggestions):
+    if duration < MIN_DURATION:
+        issues.append("Audio is too short")
+        suggestions.append("Speak for at least 10 seconds to capture enough audio for accurate analysis")
+    elif duration > MAX_DURATION:
+        issues.append("Audio is too long")
+        suggestions.append("Please keep your recording under 2 minutes for optimal analysis")
+
+def check_levels(max_amplitude, rms_energy, silence_ratio, issues, suggestions):
+    if max_amplitude < MIN_AMPLITUDE:
+        issues.append("Audio is too quiet")
+        suggestions.append("Speak at a consistent volume - not too quiet or too loud")
+    if rms_energy < MIN_ENERGY:
+        issues.append("Audio has very low energy")
+        suggestions.append("Record in a quiet room without echo or background noise")
+    if silence_ratio > MAX_SILENCE_RATIO:
+        issues.append("Audio appears to be mostly silence")
+        suggestions.append("Test your microphone before recording to ensure it's working")
+
+def quality_error_result(quality_analysis):
+    return {
+        "error": "audio_quality_issue",
+        "quality_analysis": convert_numpy_to_python(quality_analysis),
+        "message": "Please re-record your voice with better quality"
+    }
+
+def level_issues(stats):
+    """Issues check_levels reports for these quality statistics"""
+    issues = []
+    check_levels(stats.peak, stats.rms_energy, stats.silence_ratio, issues, [])
+    return issues
+
+def precheck_audio_quality(source):
+    """
+    Quality gate from the file header and a sparse scan, before the full decode.
+    Returns a failing quality analysis for recordings that cannot pass, or None when
+    the recording should be decoded (including containers soundfile cannot probe).
+    Duration checks are exact. Level checks never rely on the scan alone: the sparse
+    windows cannot see what lies between them, so when they look too quiet, the whole
+    file is read into QualityStats (without decoding it into memory) and the clip is
+    rejected only on those exact statistics, as the full gate would reject it.
+    """
+    def duration_ok(info):
+        return MIN_DURATION <= info["duration"] <= MAX_DURATION
+
+    probe = probe_audio(source, PRECHECK_WINDOWS, PRECHECK_COVERAGE, PRECHECK_MIN_WINDOW_SECONDS,
+                        scan_if=duration_ok, confirm_if=level_issues)
+    if probe is None:
+        return None
+    info, _, stats = probe
+    issues = []
+    suggestions = []
+    check_duration(info["duration"], issues, suggestions)
+    if not issues and stats is not None:
+        check_levels(stats.peak, stats.rms_energy, stats.silence_ratio, issues, suggestions)
+
+    if not issues:
+        return None
+    analysis = {
+        "duration": info["duration"],
+        "sample_rate": info["sample_rate"],
+        "channels": info["channels"],
+        "issues": issues,
+        "suggestions": suggestions,
+        "is_good_quality": False,
+        "precheck": True
+    }
+    if stats is not None:
+        analysis.update({
+            "max_amplitude": stats.peak,
+            "rms_energy": stats.rms_energy,
+            "silence_ratio": stats.silence_ratio
+        })
+    return analysis
+
+def decode_error_result(error):
+    """Result for a recording that could not be decoded, reported as a quality issue"""
+    return {
+        "error": "audio_quality_issue",
+        "quality_analysis": {
+            "error": f"Could not analyze audio quality: {str(error)}",
+            "is_good_quality": False
+        },
+        "message": "Please re-record your voice with better quality"
+    }
+
+def prepare_recording(source):
+    """Decode + quality gate + feature extraction job for a path or upload bytes; safe to run in a feature worker process"""
+    # Clips that cannot pass are rejected from the header and a sparse scan, without decoding them
+    with stage("precheck"):
+        rejected = precheck_audio_quality(source)
+    if rejected is not None:
+        return quality_error_result(rejected)
     try:
-        # First, analyze audio quality
-        quality_analysis = analyze_audio_quality(audio_path)
-        
-        if not quality_analysis.get("is_good_quality", False):
-            return {
-                "error": "audio_quality_issue",
-                "quality_analysis": convert_numpy_to_python(quality_analysis),
-                "message": "Please re-record your voice with better quality"
-            }
-        
-        # Get the directory where this script is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_dir = os.path.join(script_dir, "audio_feature_extracted")
-        
-        # Check if the model files exist
-        scaler_path = os.path.join(output_dir, 'scaler.pkl')
-        encoder_path = os.path.join(output_dir, 'encoder.pkl')
-        model_path = os.path.join(output_dir, 'model.h5')
-        
-        # Verify all required files exist
-        required_files = [scaler_path, encoder_path, model_path]
-        missing_files = [f for f in required_files if not os.path.exists(f)]
-        
-        if missing_files:
-            error_msg = f"Missing required model files: {missing_files}"
-            print(f"Error: {error_msg}")
-            return {"error": error_msg}
-        
-        print(f"Loading model files from: {output_dir}")
-        loaded_scaler = joblib.load(scaler_path)
-        loaded_encoder = joblib.load(encoder_path)
-        loaded_model = load_model(model_path, compile=False)
-        
-        print(f"Processing audio file: {audio_path}")
-        
-        # Extract features with detailed debugging
-        features = extract_feature(
-            audio_path,
-            mfcc=True,
-            chroma=True,
-            mel=True,
-            contrast=True,
-            tonnetz=True
+        # Long recordings are streamed block by block when FEATURE_STREAMING_MIN_SECONDS is set
+        with stage("decode"):
+            audio = open_audio(source)
+    except Exception as e:
+        return decode_error_result(e)
+    try:
+        return prepare_features(audio)
+    except Exception as e:
+        print(f"Error preparing features: {str(e)}")
+        traceback.print_exc()
+        return {"error": str(e)}
+
+def predict_emotion(source, audio_hash=None):
+    """Decode and extract (in the feature pool when enabled), then predict in this process"""
+    try:
+        # Stage timings come back with the result when the job ran in a feature process
+        prepared, timings = run_job(timed_job, prepare_recording, source)
+        add_timings(timings)
+    except Exception as e:
+        print(f"Error in feature job: {str(e)}")
+        traceback.print_exc()
+        return {"error": str(e)}
+    return predict_prepared(prepared, audio_hash)
+
+def prepare_features(audio):
+    """Run the quality gate and feature extraction; returns the features or an error dict"""
+    # First, analyze audio quality
+    with stage("quality"):
+        quality_analysis = analyze_decoded_audio_quality(audio)
+    
+    if not quality_analysis.get("is_good_quality", False):
+        return quality_error_result(quality_analysis)
+    
+    print(f"Processing audio file: {audio.source}")
+    
+    # Drop the silent lead-in and tail (or every pause) before the spectral work when VAD_TRIM is set
+    with stage("vad_trim"):
+        audio, trim_report = audio.trimmed()
+    quality_analysis["vad_trim"] = trim_report
+    if trim_report["frames_dropped"]:
+        print(f"VAD trim ({trim_report['mode']}): dropped {trim_report['frames_dropped']} of {trim_report['frames']} frames")
+    
+    # Extract features with detailed debugging
+    features = extract_feature_from_audio(
+        audio,
+        mfcc=True,
+        chroma=True,
+        mel=True,
+        contrast=True,
+        tonnetz=True
+    )
+    
+    print(f"Extracted features length: {len(features)}")
+    print(f"Features range: {np.min(features)} to {np.max(features)}")
+    
+    # Validate feature extraction
+    if len(features) == 0 or np.all(features == 0):
+        print("Warning: All features are zero or empty!")
+        return {
+            "error": "feature_extraction_failed",
+            "message": "Could not extract features from audio. Please re-record with clearer speech."
+        }
+    
+    # Check for NaN or infinite values
+    if np.any(np.isnan(features)) or np.any(np.isinf(features)):
+        print("Warning: Features contain NaN or infinite values!")
+        features = np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+    
+    return {
+        "features": features,
+        "quality_analysis": quality_analysis
+    }
+
+def get_loaded_artifacts():
+    """Return the shared model artifacts, or an error dict when files are missing"""
+    registry = get_registry()
+    missing_files = registry.missing_files()
+    
+    if missing_files:
+        error_msg = f"Missing required model files: {missing_files}"
+        print(f"Error: {error_msg}")
+        return None, {"error": error_msg}
+    
+    # Artifacts are loaded once per worker and shared across requests
+    return registry.get(), None
+
+def prediction_cache_key(audio_hash):
+    """Cache key for an upload, or None when the cache is off or the model is unavailable"""
+    if not get_prediction_cache().enabled:
+        return None
+    artifacts, error = get_loaded_artifacts()
+    if error:
+        return None
+    # Feature settings (analysis rate, tonnetz mode, streaming) change the result as much as the model does
+    return cache_key(audio_hash, f"{artifacts.version}-{FEATURE_VERSION}")
+
+def store_feature_vector(audio_hash, features, result, model_version):
+    """Persist the extracted vector and the version of the artifacts that scored it, for rescoring after a model swap"""
+    store = get_feature_store()
+    if store is None or not audio_hash:
+        return
+    try:
+        store.put(
+            audio_hash,
+            features,
+            model_version=model_version,
+            emotion=result["emotion"],
+            probabilities=result["all_probabilities"]
         )
+    except Exception as e:
+        print(f"Warning: could not store feature vector: {e}")
+
+def build_prediction_result(features, prediction_probs, emotion, quality_analysis):
+    """Build the /api/predict data payload for one recording"""
+    # Extract specific features with bounds checking
+    mfcc1 = features[0] if len(features) > 0 else 0.0
+    mfcc40 = features[39] if len(features) > 39 else 0.0
+    chroma = features[40] if len(features) > 40 else 0.0
+    mel = features[52] if len(features) > 52 else 0.0
+    contrast = features[53] if len(features) > 53 else 0.0
+    tonnetz = features[59] if len(features) > 59 else 0.0
+    
+    return {
+        "emotion": emotion,
+        "mfcc1": float(mfcc1),
+        "mfcc40": float(mfcc40),
+        "chroma": float(chroma),
+        "melspectrogram": float(mel),
+        "contrast": float(contrast),
+        "tonnetz": float(tonnetz),
+        "mfccs": [float(x) for x in features[:40].tolist()] if len(features) >= 40 else [],
+        "confidence": float(np.max(prediction_probs)),
+        "all_probabilities": [float(x) for x in np.ravel(prediction_probs).tolist()],
+        "quality_analysis": convert_numpy_to_python(quality_analysis)
+    }
+
+def predict_prepared(prepared, audio_hash=None):
+    """Run inference for the output of prepare_features"""
+    try:
+        if "error" in prepared:
+            return prepared
         
-        print(f"Extracted features length: {len(features)}")
-        print(f"Features shape: {features.shape}")
-        print(f"Features range: {np.min(features)} to {np.max(features)}")
-        
-        # Validate feature extraction
-        if len(features) == 0 or np.all(features == 0):
-            print("Warning: All features are zero or empty!")
-            return {
-                "error": "feature_extraction_failed",
-                "message": "Could not extract features from audio. Please re-record with clearer speech."
-            }
-        
-        # Check for NaN or infinite values
-        if np.any(np.isnan(features)) or np.any(np.isinf(features)):
-            print("Warning: Features contain NaN or infinite values!")
-            features = np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
-        
-        # Extract specific features with bounds checking
-        mfcc1 = features[0] if len(features) > 0 else 0.0
-        mfcc40 = features[39] if len(features) > 39 else 0.0
-        chroma = features[40] if len(features) > 40 else 0.0
-        mel = features[52] if len(features) > 52 else 0.0
-        contrast = features[53] if len(features) > 53 else 0.0
-        tonnetz = features[59] if len(features) > 59 else 0.0
-        
-        print(f"Feature values:")
-        print(f"  mfcc1: {mfcc1}")
-        print(f"  mfcc40: {mfcc40}")
-        print(f"  chroma: {chroma}")
-        print(f"  mel: {mel}")
-        print(f"  contrast: {contrast}")
-        print(f"  tonnetz: {tonnetz}")
-        
-        # Create DataFrame for scaling
-        features_df = pd.DataFrame([features], columns=[f'feature_{i}' for i in range(len(features))])
-        
-        # Validate scaler
-        print(f"Scaler type: {type(loaded_scaler)}")
-        print(f"Scaler expected features: {loaded_scaler.n_features_in_ if hasattr(loaded_scaler, 'n_features_in_') else 'Unknown'}")
-        print(f"Input features: {features_df.shape[1]}")
-        
-        # Scale features
-        features_scaled = loaded_scaler.transform(features_df)
-        print(f"Scaled features shape: {features_scaled.shape}")
-        print(f"Scaled features range: {np.min(features_scaled)} to {np.max(features_scaled)}")
+        _, error = get_loaded_artifacts()
+        if error:
+            return error
         
-        # Reshape for model input
-        features_reshaped = np.expand_dims(features_scaled, axis=2)
-        print(f"Reshaped features shape: {features_reshaped.shape}")
+        features = prepared["features"]
         
-        # Make prediction
-        prediction_probs = loaded_model.predict(features_reshaped, verbose=0)
+        # Scale, predict and decode; concurrent requests are micro-batched together
+        prediction_probs, result, model_version = get_scheduler().predict(features)
         print(f"Raw prediction probabilities: {prediction_probs}")
-        
-        # Decode prediction
-        predicted_emotion = loaded_encoder.inverse_transform(prediction_probs)
-        result = predicted_emotion.flatten()[0]
-        
         print(f"Prediction completed: {result}")
         print(f"Prediction confidence: {np.max(prediction_probs):.4f}")
         
-        return {
-            "emotion": result,
-            "mfcc1": float(mfcc1),
-            "mfcc40": float(mfcc40),
-            "chroma": float(chroma),
-            "melspectrogram": float(mel),
-            "contrast": float(contrast),
-            "tonnetz": float(tonnetz),
-            "mfccs": [float(x) for x in features[:40].tolist()] if len(features) >= 40 else [],
-            "confidence": float(np.max(prediction_probs)),
-            "all_probabilities": [float(x) for x in prediction_probs.flatten().tolist()],
-            "quality_analysis": convert_numpy_to_python(quality_analysis)
-        }
+        prediction = build_prediction_result(features, prediction_probs, result, prepared["quality_analysis"])
+        store_feature_vector(audio_hash, features, prediction, model_version)
+        return prediction
     except Exception as e:
         print(f"Error in predict_emotion: {str(e)}")
         traceback.print_exc()
         return {"error": str(e)}
 
+def predict_emotion_batch(audio_sources, audio_hashes=None):
+    """
+    Predict a list of recordings, each a path or upload bytes (None marks an item the caller already failed).
+    Decoding and feature extraction run in parallel, the features are stacked into
+    one (N, 193, 1) tensor and sent through a single model call.
+    Returns one result or error dict per input, in input order.
+    """
+    results = [None] * len(audio_sources)
+    audio_hashes = audio_hashes or [None] * len(audio_sources)
+    
+    valid = [index for index, source in enumerate(audio_sources) if source is not None]
+    prepared_items = [None] * len(audio_sources)
+    prepared_valid = map_jobs(partial(timed_job, prepare_recording), [audio_sources[index] for index in valid],
+                              thread_workers=BATCH_WORKERS)
+    for index, (prepared, timings) in zip(valid, prepared_valid):
+        prepared_items[index] = prepared
+        # The batch request reports every stage summed over its recordings
+        add_timings(timings)
+    
+    ready = []
+    for index, prepared in enumerate(prepared_items):
+        if prepared is None:
+            continue
+        if "error" in prepared:
+            results[index] = prepared
+        else:
+            ready.append(index)
+    
+    if ready:
+        _, error = get_loaded_artifacts()
+        if error:
+            for index in ready:
+                results[index] = error
+            return results
+        
+        try:
+            features_matrix = np.vstack([prepared_items[index]["features"] for index in ready])
+            # Through the scheduler, so it never overlaps the model calls of /api/predict
+            prediction_probs, labels, versions = get_scheduler().predict_many(features_matrix)
+            print(f"Batch prediction completed for {len(ready)} recordings")
+        except Exception as e:
+            print(f"Error in predict_emotion_batch: {str(e)}")
+            traceback.print_exc()
+            for index in ready:
+                results[index] = {"error": str(e)}
+            return results
+        
+        for row, index in enumerate(ready):
+            prepared = prepared_items[index]
+            results[index] = build_prediction_result(
+                prepared["features"], prediction_probs[row], labels[row], prepared["quality_analysis"]
+            )
+            store_feature_vector(audio_hashes[index], prepared["features"], results[index], versions[row])
+    
+    return results
+
+def prediction_response(result):
+    """Map a predict_emotion result to the /api/predict response body and status code"""
+    if "error" not in result:
+        return {
+            "status": "success",
+            "data": result
+        }, 200
+    
+    # Handle specific error types
+    if result['error'] == "audio_quality_issue":
+        return {
+            "status": "error",
+            "error_type": "audio_quality",
+            "message": result.get("message", "Audio quality is too low. Please re-record."),
+            "quality_analysis": result.get("quality_analysis", {}),
+            "suggestions": result.get("quality_analysis", {}).get("suggestions", [])
+        }, 400
+    elif result['error'] == "feature_extraction_failed":
+        return {
+            "status": "error",
+            "error_type": "feature_extraction",
+            "message": result.get("message", "Could not extract features from audio. Please re-record with clearer speech.")
+        }, 400
+    else:
+        return {
+            "status": "error",
+            "message": result["error"]
+        }, 500
+
+def predict_audio_bytes(audio_binary):
+    """Predict an uploaded recording held in memory, answering resends from the prediction cache"""
+    with stage("cache_lookup"):
+        audio_hash = audio_digest(audio_binary)
+        key = prediction_cache_key(audio_hash)
+        result = get_prediction_cache().get(key) if key else None
+    
+    if result is not None:
+        print("Prediction cache hit")
+        return result
+    
+    result = predict_emotion(audio_binary, audio_hash)
+    if key:
+        get_prediction_cache().put(key, result)
+    
+    if "error" in result:
+        print(f"Prediction error: {result['error']}")
+    else:
+        print(f"Prediction successful: {result['emotion']}")
+    return result
+
+def run_prediction_job(audio_binary):
+    """Job worker body: predict a queued recording and build its /api/predict response"""
+    start = time.perf_counter()
+    with collect_timings() as timings:
+        body, status_code = prediction_response(predict_audio_bytes(audio_binary))
+    record_request("job", status_code, timings, time.perf_counter() - start, body)
+    return body, status_code
+
+def wants_timings(args):
+    """True when the request opted in to per-request stage timings with ?timings=1"""
+    return args.get('timings', '').lower() in ('1', 'true', 'yes')
+
+def metrics_payload():
+    """Body of the /metrics response, shared with the ASGI entry point"""
+    cache = get_prediction_cache().stats()
+    inference = get_scheduler().stats()
+    return render_metrics(
+        sample_lines("sentivoice_prediction_cache_hits_total", "Prediction cache hits by tier", "counter",
+                     {"memory": cache["hits"], "disk": cache["disk_hits"]}, label="tier")
+        + sample_lines("sentivoice_prediction_cache_misses_total", "Prediction cache misses", "counter", cache["misses"])
+        + sample_lines("sentivoice_inference_queue_depth", "Feature vectors waiting for a batched model call", "gauge",
+                       inference["queue_depth"])
+        + sample_lines("sentivoice_ready", "1 once the start-up warm-up has finished", "gauge", int(get_warmup().ready))
+    )
+
+job_queue = JobQueue(run_prediction_job)
+
+class InMemoryUploadRequest(Request):
+    """Request whose multipart file parts stay in memory; Werkzeug spools parts over 500 KB to a temp file"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 CORS(app)
 
+def instrumented(endpoint):
+    """
+    Record a prediction endpoint in /metrics: request count and latency, 4xx answers
+    by error_type and the time spent in every stage. With ?timings=1 the stage
+    timings (seconds) are also returned in the JSON body under "timings".
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with collect_timings() as timings:
+                response = app.make_response(view(*args, **kwargs))
+            seconds = time.perf_counter() - start
+            include_timings = wants_timings(request.args)
+            body = response.get_json(silent=True) if include_timings or response.status_code >= 400 else None
+            record_request(endpoint, response.status_code, timings, seconds, body)
+            if include_timings and isinstance(body, dict):
+                body["timings"] = timings_field(timings, seconds)
+                response.set_data(app.json.dumps(body))
+            return response
+        return wrapper
+    return decorator
+
 @app.route('/', methods=['GET'])
 def root():
     """Root endpoint for health check"""
@@ -227,16 +540,46 @@ def root():
         "message": "SentiVoice Flask API is running"
     })
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
+def health_payload():
+    """Body of the /health response, shared with the ASGI entry point"""
+    return {
         "status": "healthy",
         "service": "emotion-analysis",
-        "timestamp": pd.Timestamp.now().isoformat()
-    })
+        "timestamp": datetime.now().isoformat(),
+        "inference": get_scheduler().stats(),
+        "prediction_cache": get_prediction_cache().stats(),
+        "jobs": job_queue.stats(),
+        "filterbanks": filterbank_cache_info(),
+        "model_backend": get_registry().backend,
+        "startup": get_warmup().state
+    }
+
+def ready_payload():
+    """Body and status code of the /ready response, shared with the ASGI entry point"""
+    status = get_warmup().status()
+    return status, 200 if status["ready"] else 503
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint; answers as soon as the server listens, warmed up or not"""
+    return jsonify(health_payload())
+
+@app.route('/ready', methods=['GET'])
+def ready_check():
+    """Readiness endpoint: 503 until the start-up warm-up has finished"""
+    body, status_code = ready_payload()
+    response = jsonify(body)
+    if status_code == 503:
+        response.headers['Retry-After'] = '1'
+    return response, status_code
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint: request, rejection and cache counters and stage latency histograms"""
+    return metrics_payload(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
 
 @app.route('/api/predict', methods=['POST'])
+@instrumented("predict")
 def get_features():
     try:
         print("Received prediction request")
@@ -255,57 +598,14 @@ def get_features():
             audio_data = data['audio_data']
             try:
                 # Decode base64 to binary
-                audio_binary = base64.b64decode(audio_data)
+                with stage("base64_decode"):
+                    audio_binary = base64.b64decode(audio_data)
                 
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                    temp_file.write(audio_binary)
-                    temp_file_path = temp_file.name
-                
-                print(f"Created temporary file: {temp_file_path}")
                 print(f"Audio file size: {len(audio_binary)} bytes")
                 
-                # Process the audio
-                result = predict_emotion(temp_file_path)
-                
-                # Clean up temporary file with Windows permission handling
-                try:
-                    os.unlink(temp_file_path)
-                    print("Cleaned up temporary file")
-                except PermissionError:
-                    print("⚠️  Could not delete temporary file (Windows permission issue)")
-                except Exception as cleanup_error:
-                    print(f"Warning: Could not clean up temporary file: {cleanup_error}")
-                
-                if "error" in result:
-                    print(f"Prediction error: {result['error']}")
-                    
-                    # Handle specific error types
-                    if result['error'] == "audio_quality_issue":
-                        return jsonify({
-                            "status": "error",
-                            "error_type": "audio_quality",
-                            "message": result.get("message", "Audio quality is too low. Please re-record."),
-                            "quality_analysis": result.get("quality_analysis", {}),
-                            "suggestions": result.get("quality_analysis", {}).get("suggestions", [])
-                        }), 400
-                    elif result['error'] == "feature_extraction_failed":
-                        return jsonify({
-                            "status": "error",
-                            "error_type": "feature_extraction",
-                            "message": result.get("message", "Could not extract features from audio. Please re-record with clearer speech.")
-                        }), 400
-                    else:
-                        return jsonify({
-                            "status": "error",
-                            "message": result["error"]
-                        }), 500
-                    
-                print(f"Prediction successful: {result['emotion']}")
-                return jsonify({
-                    "status": "success",
-                    "data": result
-                })
+                # Process the audio straight from memory
+                body, status_code = prediction_response(predict_audio_bytes(audio_binary))
+                return jsonify(body), status_code
                 
             except Exception as e:
                 print(f"Error processing base64 audio: {str(e)}")
@@ -354,6 +654,211 @@ def get_features():
             "message": str(e)
         }), 500
 
+@app.route('/api/predict_upload', methods=['POST'])
+@instrumented("predict_upload")
+def get_features_upload():
+    """
+    Predict a recording sent as raw bytes instead of base64-in-JSON.
+    Accepts a body with Content-Type audio/* (or application/octet-stream), or a
+    multipart/form-data upload with the file in the "audio" field. The bytes are
+    decoded in memory; the response matches /api/predict.
+    """
+    try:
+        if request.mimetype.startswith('audio/') or request.mimetype == 'application/octet-stream':
+            audio_binary = request.get_data(cache=False)
+        elif request.files:
+            upload = request.files.get('audio') or next(iter(request.files.values()))
+            audio_binary = upload.read()
+        else:
+            return jsonify({
+                "status": "error",
+                "message": "Send audio/* bytes or a multipart file field named 'audio'"
+            }), 400
+        
+        if not audio_binary:
+            return jsonify({
+                "status": "error",
+                "message": "No audio data provided"
+            }), 400
+        
+        print(f"Received upload prediction request: {len(audio_binary)} bytes")
+        body, status_code = prediction_response(predict_audio_bytes(audio_binary))
+        return jsonify(body), status_code
+    
+    except Exception as e:
+        print(f"Error processing upload: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": f"Error processing audio data: {str(e)}"
+        }), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a recording for prediction and return a job id immediately (202).
+    Accepts {"audio_data": base64, "callback_url": optional} as JSON, or raw audio/*
+    bytes with an optional ?callback_url=. Poll /api/jobs/<job_id> for the result;
+    a callback URL additionally receives the finished job as a JSON POST.
+    503 with Retry-After when the job queue is full.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        if not data.get('audio_data'):
+            return jsonify({
+                "status": "error",
+                "message": "No audio_data provided"
+            }), 400
+        try:
+            audio_binary = base64.b64decode(data['audio_data'])
+        except (ValueError, TypeError):
+            return jsonify({
+                "status": "error",
+                "message": "audio_data is not valid base64"
+            }), 400
+        callback_url = data.get('callback_url')
+    elif request.mimetype.startswith('audio/') or request.mimetype == 'application/octet-stream':
+        audio_binary = request.get_data(cache=False)
+        callback_url = request.args.get('callback_url')
+    else:
+        return jsonify({
+            "status": "error",
+            "message": "Send JSON with audio_data or a raw audio/* body"
+        }), 400
+    
+    if not audio_binary:
+        return jsonify({
+            "status": "error",
+            "message": "No audio data provided"
+        }), 400
+    if callback_url and not valid_callback_url(callback_url):
+        return jsonify({
+            "status": "error",
+            "message": "callback_url must be an http(s) URL on an allowed public host"
+        }), 400
+    
+    try:
+        job = job_queue.submit(audio_binary, callback_url)
+    except JobQueueFull as e:
+        response = jsonify({
+            "status": "error",
+            "message": f"Job queue is full, retry later ({str(e)})"
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    print(f"Queued job {job['job_id']}: {len(audio_binary)} bytes")
+    result_url = url_for('get_job', job_id=job['job_id'])
+    response = jsonify({
+        "status": "accepted",
+        "job_id": job['job_id'],
+        "state": job['state'],
+        "result_url": result_url
+    })
+    response.headers['Location'] = result_url
+    return response, 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    State of a submitted job: queued, running, done or failed. Finished jobs carry
+    the /api/predict response body in "result" and its HTTP status in "status_code".
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": "Unknown or expired job id"
+        }), 404
+    return jsonify({
+        "status": "success",
+        "data": public_job(job)
+    })
+
+@app.route('/api/predict_batch', methods=['POST'])
+@instrumented("predict_batch")
+def get_features_batch():
+    """
+    Predict several recordings in one request.
+    Body: {"recordings": [{"id": "...", "audio_data": "<base64>"}, ...]}
+    Every item gets the same body /api/predict would return for it, plus its id
+    and status_code, in request order.
+    """
+    try:
+        data = request.get_json()
+        recordings = data.get('recordings') if data else None
+        if not recordings or not isinstance(recordings, list):
+            return jsonify({
+                "status": "error",
+                "message": "No recordings provided"
+            }), 400
+        
+        if len(recordings) > BATCH_MAX_ITEMS:
+            return jsonify({
+                "status": "error",
+                "message": f"Too many recordings: {len(recordings)} (maximum {BATCH_MAX_ITEMS})"
+            }), 400
+        
+        print(f"Received batch prediction request with {len(recordings)} recordings")
+        
+        cache = get_prediction_cache()
+        audio_sources = []
+        audio_hashes = []
+        cache_keys = {}
+        cached_results = {}
+        input_errors = {}
+        for index, item in enumerate(recordings):
+            audio_sources.append(None)
+            audio_hashes.append(None)
+            audio_data = item.get('audio_data') if isinstance(item, dict) else None
+            if not audio_data:
+                input_errors[index] = "No audio_data provided"
+                continue
+            try:
+                with stage("base64_decode"):
+                    audio_binary = base64.b64decode(audio_data)
+                with stage("cache_lookup"):
+                    audio_hashes[index] = audio_digest(audio_binary)
+                    key = prediction_cache_key(audio_hashes[index])
+                    cached = cache.get(key) if key else None
+                if cached is not None:
+                    cached_results[index] = cached
+                    continue
+                cache_keys[index] = key
+                audio_sources[index] = audio_binary
+            except Exception as e:
+                input_errors[index] = f"Error processing audio data: {str(e)}"
+        
+        results = predict_emotion_batch(audio_sources, audio_hashes)
+        
+        for index, key in cache_keys.items():
+            if key and results[index] is not None:
+                cache.put(key, results[index])
+        results = [cached_results.get(index, result) for index, result in enumerate(results)]
+        
+        items = []
+        for index, result in enumerate(results):
+            if index in input_errors:
+                body, status_code = {"status": "error", "message": input_errors[index]}, 400
+            else:
+                body, status_code = prediction_response(result)
+            body["id"] = recordings[index].get('id', index) if isinstance(recordings[index], dict) else index
+            body["status_code"] = status_code
+            items.append(body)
+        
+        return jsonify({
+            "status": "success",
+            "results": items
+        })
+    
+    except Exception as e:
+        print(f"Error processing batch request: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 if __name__ == '__main__':
     import os
     # Get port from environment variable or default to 8080 for deployment
@@ -366,4 +871,6 @@ if __name__ == '__main__':
     
     # For deployment, always run in production mode
     debug_mode = os.environ.get('FLASK_ENV') == 'development'
+    job_queue.start()
+    start_warmup()
     app.run(host=host, port=port, debug=debug_mode)
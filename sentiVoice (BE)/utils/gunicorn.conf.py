@@ -0,0 +1,67 @@
+"""
+Gunicorn configuration for production serving of the emotion analysis API.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The master imports librosa and TensorFlow and warms the feature engine once
+before forking, so workers start from a shared, already-imported copy. Each
+worker then caps TensorFlow's thread pools to its share of the container's
+CPUs and builds the Keras model itself: TensorFlow's runtime threads do not
+survive fork, so a model created in the master is not safe to use in workers.
+"""
+
+import os
+
+import wsgi
+
+
+def container_cpu_count():
+    """CPUs available to this container (cgroup quota, then affinity, then cpu_count)"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+cpus = container_cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', cpus))
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+# Long recordings can take tens of seconds to analyse
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+# Per-worker TensorFlow thread pools, sized so all workers together use the container's CPUs
+tf_intra_op_threads = int(os.environ.get('TF_INTRA_OP_THREADS', max(1, cpus // workers)))
+tf_inter_op_threads = int(os.environ.get('TF_INTER_OP_THREADS', 1))
+
+
+def on_starting(server):
+    from job_queue import JOB_DB
+    if workers > 1 and not JOB_DB:
+        server.log.warning("JOB_DB is not set: /api/jobs keeps jobs in the memory of one worker, so with "
+                           f"{workers} workers a poll can land on a worker that does not know the job")
+    wsgi.preload()
+
+
+def post_fork(server, worker):
+    wsgi.init_worker(tf_intra_op_threads, tf_inter_op_threads)
+
+
+def worker_exit(server, worker):
+    wsgi.shutdown_worker()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching in front of the Keras model.
+Concurrent requests hand their feature vectors to one InferenceScheduler, which
+collects them for a short window (INFERENCE_BATCH_WINDOW_MS, up to
+INFERENCE_MAX_BATCH items), runs one batched predict and returns each row to the
+waiting request thread. With a single request in flight the caller runs the model
+directly, so low traffic keeps the unbatched latency. Direct calls and batches take
+the same model lock, so they never overlap: requests that arrive during a direct call
+queue up and go to the model together once it returns. Callers that already hold a
+whole batch use predict_many, which takes the same lock.
+The stage timings of a batched call (see metrics.py) are handed back to every
+request in the batch, together with the time it waited in the queue.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+
+from metrics import collect_timings, add_timings
+
+INFERENCE_BATCH_WINDOW_MS = float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 5))
+INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', 32))
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, float('inf'))
+
+
+class _PendingRequest:
+    def __init__(self, features):
+        self.features = features
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.row = None
+        self.error = None
+        self.timings = {}
+
+
+class InferenceScheduler:
+    """Gathers single-row predictions from concurrent callers into batched model calls"""
+
+    def __init__(self, predict_fn, window_ms=INFERENCE_BATCH_WINDOW_MS, max_batch=INFERENCE_MAX_BATCH):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._model_lock = threading.Lock()
+        self._queue = []
+        self._in_flight = 0
+        self._worker = None
+        self._worker_pid = None
+
+        self._batch_sizes = {bound: 0 for bound in BATCH_SIZE_BUCKETS}
+        self._batches = 0
+        self._direct_calls = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waited = 0
+
+    def predict(self, features):
+        """Predict one feature vector; returns that row of every output of predict_fn, e.g. (probabilities, label)"""
+        features = np.asarray(features).reshape(1, -1)
+
+        with self._cond:
+            self._in_flight += 1
+            direct = self._in_flight == 1 and not self._queue
+
+        try:
+            if direct:
+                # Nothing to batch with: skip the queue and the window
+                with self._cond:
+                    self._direct_calls += 1
+                with self._model_lock:
+                    outputs = self.predict_fn(features)
+                return tuple(output[0] for output in outputs)
+
+            pending = _PendingRequest(features)
+            with self._cond:
+                self._ensure_worker()
+                self._queue.append(pending)
+                self._cond.notify_all()
+            pending.done.wait()
+            add_timings(pending.timings)
+            if pending.error is not None:
+                raise pending.error
+            return pending.row
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+
+    def predict_many(self, features):
+        """Predict an (N, n_features) matrix in one model call under the model lock; returns predict_fn's outputs"""
+        with self._model_lock:
+            return self.predict_fn(np.asarray(features))
+
+    def stats(self):
+        """Queue depth, batch-size histogram and queue wait times"""
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "in_flight": self._in_flight,
+                "window_ms": self.window * 1000.0,
+                "max_batch": self.max_batch,
+                "batches": self._batches,
+                "direct_calls": self._direct_calls,
+                "batch_size_histogram": {f"le_{bound:g}": count for bound, count in self._batch_sizes.items()},
+                "wait_ms_avg": (self._wait_total / self._waited * 1000.0) if self._waited else 0.0,
+                "wait_ms_max": self._wait_max * 1000.0,
+            }
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+            self._worker.start()
+
+    def _wait_for_window(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued_at + self.window
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+    def _take_batch(self):
+        # Called with the model lock held, so requests queued during a direct call join
+        with self._cond:
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            return batch
+
+    def _record(self, batch, started_at):
+        with self._cond:
+            self._batches += 1
+            for bound in BATCH_SIZE_BUCKETS:
+                if len(batch) <= bound:
+                    self._batch_sizes[bound] += 1
+                    break
+            for pending in batch:
+                waited = started_at - pending.enqueued_at
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._waited += 1
+
+    def _run(self):
+        while True:
+            self._wait_for_window()
+            with self._model_lock:
+                batch = self._take_batch()
+                started_at = time.perf_counter()
+                self._record(batch, started_at)
+                with collect_timings() as timings:
+                    try:
+                        outputs = self.predict_fn(np.vstack([pending.features for pending in batch]))
+                        for row, pending in enumerate(batch):
+                            pending.row = tuple(output[row] for output in outputs)
+                    except Exception as e:
+                        for pending in batch:
+                            pending.error = e
+            for pending in batch:
+                pending.timings = dict(timings, queue_wait=started_at - pending.enqueued_at)
+                pending.done.set()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def predict_with_version(features):
+    """Predict with the current model artifacts; returns (probabilities, labels, versions) per row"""
+    from model_registry import get_artifacts
+    artifacts = get_artifacts()
+    probs, labels = artifacts.predict(features)
+    return probs, labels, [artifacts.version] * len(features)
+
+
+def get_scheduler():
+    """Return the process-wide scheduler bound to the shared model artifacts"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = InferenceScheduler(predict_with_version)
+    return _scheduler
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Asynchronous prediction jobs.
+A submitted recording gets a job id straight away and waits in a bounded queue
+(JOB_QUEUE_SIZE) until one of JOB_WORKERS worker threads runs it. Callers poll
+the job for its result or pass a callback URL that receives the finished job as
+a JSON POST. With JOB_DB set, jobs and their audio are kept in SQLite: queued
+jobs survive a restart, and every process sharing the file can answer a poll.
+Without it jobs only exist in the process that accepted them, so the in-memory
+backend is for a single worker process only.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import socket
+import sqlite3
+import ipaddress
+import threading
+import traceback
+import urllib.request
+from urllib.parse import urlparse
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 64))
+JOB_DB = os.environ.get('JOB_DB', '')
+JOB_RESULT_TTL = float(os.environ.get('JOB_RESULT_TTL', 24 * 3600))  # seconds finished jobs stay pollable
+JOB_STALE_AFTER = float(os.environ.get('JOB_STALE_AFTER', 600))  # seconds before a running job counts as lost
+JOB_CALLBACK_TIMEOUT = float(os.environ.get('JOB_CALLBACK_TIMEOUT', 10))
+JOB_CALLBACK_RETRIES = int(os.environ.get('JOB_CALLBACK_RETRIES', 3))
+# Hosts callbacks may go to; when empty, any host whose addresses are all public
+JOB_CALLBACK_ALLOWED_HOSTS = tuple(host.strip().lower() for host in
+                                   os.environ.get('JOB_CALLBACK_ALLOWED_HOSTS', '').split(',') if host.strip())
+
+JOB_FIELDS = ("job_id", "state", "created_at", "started_at", "finished_at", "status_code", "result",
+              "callback_url", "callback_status")
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when JOB_QUEUE_SIZE jobs are already waiting"""
+
+
+def public_address(address):
+    """False for loopback, private, link-local, reserved and other non-global addresses"""
+    address = ipaddress.ip_address(address.split("%")[0])
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def valid_callback_url(url, allowed_hosts=None):
+    """
+    An http(s) URL the server may POST job results to. With JOB_CALLBACK_ALLOWED_HOSTS
+    the host must be listed; otherwise every address it resolves to must be public,
+    so clients cannot aim callbacks at loopback, the internal network or cloud
+    metadata endpoints such as 169.254.169.254.
+    """
+    allowed_hosts = JOB_CALLBACK_ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
+    try:
+        parsed = urlparse(url or "")
+        host, port = parsed.hostname, parsed.port
+    except ValueError:
+        return False
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    if allowed_hosts:
+        return host in allowed_hosts
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port or 80, proto=socket.IPPROTO_TCP)}
+    except (OSError, UnicodeError):
+        return False
+    return bool(addresses) and all(public_address(address) for address in addresses)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """A redirect could point a checked callback URL at an internal host"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def deliver_callback(url, payload, retries=JOB_CALLBACK_RETRIES, timeout=JOB_CALLBACK_TIMEOUT):
+    """POST the finished job as JSON, retrying with exponential backoff; True once a 2xx arrives"""
+    data = json.dumps(payload, default=str).encode()
+    for attempt in range(1, retries + 1):
+        # Checked again before every attempt, since the host may resolve elsewhere by now
+        if not valid_callback_url(url):
+            print(f"Warning: job callback to {url} refused: not an allowed public host")
+            return False
+        try:
+            request = urllib.request.Request(url, data=data, method="POST",
+                                             headers={"Content-Type": "application/json"})
+            with _callback_opener.open(request, timeout=timeout) as response:
+                if 200 <= response.status < 300:
+                    return True
+        except Exception as e:
+            print(f"Warning: job callback to {url} failed (attempt {attempt}/{retries}): {e}")
+        if attempt < retries:
+            time.sleep(min(2 ** (attempt - 1), 30))
+    return False
+
+
+class _MemoryJobStore:
+    """Jobs of this process only; lost on restart"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._audio = {}
+
+    def insert(self, job, audio_binary):
+        self._jobs[job["job_id"]] = dict(job)
+        self._audio[job["job_id"]] = audio_binary
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def claim(self, job_id, now):
+        job = self._jobs.get(job_id)
+        if job is None or job["state"] != "queued":
+            return None, None
+        job.update(state="running", started_at=now)
+        return dict(job), self._audio.pop(job_id, None)
+
+    def update(self, job_id, **fields):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields)
+
+    def pending(self, limit, stale_before):
+        return []
+
+    def purge(self, finished_before):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < finished_before]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class _SQLiteJobStore:
+    """Jobs in an SQLite file shared by every process that points at it"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._db_pid = None
+
+    def _connection(self):
+        # SQLite connections must not cross a fork
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, state TEXT NOT NULL, created_at REAL NOT NULL, "
+                "started_at REAL, finished_at REAL, status_code INTEGER, result TEXT, "
+                "callback_url TEXT, callback_status TEXT, audio BLOB)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at)")
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _row_to_job(self, row):
+        job = dict(zip(JOB_FIELDS, row))
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def insert(self, job, audio_binary):
+        db = self._connection()
+        db.execute(
+            "INSERT INTO jobs (job_id, state, created_at, callback_url, callback_status, audio) VALUES (?, ?, ?, ?, ?, ?)",
+            (job["job_id"], job["state"], job["created_at"], job["callback_url"], job["callback_status"],
+             sqlite3.Binary(audio_binary))
+        )
+        db.commit()
+
+    def get(self, job_id):
+        row = self._connection().execute(
+            f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def claim(self, job_id, now):
+        db = self._connection()
+        # Only one process wins a job that several have queued
+        claimed = db.execute(
+            "UPDATE jobs SET state = 'running', started_at = ? WHERE job_id = ? AND state = 'queued'", (now, job_id)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None, None
+        audio = db.execute("SELECT audio FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+        return self.get(job_id), bytes(audio) if audio is not None else None
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        if fields.get("state") in ("done", "failed"):
+            fields["audio"] = None  # the recording is not needed once the job has finished
+        db = self._connection()
+        db.execute(
+            f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE job_id = ?",
+            (*fields.values(), job_id)
+        )
+        db.commit()
+
+    def pending(self, limit, stale_before):
+        """Queued jobs nobody is running, after requeueing running jobs whose process died"""
+        db = self._connection()
+        db.execute("UPDATE jobs SET state = 'queued', started_at = NULL WHERE state = 'running' AND started_at < ?",
+                   (stale_before,))
+        db.commit()
+        rows = db.execute("SELECT job_id FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT ?",
+                          (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self, finished_before):
+        db = self._connection()
+        db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (finished_before,))
+        db.commit()
+
+
+class JobQueue:
+    """Bounded queue of prediction jobs run by background worker threads"""
+
+    def __init__(self, run_fn, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE, db_path=JOB_DB,
+                 result_ttl=JOB_RESULT_TTL, stale_after=JOB_STALE_AFTER):
+        self.run_fn = run_fn
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self.persistent = bool(db_path)
+        self._store = _SQLiteJobStore(db_path) if db_path else _MemoryJobStore()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._queued_ids = set()
+        self._callbacks = queue.Queue()
+        self._threads = []
+        self._threads_pid = None
+        self._running = 0
+
+        self.submitted = 0
+        self.rejected = 0
+        self.done = 0
+        self.failed = 0
+        self.callbacks_delivered = 0
+        self.callbacks_failed = 0
+
+    def start(self):
+        """Start this process's worker threads and pick up jobs persisted before a restart"""
+        with self._lock:
+            self._ensure_workers()
+            self._requeue_pending()
+
+    def submit(self, audio_binary, callback_url=None):
+        """Queue a recording; returns the new job, or raises JobQueueFull"""
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "state": "queued",
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "status_code": None,
+            "result": None,
+            "callback_url": callback_url,
+            "callback_status": "pending" if callback_url else None,
+        }
+        with self._lock:
+            self._ensure_workers()
+            if self._queue.qsize() >= self.max_queued:
+                self.rejected += 1
+                raise JobQueueFull(f"{self.max_queued} jobs are already queued")
+            self._store.insert(job, audio_binary)
+            self._queue.put(job["job_id"])
+            self._queued_ids.add(job["job_id"])
+            self.submitted += 1
+            if self.result_ttl > 0:
+                self._store.purge(now - self.result_ttl)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._store.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "persistent": self.persistent,
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "running": self._running,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "done": self.done,
+                "failed": self.failed,
+                "callbacks_delivered": self.callbacks_delivered,
+                "callbacks_failed": self.callbacks_failed,
+            }
+
+    def _ensure_workers(self):
+        # Threads do not survive fork, so each process starts its own
+        if self._threads_pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+            return
+        self._threads_pid = os.getpid()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._deliver_callbacks, name="job-callbacks", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _requeue_pending(self):
+        free = self.max_queued - self._queue.qsize()
+        if free <= 0:
+            return
+        # Jobs this process already holds are skipped, so idle workers never queue one twice
+        pending = self._store.pending(free + len(self._queued_ids), time.time() - self.stale_after)
+        for job_id in [job_id for job_id in pending if job_id not in self._queued_ids][:free]:
+            self._queue.put(job_id)
+            self._queued_ids.add(job_id)
+
+    def _work(self):
+        while True:
+            try:
+                job_id = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self.persistent:
+                    # Idle: take over jobs left by a restart or queued beyond another process's capacity
+                    with self._lock:
+                        self._requeue_pending()
+                continue
+            self._run(job_id)
+
+    def _run(self, job_id):
+        with self._lock:
+            self._queued_ids.discard(job_id)
+            job, audio_binary = self._store.claim(job_id, time.time())
+            if job is None:
+                return  # claimed by another process
+            self._running += 1
+
+        try:
+            if audio_binary is None:
+                raise RuntimeError("recording is no longer available")
+            body, status_code = self.run_fn(audio_binary)
+            state = "done"
+        except Exception as e:
+            traceback.print_exc()
+            body, status_code = {"status": "error", "message": f"Job failed: {str(e)}"}, 500
+            state = "failed"
+
+        with self._lock:
+            self._running -= 1
+            if state == "done":
+                self.done += 1
+            else:
+                self.failed += 1
+            job.update(state=state, finished_at=time.time(), status_code=status_code, result=body)
+            self._store.update(job_id, state=state, finished_at=job["finished_at"],
+                               status_code=status_code, result=body)
+        print(f"Job {job_id} {state} with status {status_code}")
+
+        if job["callback_url"]:
+            self._callbacks.put(job)
+
+    def _deliver_callbacks(self):
+        # Separate thread, so a slow or dead callback URL never holds up predictions
+        while True:
+            job = self._callbacks.get()
+            delivered = deliver_callback(job["callback_url"], public_job(job))
+            with self._lock:
+                if delivered:
+                    self.callbacks_delivered += 1
+                else:
+                    self.callbacks_failed += 1
+                self._store.update(job["job_id"], callback_status="delivered" if delivered else "failed")
+
+
+def public_job(job):
+    """The job as returned to clients and callbacks (without the callback URL)"""
+    return {field: job[field] for field in JOB_FIELDS if field != "callback_url"}
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Per-stage latency and request metrics, served on /metrics in the Prometheus text format.
+The prediction path is split into named stages (base64 decode, pre-check, audio
+decode, quality analysis, VAD trim, each feature family, scaling, inference and
+label decode). `stage()` adds the time spent in a block to the timings of the
+request being handled, and `record_request()` turns those timings into histogram
+observations once the response is known. Stages that run in another thread or in a
+feature worker process go through `timed_job()`, which returns their timings with
+the result so the caller can merge them.
+
+Each process keeps its own metrics: with several gunicorn workers every scrape
+reports the worker that answered it.
+"""
+
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+METRICS_BUCKETS = tuple(float(bound) for bound in os.environ.get(
+    'METRICS_BUCKETS', '0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30').split(',') if bound) + (float('inf'),)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_timings = contextvars.ContextVar("stage_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[name] for name in self.labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    def __init__(self, name, help_text, labels=(), buckets=METRICS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._series[key] = (counts, total + value)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels[name] for name in self.labels))
+        return sum(series[0]) if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter("sentivoice_requests_total", "Prediction requests by endpoint and HTTP status", ("endpoint", "status"))
+REJECTIONS = Counter("sentivoice_rejections_total", "Recordings rejected with a 4xx answer, by error_type", ("endpoint", "error_type"))
+REQUEST_SECONDS = Histogram("sentivoice_request_seconds", "Time to answer a prediction request", ("endpoint",))
+STAGE_SECONDS = Histogram("sentivoice_stage_seconds", "Time spent in each stage of a prediction request", ("endpoint", "stage"))
+
+
+@contextmanager
+def stage(name):
+    """Add the time spent in the block to the current request's timings (no-op outside a request)"""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def collect_timings():
+    """Collect the stages run inside the block into a fresh {stage: seconds} dict"""
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def add_timings(timings):
+    """Merge timings measured elsewhere (another thread or process) into the current request"""
+    current = _timings.get()
+    if current is None or not timings:
+        return
+    for name, seconds in timings.items():
+        current[name] = current.get(name, 0.0) + seconds
+
+
+def timed_job(fn, *args):
+    """Run fn(*args) collecting its stages; returns (result, timings). Picklable for the feature pool"""
+    with collect_timings() as timings:
+        result = fn(*args)
+    return result, timings
+
+
+def record_request(endpoint, status_code, timings, seconds, body=None):
+    """Count a finished request and observe its total and per-stage latencies"""
+    REQUESTS.inc(endpoint=endpoint, status=status_code)
+    if 400 <= status_code < 500:
+        error_type = (body or {}).get("error_type", "invalid_request")
+        REJECTIONS.inc(endpoint=endpoint, error_type=error_type)
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+    for name, stage_seconds in timings.items():
+        STAGE_SECONDS.observe(stage_seconds, endpoint=endpoint, stage=name)
+
+
+def timings_field(timings, seconds):
+    """The opt-in "timings" response field: seconds per stage plus the total"""
+    field = {name: round(stage_seconds, 4) for name, stage_seconds in timings.items()}
+    field["total"] = round(seconds, 4)
+    return field
+
+
+def sample_lines(name, help_text, kind, values, label=None):
+    """
+    Exposition lines for a counter or gauge kept elsewhere: a number, or a dict such
+    as {"memory": 3, "disk": 1} whose keys become the values of label
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    if not isinstance(values, dict):
+        return lines + [f"{name} {values:g}"]
+    for key, value in values.items():
+        lines.append(f"{name}{_labels((label,), (key,))} {value:g}")
+    return lines
+
+
+def render(extra=()):
+    """All metrics in the Prometheus text exposition format, followed by the extra lines"""
+    lines = []
+    for metric in (REQUESTS, REJECTIONS, REQUEST_SECONDS, STAGE_SECONDS):
+        lines.extend(metric.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Runtimes that can execute the emotion model.
+"keras" loads model.h5 with the full TensorFlow package. "tflite" runs the
+model.tflite written by export_tflite.py with a TFLite interpreter, preferably
+the small tflite-runtime / ai-edge-litert wheels so TensorFlow is never imported.
+"numpy" replays the model.npz written by export_numpy.py in plain NumPy.
+Every backend exposes the predict(x, verbose=0) call ModelArtifacts uses.
+"""
+
+import os
+import importlib.util
+import threading
+import numpy as np
+
+from numpy_model import NumpyModel
+
+# "auto" picks the leanest backend whose model file and runtime are available
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'auto')
+TFLITE_THREADS = int(os.environ.get('TFLITE_THREADS', 1))
+
+BACKEND_FILES = {
+    "keras": "model.h5",
+    "tflite": "model.tflite",
+    "numpy": "model.npz",
+}
+# Order "auto" tries them in
+AUTO_ORDER = ("numpy", "tflite", "keras")
+
+# Interpreter modules, leanest first; tensorflow.lite works too but imports all of TensorFlow
+TFLITE_INTERPRETERS = ("tflite_runtime.interpreter", "ai_edge_litert.interpreter", "tensorflow.lite")
+
+
+def _find_module(name):
+    # Only the top-level package is looked up: finding a submodule would import its
+    # parent, and importing tensorflow is exactly what this check has to avoid
+    return importlib.util.find_spec(name.split('.')[0]) is not None
+
+
+def tflite_interpreter_class():
+    """The first importable TFLite Interpreter class"""
+    for module_name in TFLITE_INTERPRETERS:
+        if not _find_module(module_name):
+            continue
+        module = importlib.import_module(module_name)
+        return module.Interpreter
+    raise ImportError(f"No TFLite interpreter installed (tried {', '.join(TFLITE_INTERPRETERS)})")
+
+
+def runtime_available(backend):
+    if backend == "numpy":
+        return True
+    if backend == "tflite":
+        return any(_find_module(name) for name in TFLITE_INTERPRETERS)
+    if backend == "keras":
+        return _find_module("tensorflow")
+    return False
+
+
+def choose_backend(artifact_dir, requested=MODEL_BACKEND):
+    """Backend to load from artifact_dir; an explicit MODEL_BACKEND is used as is"""
+    if requested != "auto":
+        if requested not in BACKEND_FILES:
+            raise ValueError(f"Unknown MODEL_BACKEND {requested!r}, expected auto or one of {sorted(BACKEND_FILES)}")
+        return requested
+    for backend in AUTO_ORDER:
+        if os.path.exists(os.path.join(artifact_dir, BACKEND_FILES[backend])) and runtime_available(backend):
+            return backend
+    return "keras"  # reported as a missing model.h5
+
+
+class TFLiteModel:
+    """A .tflite model behind the Keras predict() call, resized to each batch"""
+
+    def __init__(self, path, num_threads=TFLITE_THREADS):
+        self.path = path
+        self._interpreter = tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch = int(self._input['shape'][0])
+        # One interpreter per model; a single caller may also run outside the scheduler thread
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        return (None,) + tuple(int(d) for d in self._input['shape'][1:])
+
+    def predict(self, x, verbose=0):
+        x = np.ascontiguousarray(x, dtype=self._input['dtype'])
+        with self._lock:
+            if x.shape[0] != self._batch:
+                self._interpreter.resize_tensor_input(self._input['index'], list(x.shape))
+                self._interpreter.allocate_tensors()
+                self._batch = x.shape[0]
+            self._interpreter.set_tensor(self._input['index'], x)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output['index']).copy()
+
+    def summary(self):
+        print(f"TFLite model: {self.path}")
+        print(f"  input  {self._input['name']}: {self.input_shape} {np.dtype(self._input['dtype']).name}")
+        print(f"  output {self._output['name']}: {tuple(self._output['shape'])} {np.dtype(self._output['dtype']).name}")
+
+
+def load_keras_model(path):
+    from tensorflow.keras.models import load_model
+    return load_model(path, compile=False)
+
+
+LOADERS = {
+    "keras": load_keras_model,
+    "tflite": TFLiteModel,
+    "numpy": NumpyModel,
+}
+
+
+def load_model_backend(backend, path):
+    return LOADERS[backend](path)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Process-wide registry for the emotion model artifacts.
+Loads scaler.pkl, encoder.pkl and the model from audio_feature_extracted/ once per
+worker and shares them across requests, with an explicit reload that only swaps
+the artifact set when the files on disk have really changed. The model file and
+runtime depend on MODEL_BACKEND (see model_backends.py).
+"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+
+from model_backends import BACKEND_FILES, MODEL_BACKEND, choose_backend, load_model_backend
+from preprocessor import Preprocessor
+from metrics import stage
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_feature_extracted")
+ARTIFACT_FILES = {
+    "scaler": "scaler.pkl",
+    "encoder": "encoder.pkl",
+    "model": "model.h5",
+}
+
+
+def file_fingerprint(path):
+    """Return (mtime, size, sha256) for an artifact file"""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return stat.st_mtime, stat.st_size, digest.hexdigest()
+
+
+class ModelArtifacts:
+    """One consistent set of loaded scaler, encoder and model"""
+
+    def __init__(self, scaler, encoder, model, fingerprints, artifact_dir, backend="keras"):
+        self.scaler = scaler
+        self.encoder = encoder
+        self.model = model
+        self.fingerprints = fingerprints
+        self.artifact_dir = artifact_dir
+        self.backend = backend
+        self.preprocessor = Preprocessor.from_artifacts(scaler, encoder)
+
+    def predict(self, features):
+        """
+        Scale an (N, n_features) matrix, run a single model.predict over the whole
+        batch and decode every row. Returns (probabilities, labels).
+        """
+        with stage("scale"):
+            features_scaled = self.preprocessor.scale(features)
+        with stage("inference"):
+            prediction_probs = self.model.predict(features_scaled[:, :, np.newaxis], verbose=0)
+        with stage("label_decode"):
+            labels = self.preprocessor.decode(prediction_probs)
+        return prediction_probs, labels
+
+    @property
+    def version(self):
+        """Short content hash identifying this artifact set"""
+        digest = hashlib.sha256()
+        for name in sorted(self.fingerprints):
+            digest.update(self.fingerprints[name][2].encode())
+        return digest.hexdigest()[:16]
+
+
+class ModelRegistry:
+    """Loads the artifact set lazily, once, and hands the same instance to every caller"""
+
+    def __init__(self, artifact_dir=ARTIFACT_DIR, backend=MODEL_BACKEND):
+        self.artifact_dir = artifact_dir
+        self.requested_backend = backend
+        self._artifacts = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        """The model backend in use, or the one the next load would pick"""
+        if self._artifacts is not None:
+            return self._artifacts.backend
+        return choose_backend(self.artifact_dir, self.requested_backend)
+
+    def paths(self, backend=None):
+        files = dict(ARTIFACT_FILES, model=BACKEND_FILES[backend or self.backend])
+        return {name: os.path.join(self.artifact_dir, file_name) for name, file_name in files.items()}
+
+    def missing_files(self):
+        """List artifact paths that do not exist on disk"""
+        return [path for path in self.paths().values() if not os.path.exists(path)]
+
+    @property
+    def is_loaded(self):
+        return self._artifacts is not None
+
+    def get(self):
+        """Return the shared artifacts, loading them on first use"""
+        artifacts = self._artifacts
+        if artifacts is not None:
+            return artifacts
+        with self._lock:
+            if self._artifacts is None:
+                self._artifacts = self._load()
+            return self._artifacts
+
+    def reload(self, force=False):
+        """
+        Reload the artifact set if any file changed on disk.
+        A file counts as changed when its mtime or size differs and its content hash
+        differs too, so touching a file without changing it does not rebuild the model.
+        Returns True when a new artifact set was swapped in.
+        """
+        with self._lock:
+            current = self._artifacts
+            if current is None or force:
+                self._artifacts = self._load()
+                return True
+
+            # A newly exported model file can change which backend "auto" picks
+            changed = choose_backend(self.artifact_dir, self.requested_backend) != current.backend
+            if not changed:
+                changed = self._files_changed(current)
+
+            if not changed:
+                return False
+
+            # Build the new set completely before swapping so in-flight requests keep a consistent one
+            self._artifacts = self._load()
+            print(f"Model artifacts reloaded: {current.version} -> {self._artifacts.version}")
+            return True
+
+    def _files_changed(self, current):
+        for name, path in self.paths(current.backend).items():
+            old_mtime, old_size, old_hash = current.fingerprints[name]
+            stat = os.stat(path)
+            if stat.st_mtime == old_mtime and stat.st_size == old_size:
+                continue
+            if file_fingerprint(path)[2] != old_hash:
+                return True
+        return False
+
+    def _load(self):
+        backend = choose_backend(self.artifact_dir, self.requested_backend)
+        paths = self.paths(backend)
+        missing = [path for path in paths.values() if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"Missing required model files: {missing}")
+
+        fingerprints = {name: file_fingerprint(path) for name, path in paths.items()}
+
+        import joblib  # pulls in scikit-learn's unpickling machinery, needed only here
+
+        print(f"Loading model files from: {self.artifact_dir} ({backend} backend)")
+        scaler = joblib.load(paths["scaler"])
+        encoder = joblib.load(paths["encoder"])
+        model = load_model_backend(backend, paths["model"])
+
+        return ModelArtifacts(scaler, encoder, model, fingerprints, self.artifact_dir, backend)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def get_artifacts():
+    """Shortcut for get_registry().get()"""
+    return get_registry().get()
+
+
+def reload_artifacts(force=False):
+    """Shortcut for get_registry().reload()"""
+    return get_registry().reload(force=force)
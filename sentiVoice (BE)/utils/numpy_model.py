@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Forward pass of the emotion CNN in plain NumPy.
+export_numpy.py writes the layer stack of model.h5 to model.npz: a JSON "spec" with
+one entry per layer plus the weight arrays. NumpyModel replays that stack on whole
+batches in float32 with no TensorFlow import. Supported layers are Conv1D, max and
+average pooling (also global), Dense, Flatten, BatchNormalization, Activation and
+Dropout, which is the identity at inference time.
+"""
+
+import json
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SUPPORTED_LAYERS = (
+    "Conv1D", "MaxPooling1D", "AveragePooling1D", "GlobalMaxPooling1D", "GlobalAveragePooling1D",
+    "Dense", "Flatten", "BatchNormalization", "Activation", "Dropout",
+)
+
+# Conv1D inputs up to this many kernel-tap x channel columns are unrolled into one product
+IM2COL_MAX_COLUMNS = 64
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+def _elu(x):
+    return np.where(x > 0, x, np.expm1(np.minimum(x, 0)))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "elu": _elu,
+    "softmax": _softmax,
+}
+
+
+def _padding(length, size, stride, dilation, padding):
+    """(left, right, output length) for Keras 'valid', 'same' and 'causal' padding"""
+    span = (size - 1) * dilation + 1
+    if padding == "valid":
+        return 0, 0, (length - span) // stride + 1
+    if padding == "causal":
+        return span - 1, 0, (length - 1) // stride + 1
+    if padding == "same":
+        out = -(-length // stride)
+        total = max((out - 1) * stride + span - length, 0)
+        return total // 2, total - total // 2, out
+    raise ValueError(f"Unsupported padding {padding!r}")
+
+
+def conv1d(x, kernel, bias, stride=1, dilation=1, padding="valid"):
+    """(N, L, C) * (k, C, F) -> (N, L', F) with BLAS matrix products"""
+    size, channels, _ = kernel.shape
+    left, right, out = _padding(x.shape[1], size, stride, dilation, padding)
+    if left or right:
+        x = np.pad(x, ((0, 0), (left, right), (0, 0)))
+    if size * channels <= IM2COL_MAX_COLUMNS:
+        # Few input channels (the first layer sees one): gather every tap into one (k * C)-wide product
+        windows = sliding_window_view(x, (size - 1) * dilation + 1, axis=1)[:, ::stride][:, :out, :, ::dilation]
+        columns = windows.transpose(0, 1, 3, 2).reshape(x.shape[0], out, size * channels)
+        y = columns @ kernel.reshape(size * channels, -1)
+    else:
+        # Wide inputs: one product per tap avoids copying the input k times
+        y = None
+        for tap in range(size):
+            start = tap * dilation
+            term = x[:, start:start + (out - 1) * stride + 1:stride] @ kernel[tap]
+            y = term if y is None else np.add(y, term, out=y)
+    if bias is not None:
+        y += bias
+    return y
+
+
+def pool1d(x, size, stride, padding, reduce):
+    """Max or average pooling over axis 1; padded positions never count, as in Keras"""
+    left, right, out = _padding(x.shape[1], size, stride, 1, padding)
+    if reduce == "max":
+        if left or right:
+            x = np.pad(x, ((0, 0), (left, right), (0, 0)), constant_values=-np.inf)
+        windows = sliding_window_view(x, size, axis=1)[:, ::stride][:, :out]
+        return windows.max(axis=-1)
+    counts = np.ones((1, x.shape[1], 1), dtype=x.dtype)
+    if left or right:
+        x = np.pad(x, ((0, 0), (left, right), (0, 0)))
+        counts = np.pad(counts, ((0, 0), (left, right), (0, 0)))
+    sums = sliding_window_view(x, size, axis=1)[:, ::stride][:, :out].sum(axis=-1)
+    return sums / sliding_window_view(counts, size, axis=1)[:, ::stride][:, :out].sum(axis=-1)
+
+
+class NumpyModel:
+    """model.npz behind the Keras predict() call"""
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(path, allow_pickle=False) as data:
+            spec = json.loads(str(data["spec"]))
+            self.layers = [
+                dict(layer, weights=[data[f"{i}/{j}"].astype(np.float32) for j in range(layer["n_weights"])])
+                for i, layer in enumerate(spec["layers"])
+            ]
+        self._input_shape = tuple(spec["input_shape"])
+        for layer in self.layers:
+            if layer["type"] not in SUPPORTED_LAYERS:
+                raise ValueError(f"Layer {layer['name']!r} has unsupported type {layer['type']}")
+            if layer.get("activation", "linear") not in ACTIVATIONS:
+                raise ValueError(f"Layer {layer['name']!r} has unsupported activation {layer['activation']}")
+            if layer["type"] == "BatchNormalization":
+                # Fold the moving statistics into one scale and offset
+                gamma, beta, mean, variance = self._batchnorm_weights(layer)
+                scale = gamma / np.sqrt(variance + layer["epsilon"])
+                layer["weights"] = [scale.astype(np.float32), (beta - mean * scale).astype(np.float32)]
+
+    @staticmethod
+    def _batchnorm_weights(layer):
+        weights = list(layer["weights"])
+        size = weights[-1].shape
+        gamma = weights.pop(0) if layer["scale"] else np.ones(size, np.float32)
+        beta = weights.pop(0) if layer["center"] else np.zeros(size, np.float32)
+        mean, variance = weights
+        return gamma, beta, mean, variance
+
+    @property
+    def input_shape(self):
+        return (None,) + self._input_shape
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32).reshape((-1,) + self._input_shape)
+        for layer in self.layers:
+            x = self._forward(layer, x)
+        return x
+
+    def _forward(self, layer, x):
+        kind = layer["type"]
+        weights = layer["weights"]
+        if kind == "Conv1D":
+            x = conv1d(x, weights[0], weights[1] if layer["use_bias"] else None,
+                       layer["strides"], layer["dilation_rate"], layer["padding"])
+        elif kind == "Dense":
+            x = x @ weights[0]
+            if layer["use_bias"]:
+                x += weights[1]
+        elif kind in ("MaxPooling1D", "AveragePooling1D"):
+            x = pool1d(x, layer["pool_size"], layer["strides"], layer["padding"],
+                       "max" if kind == "MaxPooling1D" else "average")
+        elif kind == "GlobalMaxPooling1D":
+            x = x.max(axis=1)
+        elif kind == "GlobalAveragePooling1D":
+            x = x.mean(axis=1)
+        elif kind == "Flatten":
+            x = x.reshape(x.shape[0], -1)
+        elif kind == "BatchNormalization":
+            x = x * weights[0] + weights[1]
+        # Dropout is the identity at inference time
+        return ACTIVATIONS[layer.get("activation", "linear")](x)
+
+    def summary(self):
+        print(f"NumPy model: {self.path}")
+        print(f"  input {self.input_shape}")
+        for layer in self.layers:
+            shapes = ", ".join(str(w.shape) for w in layer["weights"])
+            print(f"  {layer['name']:<24}{layer['type']:<24}{shapes}")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of prediction results.
+Entries are keyed by the SHA-256 of the uploaded audio bytes plus the model
+artifact version, so a resent recording skips decode, extraction and inference,
+and swapping the model naturally invalidates every old entry. A bounded in-memory
+LRU sits in front of an optional SQLite tier (PREDICTION_CACHE_DB).
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 256))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 24 * 3600))  # seconds, 0 = never expire
+PREDICTION_CACHE_DB = os.environ.get('PREDICTION_CACHE_DB', '')
+PREDICTION_CACHE_DB_MAX_ROWS = int(os.environ.get('PREDICTION_CACHE_DB_MAX_ROWS', 10000))
+
+# Only deterministic outcomes are cached; server errors are always retried
+CACHEABLE_ERRORS = ("audio_quality_issue", "feature_extraction_failed")
+
+
+def audio_digest(audio_binary):
+    """SHA-256 of the uploaded audio bytes"""
+    return hashlib.sha256(audio_binary).hexdigest()
+
+
+def cache_key(audio_hash, model_version):
+    return f"{model_version}:{audio_hash}"
+
+
+def is_cacheable(result):
+    return "error" not in result or result["error"] in CACHEABLE_ERRORS
+
+
+class PredictionCache:
+    """In-memory LRU with TTL, optionally backed by a size-bounded SQLite table"""
+
+    def __init__(self, max_items=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL,
+                 db_path=PREDICTION_CACHE_DB, db_max_rows=PREDICTION_CACHE_DB_MAX_ROWS):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_rows = db_max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_items > 0 or bool(self.db_path)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if self._fresh(stored_at, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self.evictions += 1
+
+            result = self._disk_get(key, now)
+            if result is not None:
+                self.disk_hits += 1
+                self._memory_put(key, result, now)
+                return result
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        if not is_cacheable(result):
+            return
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, result, now)
+            self._disk_put(key, result, now)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": ((self.hits + self.disk_hits) / lookups) if lookups else 0.0,
+            }
+
+    def _fresh(self, stored_at, now):
+        return self.ttl <= 0 or now - stored_at <= self.ttl
+
+    def _memory_put(self, key, result, now):
+        if self.max_items <= 0:
+            return
+        self._entries[key] = (now, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self):
+        if not self.db_path:
+            return None
+        # SQLite connections must not cross a fork
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, result TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _disk_get(self, key, now):
+        db = self._connection()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT result, stored_at FROM predictions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not self._fresh(row[1], now):
+                db.execute("DELETE FROM predictions WHERE key = ?", (key,))
+                db.commit()
+                self.evictions += 1
+                return None
+            return json.loads(row[0])
+        except Exception as e:
+            print(f"Warning: prediction cache read failed: {e}")
+            return None
+
+    def _disk_put(self, key, result, now):
+        db = self._connection()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO predictions (key, result, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result, default=str), now)
+            )
+            if self.ttl > 0:
+                self.evictions += db.execute("DELETE FROM predictions WHERE stored_at < ?", (now - self.ttl,)).rowcount
+            self.evictions += db.execute(
+                "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.db_max_rows,)
+            ).rowcount
+            db.commit()
+        except Exception as e:
+            print(f"Warning: prediction cache write failed: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """Return the process-wide prediction cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
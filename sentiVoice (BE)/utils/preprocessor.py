@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Scaler and encoder of the emotion model compiled to plain NumPy.
+scaler.pkl is a StandardScaler and encoder.pkl a one-hot encoder over the emotion
+labels. Both are reduced once to float32 arrays, so scaling a batch is two in-place
+array ops and decoding is an argmax into the class list. Unlike the sklearn calls this
+needs no DataFrame per request and no pandas import on the hot path.
+"""
+
+import numpy as np
+
+
+class Preprocessor:
+    """Feature scaling in front of the model and label decoding after it"""
+
+    def __init__(self, mean, scale, classes):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float32)
+        # Multiplying by the reciprocal is cheaper than dividing; sklearn already maps zero variance to 1
+        self.inv_scale = np.ascontiguousarray(1.0 / np.asarray(scale, dtype=np.float64), dtype=np.float32)
+        self.classes = np.asarray(classes, dtype=object)
+
+    @classmethod
+    def from_artifacts(cls, scaler, encoder):
+        """Compile a fitted StandardScaler and a single-column one-hot encoder"""
+        if not hasattr(scaler, "mean_") or not hasattr(scaler, "scale_"):
+            raise ValueError(f"Scaler {type(scaler).__name__} has no mean_/scale_; expected a StandardScaler")
+        n_features = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+
+        categories = getattr(encoder, "categories_", None)
+        if categories is None or len(categories) != 1 or getattr(encoder, "drop", None) is not None:
+            raise ValueError(f"Encoder {type(encoder).__name__} is not a one-hot encoder over a single label column")
+        return cls(mean, scale, categories[0])
+
+    @property
+    def n_features(self):
+        return len(self.mean)
+
+    def scale(self, features):
+        """Scaled float32 copy of an (N, n_features) matrix or a single vector, as (N, n_features)"""
+        x = np.array(features, dtype=np.float32, ndmin=2, order="C")
+        if x.shape[1] != self.n_features:
+            raise ValueError(f"X has {x.shape[1]} features, but the scaler is expecting {self.n_features} features as input.")
+        x -= self.mean
+        x *= self.inv_scale
+        return x
+
+    def decode(self, probabilities):
+        """Label of the most likely class in every row, as encoder.inverse_transform returns it"""
+        return self.classes[np.argmax(probabilities, axis=1)]
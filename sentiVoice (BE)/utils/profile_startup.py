@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Start-up budget of the service.
+Imports each entry module in a fresh interpreter with -X importtime and reports the
+total import time and the packages that cost the most. With --serve it also starts an
+entry point and measures how long /health and /ready take to answer. Results can be
+appended to a JSON-lines history file, so the budget can be tracked from commit to
+commit, and the script exits with 1 when an import exceeds --budget-ms.
+
+Usage:
+    python profile_startup.py                       # import times of flaskapp, asgi, wsgi
+    python profile_startup.py --serve dev           # plus time to /health and /ready
+    python profile_startup.py --history startup_history.jsonl --budget-ms 1500
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+import requests
+
+from bench_serving import ENTRY_POINTS, stop_server
+
+ENTRY_MODULES = ("flaskapp", "asgi", "wsgi")
+TOP_PACKAGES = 8
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def import_profile(module):
+    """(total seconds, {top-level package: seconds of its own code}) for importing module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    packages = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1e6
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    return total, dict(packages)
+
+def time_to_endpoints(entry_point, port, timeout=300):
+    """Seconds until /health and /ready answer 200 after the process starts, and the /ready body"""
+    env = dict(os.environ, PORT=str(port), FLASK_ENV="production")
+    started = time.perf_counter()
+    process = subprocess.Popen(ENTRY_POINTS[entry_point], cwd=HERE, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    health = ready = None
+    body = None
+    try:
+        while time.perf_counter() - started < timeout and ready is None:
+            if process.poll() is not None:
+                raise RuntimeError(f"{entry_point} exited with code {process.returncode}")
+            try:
+                if health is None and requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                    health = time.perf_counter() - started
+                if health is not None:
+                    response = requests.get(f"{base_url}/ready", timeout=2)
+                    body = response.json()
+                    if response.status_code == 200:
+                        ready = time.perf_counter() - started
+                    elif body.get("state") == "failed":
+                        break
+            except requests.RequestException:
+                pass
+            time.sleep(0.05)
+    finally:
+        stop_server(process)
+    return health, ready, body
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the service start-up")
+    parser.add_argument("--serve", choices=sorted(ENTRY_POINTS), help="also time /health and /ready of this entry point")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 0)),
+                        help="fail when an entry module takes longer than this to import (0 = no budget)")
+    parser.add_argument("--history", help="append the results to this JSON-lines file")
+    args = parser.parse_args()
+
+    print("🔧 Start-up profile")
+    print("=" * 60)
+    record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "imports": {}}
+    over_budget = []
+    for module in ENTRY_MODULES:
+        try:
+            total, packages = import_profile(module)
+        except RuntimeError as e:
+            # e.g. uvicorn is only needed by the ASGI entry point
+            print(f"   ⚠️  {e}")
+            continue
+        record["imports"][module] = round(total, 4)
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:TOP_PACKAGES]
+        print(f"   import {module:<10}{total * 1000:>8.0f}ms   "
+              + ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in heaviest))
+        if args.budget_ms and total * 1000 > args.budget_ms:
+            over_budget.append(module)
+
+    if args.serve:
+        health, ready, body = time_to_endpoints(args.serve, args.port)
+        record.update(entry_point=args.serve, health_seconds=health, ready_seconds=ready, warmup=body)
+        print(f"   {args.serve}: /health after {health:.2f}s" if health is not None else f"   {args.serve}: /health never answered")
+        if ready is not None:
+            print(f"   {args.serve}: /ready after {ready:.2f}s, warm-up stages: {body.get('stages')}")
+        else:
+            print(f"   {args.serve}: not ready ({(body or {}).get('error', 'timed out')})")
+
+    if args.history:
+        previous = None
+        if os.path.exists(args.history):
+            with open(args.history) as f:
+                lines = [line for line in f if line.strip()]
+            previous = json.loads(lines[-1]) if lines else None
+        if previous:
+            for module, total in record["imports"].items():
+                if module in previous.get("imports", {}):
+                    print(f"   {module}: {(total - previous['imports'][module]) * 1000:+.0f}ms since {previous['timestamp']}")
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if over_budget:
+        print(f"\n❌ Over the {args.budget_ms:.0f}ms import budget: {', '.join(over_budget)}")
+        return False
+    print("\n🏁 Profile completed!")
+    return True
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
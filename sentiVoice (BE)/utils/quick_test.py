@@ -51,9 +51,8 @@ def test_with_good_audio():
     
     try:
         from app import extract_feature
-        import joblib
         import pandas as pd
-        from tensorflow.keras.models import load_model
+        from model_registry import get_artifacts
         
         # Create good test audio
         signal, sample_rate = create_good_test_audio()
@@ -86,12 +85,10 @@ def test_with_good_audio():
         
         # Test model prediction
         print("\n🧠 Testing model prediction...")
-        script_dir = Path(__file__).parent
-        output_dir = script_dir / "audio_feature_extracted"
-        
-        scaler = joblib.load(output_dir / 'scaler.pkl')
-        encoder = joblib.load(output_dir / 'encoder.pkl')
-        model = load_model(output_dir / 'model.h5', compile=False)
+        artifacts = get_artifacts()
+        scaler = artifacts.scaler
+        encoder = artifacts.encoder
+        model = artifacts.model
         
         # Prepare features
         features_df = pd.DataFrame([features], columns=[f'feature_{i}' for i in range(len(features))])
@@ -73,7 +73,8 @@ def start_flask_app():
     try:
         from flaskapp import app
         port = int(os.environ.get('PORT', 5000))
-        app.run(host='0.0.0.0', port=port, debug=True)
+        debug_mode = os.environ.get('FLASK_ENV') == 'development'
+        app.run(host='0.0.0.0', port=port, debug=debug_mode)
     except Exception as e:
         print(f"❌ Error starting Flask app: {e}")
         sys.exit(1)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Start-up warm-up and readiness of the service.
+The web server answers /health as soon as it is listening; the heavy work runs in
+warm-up stages whose timings /ready reports: librosa's submodules, the model and its
+first calls, the full request pipeline over synthetic speech-like clips (numba
+compilation, FFT plans, filterbanks) and the feature processes.
+STARTUP_WARMUP chooses when:
+- background (default): in a thread, while the server already answers
+- blocking: before the entry point serves anything, as before
+- off: never; every dependency is loaded by the first request that needs it
+/ready answers 200 once the warm-up has finished (or with off) and 503 before that.
+"""
+
+import io
+import os
+import time
+import threading
+import traceback
+from itertools import product
+
+STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', 'background')
+STARTUP_MODES = ("background", "blocking", "off")
+
+# Clips the pipeline stage runs: every duration (seconds) at every sample rate. Numba and
+# FFT plans do not depend on either, so the defaults stay short: librosa's own rate and the
+# browsers' 48 kHz, just above the minimum duration
+WARMUP_SAMPLE_RATES = tuple(int(rate) for rate in os.environ.get('WARMUP_SAMPLE_RATES', '22050,48000').split(',') if rate)
+WARMUP_DURATIONS = tuple(float(seconds) for seconds in os.environ.get('WARMUP_DURATIONS', '12').split(',') if seconds)
+
+
+def warm_imports():
+    """Import what librosa loads lazily on the first request, and soundfile"""
+    import soundfile  # noqa: F401
+    import librosa.core  # noqa: F401
+    import librosa.feature  # noqa: F401
+    import librosa.filters  # noqa: F401
+    import librosa.effects  # noqa: F401
+
+
+def warm_feature_pool():
+    """Start the feature processes (each warms itself up) when FEATURE_WORKERS is set"""
+    import feature_pool
+    if feature_pool.get_feature_executor() is not None:
+        feature_pool.run_job(os.getpid)
+
+
+def warm_model():
+    """Load the model artifacts and run the model at the batch sizes the scheduler sends"""
+    import numpy as np
+    from model_registry import get_registry
+    from inference_scheduler import INFERENCE_MAX_BATCH
+
+    registry = get_registry()
+    missing = registry.missing_files()
+    if missing:
+        raise FileNotFoundError(f"Missing required model files: {missing}")
+    artifacts = registry.get()
+    for batch in sorted({1, INFERENCE_MAX_BATCH}):
+        artifacts.predict(np.zeros((batch, artifacts.preprocessor.n_features), dtype=np.float32))
+
+
+def synthetic_recordings():
+    """WAV uploads of the test scripts' speech-like signals, tiled to each warm-up duration and rate"""
+    import numpy as np
+    import soundfile as sf
+    from test_audio_processing import create_test_audio
+    from quick_test import create_good_test_audio
+    from stream_features import FEATURE_STREAMING_MIN_SECONDS
+    from flaskapp import MAX_DURATION
+
+    durations = WARMUP_DURATIONS
+    if 0 < FEATURE_STREAMING_MIN_SECONDS <= MAX_DURATION and max(durations) < FEATURE_STREAMING_MIN_SECONDS:
+        # Long recordings take the streamed path, which has its own first-call costs
+        durations += (FEATURE_STREAMING_MIN_SECONDS,)
+
+    signals = [create_test_audio()[0], create_good_test_audio()[0]]
+    for i, (sample_rate, seconds) in enumerate(product(WARMUP_SAMPLE_RATES, durations)):
+        # The signal is reinterpreted at each rate: only the shapes matter for warming up
+        signal = np.resize(signals[i % len(signals)], int(seconds * sample_rate))
+        buffer = io.BytesIO()
+        sf.write(buffer, signal, sample_rate, format='WAV', subtype='PCM_16')
+        yield {"sample_rate": sample_rate, "duration": seconds}, buffer.getvalue()
+
+
+def run_pipeline(data):
+    """Seconds spent in each stage of the /api/predict path for one upload"""
+    from flaskapp import precheck_audio_quality, analyze_decoded_audio_quality, extract_feature_from_audio
+    from stream_features import open_audio
+    from model_registry import get_registry
+
+    timings = {}
+    start = time.perf_counter()
+
+    def lap(name):
+        nonlocal start
+        now = time.perf_counter()
+        timings[name] = now - start
+        start = now
+
+    rejected = precheck_audio_quality(data)
+    lap("precheck")
+    if rejected is not None:
+        raise RuntimeError(f"Warm-up clip rejected by the pre-check: {rejected['issues']}")
+    audio = open_audio(data)
+    lap("decode")
+    quality = analyze_decoded_audio_quality(audio)
+    lap("quality")
+    if not quality.get("is_good_quality"):
+        raise RuntimeError(f"Warm-up clip rejected by the quality gate: {quality.get('issues', quality.get('error'))}")
+    audio, _ = audio.trimmed()
+    features = extract_feature_from_audio(audio, mfcc=True, chroma=True, mel=True, contrast=True, tonnetz=True)
+    lap("features")
+    registry = get_registry()
+    if registry.is_loaded:
+        registry.get().predict(features)
+        lap("inference")
+    return timings
+
+
+def warm_pipeline():
+    """
+    Run every synthetic recording through the request pipeline, then the first one again.
+    The first run pays for numba compilation, FFT plans and filterbanks; the repeat
+    shows what a request costs once they are in place.
+    """
+    cases = []
+    first = None
+    for case, data in synthetic_recordings():
+        first = first or data
+        cases.append(dict(case, stages=_rounded(run_pipeline(data))))
+    return {
+        "cold": cases[0]["stages"],
+        "warm": _rounded(run_pipeline(first)),
+        "cases": cases,
+    }
+
+
+def _rounded(timings):
+    return {name: round(seconds, 4) for name, seconds in timings.items()}
+
+
+WARMUP_STAGES = (
+    ("imports", warm_imports),
+    ("model", warm_model),
+    ("pipeline", warm_pipeline),
+    ("feature_pool", warm_feature_pool),
+)
+
+
+class Warmup:
+    """Runs the warm-up stages once and reports their state and timings"""
+
+    def __init__(self, stages=WARMUP_STAGES):
+        self.stages = stages
+        self.state = "pending"
+        self.mode = None
+        self.timings = {}
+        self.reports = {}
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, mode=STARTUP_WARMUP):
+        """Start the warm-up once per process; with blocking this returns when it has finished"""
+        if mode not in STARTUP_MODES:
+            raise ValueError(f"Unknown STARTUP_WARMUP {mode!r}, expected one of {STARTUP_MODES}")
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.mode = mode
+            if mode == "off":
+                self.state = "ready"
+                return
+            self.state = "running"
+            self.started_at = time.time()
+        if mode == "blocking":
+            self.run()
+        else:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            for name, stage in self.stages:
+                stage_start = time.perf_counter()
+                report = stage()
+                self.timings[name] = time.perf_counter() - stage_start
+                if report is not None:
+                    self.reports[name] = report
+            self.state = "ready"
+            print(f"Warm-up finished in {time.perf_counter() - start:.1f}s: "
+                  + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()))
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            print(f"Warm-up failed: {str(e)}")
+            traceback.print_exc()
+        finally:
+            self.finished_at = time.time()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        status = {
+            "ready": self.ready,
+            "state": self.state,
+            "mode": self.mode,
+            "stages": _rounded(self.timings),
+        }
+        status.update(self.reports)
+        if self.started_at is not None and self.finished_at is not None:
+            status["seconds"] = round(self.finished_at - self.started_at, 4)
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+_warmup = Warmup()
+
+
+def get_warmup():
+    """The process-wide warm-up"""
+    return _warmup
+
+
+def start_warmup(mode=STARTUP_WARMUP):
+    """Shortcut for get_warmup().start()"""
+    get_warmup().start(mode)
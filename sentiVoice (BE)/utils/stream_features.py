@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Streaming feature extraction for long recordings.
+StreamedAudio reads the file in blocks with soundfile and turns them into the
+same STFT frames librosa.stft(center=True) would produce. Each block updates
+running sums and is then dropped, so memory stays bounded instead of growing
+with clip length.
+
+Two passes are made over the file:
+- Pass 1 gathers the quality-gate statistics, the mel / MFCC / contrast sums
+  and the chroma tuning statistics.
+- Pass 2 runs chroma and tonnetz with the tuning estimated over the whole clip.
+
+Frame-local families match the full-load extractor up to float rounding. Some
+families differ slightly by design:
+- MFCC and contrast clip dB values 80 dB below the global maximum, and that
+  maximum is only known at the end. Values are kept in fine dB histograms, so
+  only the bin containing the threshold is approximated.
+- Chroma tuning is exact: pass 1 keeps every pitch peak (5 bytes each), so the
+  median magnitude threshold is taken over the whole clip.
+- Tonnetz is the spectrogram-based "fast" variant (TONNETZ_DECIMATION applies),
+  because the exact waveform HPSS + CQT cannot be streamed. It uses the tuning
+  of the full spectrogram. Recordings are therefore only streamed with
+  TONNETZ_MODE=fast; with exact (the default) they are always decoded in full.
+test_stream_features.py documents and checks the resulting tolerance.
+"""
+
+import io
+import os
+from math import gcd
+import numpy as np
+import librosa
+
+from feature_engine import (
+    FEATURE_LAYOUT, TONNETZ_MODE, TONNETZ_DECIMATION, ANALYSIS_SAMPLE_RATE, RESAMPLE_TYPE, SOXR_QUALITIES, resample
+)
+from filterbanks import get_filterbanks, N_FFT, HOP_LENGTH, N_MELS
+from audio_pipeline import load_audio
+from audio_quality import QualityStats, SILENCE_THRESHOLD, VAD_FRAME_LENGTH
+from metrics import stage
+
+# Recordings at least this long (per the file header) are streamed; 0 disables streaming
+FEATURE_STREAMING_MIN_SECONDS = float(os.environ.get('FEATURE_STREAMING_MIN_SECONDS', 0))
+FEATURE_STREAM_BLOCK_FRAMES = int(os.environ.get('FEATURE_STREAM_BLOCK_FRAMES', 256))
+
+# librosa defaults used by the full-load extractor
+TOP_DB = 80.0
+AMIN = 1e-10
+HPSS_KERNEL = 31
+
+# dB histogram used to apply the top_db clip after the fact (power_to_db floors at -100 dB)
+DB_HIST_MIN = 10.0 * np.log10(AMIN)
+DB_HIST_MAX = 0.0
+DB_HIST_BIN = 0.1
+
+# Tuning deviation bins exactly as librosa.pitch_tuning
+TUNING_BINS = np.linspace(-0.5, 0.5, 101)
+
+
+def _db(values):
+    """librosa.power_to_db without the top_db clip (ref=1.0)"""
+    return 10.0 * np.log10(np.maximum(AMIN, values))
+
+
+class ClippedDbMean:
+    """
+    Per-row frame mean of power_to_db(values, top_db=80) over a stream of blocks.
+    The clip threshold depends on the maximum over the whole clip, so values are
+    summed exactly and also counted in a dB histogram. At the end, the bins below
+    the threshold are lifted to it.
+    """
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.n_bins = int(round((DB_HIST_MAX - DB_HIST_MIN) / DB_HIST_BIN))
+        self.total = np.zeros(n_rows)
+        self.counts = np.zeros(n_rows * self.n_bins, dtype=np.int64)
+        self.sums = np.zeros(n_rows * self.n_bins)
+        self.frames = 0
+        self.max_db = -np.inf
+
+    def add(self, values):
+        db = _db(values).astype(np.float64)
+        self.total += db.sum(axis=1)
+        self.frames += db.shape[1]
+        if db.size:
+            self.max_db = max(self.max_db, float(db.max()))
+
+        bins = np.floor((db - DB_HIST_MIN) / DB_HIST_BIN).astype(np.int64)
+        tracked = bins < self.n_bins  # louder values can only be clipped if the peak exceeds 80 dB
+        flat = (np.arange(self.n_rows)[:, None] * self.n_bins + np.clip(bins, 0, None))[tracked]
+        self.counts += np.bincount(flat, minlength=self.counts.size)
+        self.sums += np.bincount(flat, weights=db[tracked], minlength=self.sums.size)
+
+    def mean(self, top_db=TOP_DB):
+        if self.frames == 0:
+            return np.zeros(self.n_rows)
+        threshold = self.max_db - top_db
+        counts = self.counts.reshape(self.n_rows, self.n_bins)
+        sums = self.sums.reshape(self.n_rows, self.n_bins)
+        edge = (threshold - DB_HIST_MIN) / DB_HIST_BIN
+        below = min(max(int(np.floor(edge)), 0), self.n_bins)
+
+        # Bins entirely below the threshold are raised to it exactly
+        lift = threshold * counts[:, :below].sum(axis=1) - sums[:, :below].sum(axis=1)
+        if below < self.n_bins:
+            # The bin containing the threshold: lift its mean if the mean lies below
+            count, total = counts[:, below], sums[:, below]
+            bin_mean = np.divide(total, count, out=np.full(self.n_rows, threshold), where=count > 0)
+            lift += count * np.maximum(threshold - bin_mean, 0.0)
+        return (self.total + lift) / self.frames
+
+
+class TuningEstimate:
+    """
+    librosa.estimate_tuning over a stream of magnitude blocks.
+    piptrack is frame-local, so each block's peaks are kept as (deviation bin,
+    magnitude) pairs: 5 bytes per peak. The median magnitude threshold is then
+    taken over the whole clip, exactly as the full-load call does.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self._bins = []
+        self._mags = []
+
+    def add(self, S):
+        pitch, mag = librosa.piptrack(S=S, sr=self.sample_rate)
+        mask = pitch > 0
+        if not mask.any():
+            return
+        residual = np.mod(12 * librosa.hz_to_octs(pitch[mask]), 1.0)
+        residual[residual >= 0.5] -= 1.0
+        # Same bin edges and edge handling as np.histogram in librosa.pitch_tuning
+        bins = np.clip(np.searchsorted(TUNING_BINS, residual, side="right") - 1, 0, len(TUNING_BINS) - 2)
+        self._bins.append(bins.astype(np.int8))
+        self._mags.append(mag[mask])
+
+    def tuning(self):
+        if not self._mags:
+            return 0.0
+        mags = np.concatenate(self._mags)
+        # Keep the peaks at or above the median magnitude, then take the most common deviation
+        keep = mags >= np.median(mags)
+        counts = np.bincount(np.concatenate(self._bins)[keep], minlength=len(TUNING_BINS) - 1)
+        return float(TUNING_BINS[np.argmax(counts)])
+
+
+class HarmonicStream:
+    """
+    librosa.decompose.hpss harmonic part over a stream of magnitude blocks.
+    The time median needs kernel_size // 2 frames on each side, so blocks are
+    emitted once their right-hand context has arrived; frames at the clip edges
+    see the same reflect padding as a whole-clip call.
+    """
+
+    def __init__(self, kernel_size):
+        self.kernel_size = kernel_size
+        self.context = kernel_size // 2
+        self.buffer = None
+        self.left = 0
+
+    def push(self, S):
+        self.buffer = S if self.buffer is None else np.concatenate([self.buffer, S], axis=1)
+        ready = self.buffer.shape[1] - self.context
+        if ready <= self.left:
+            return None
+        harmonic, _ = librosa.decompose.hpss(self.buffer, kernel_size=self.kernel_size)
+        out = harmonic[:, self.left:ready]
+        # Keep the frames still waiting for context plus the left context they need
+        keep = min(self.buffer.shape[1], 2 * self.context)
+        self.buffer = self.buffer[:, -keep:]
+        self.left = keep - self.context
+        return out
+
+    def finish(self):
+        if self.buffer is None or self.buffer.shape[1] <= self.left:
+            return None
+        harmonic, _ = librosa.decompose.hpss(self.buffer, kernel_size=self.kernel_size)
+        return harmonic[:, self.left:]
+
+
+class PolyphaseStream:
+    """
+    scipy resample_poly over a stream of blocks.
+    Input is cut at multiples of the decimation factor, so every segment maps to a whole
+    number of output samples. Each segment is resampled with enough neighbouring input
+    for the FIR filter, which gives the same output as one resample_poly call.
+    """
+
+    def __init__(self, orig_sr, target_sr):
+        divisor = gcd(orig_sr, target_sr)
+        self.orig_sr, self.target_sr = orig_sr, target_sr
+        self.up, self.down = target_sr // divisor, orig_sr // divisor
+        # resample_poly's filter spans 10 * max(up, down) upsampled samples on each side
+        taps = int(np.ceil(10 * max(self.up, self.down) / self.up)) + 1
+        self.context = self.down * int(np.ceil(taps / self.down))
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0
+        self.emitted = 0  # input samples whose output has been returned
+
+    def _segment(self, end, stop):
+        """Output for input [emitted, end), resampled from input [emitted - left, stop)"""
+        left = min(self.context, self.emitted)
+        x = self.buffer[self.emitted - left - self.buffer_start:stop - self.buffer_start]
+        if len(x) == 0:
+            return np.zeros(0, dtype=np.float32)
+        y = resample(x, self.orig_sr, self.target_sr, "polyphase")
+        skip = left * self.up // self.down
+        if end is None:
+            return y[skip:]
+        return y[skip:skip + (end - self.emitted) * self.up // self.down]
+
+    def push(self, samples):
+        self.buffer = np.concatenate([self.buffer, samples])
+        buffer_end = self.buffer_start + len(self.buffer)
+        end = (buffer_end - self.context) // self.down * self.down
+        if end <= self.emitted:
+            return np.zeros(0, dtype=np.float32)
+        out = self._segment(end, end + self.context)
+        self.emitted = end
+        keep_from = max(0, self.emitted - self.context)
+        self.buffer = self.buffer[keep_from - self.buffer_start:]
+        self.buffer_start = keep_from
+        return out
+
+    def finish(self):
+        return self._segment(None, self.buffer_start + len(self.buffer))
+
+
+class SoxrStream:
+    """soxr's own streaming resampler"""
+
+    def __init__(self, orig_sr, target_sr, quality):
+        import soxr
+        self._stream = soxr.ResampleStream(orig_sr, target_sr, 1, dtype='float32', quality=quality)
+
+    def push(self, samples):
+        return self._stream.resample_chunk(samples)
+
+    def finish(self):
+        return self._stream.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+def stream_resampler(orig_sr, target_sr, res_type=RESAMPLE_TYPE):
+    """Block resampler for res_type, or None when that resampler cannot be streamed"""
+    if res_type == "polyphase":
+        return PolyphaseStream(orig_sr, target_sr)
+    if res_type in SOXR_QUALITIES:
+        return SoxrStream(orig_sr, target_sr, SOXR_QUALITIES[res_type])
+    return None
+
+
+class StreamedAudio:
+    """
+    A recording read block by block instead of being decoded in full.
+    Exposes the quality-gate attributes of DecodedAudio (computed in pass 1) and
+    extract() for the feature vector (pass 2).
+    """
+
+    def __init__(self, source, block_frames=FEATURE_STREAM_BLOCK_FRAMES, analysis_rate=ANALYSIS_SAMPLE_RATE):
+        import soundfile as sf
+        self.source = source if isinstance(source, str) else "<upload>"
+        self._data = bytes(source) if isinstance(source, (bytes, bytearray, memoryview)) else None
+        self._path = None if self._data is not None else source
+        self.block_frames = block_frames
+        info = sf.info(self._open_target())
+        self.sample_rate = int(info.samplerate)
+        self.n_samples = int(info.frames)
+        # Quality statistics use the native samples, features the (optionally resampled) analysis rate
+        self.analysis_rate = int(analysis_rate) or self.sample_rate
+        self.banks = get_filterbanks(self.analysis_rate)
+        self._scanned = False
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def duration(self):
+        return float(self.n_samples / self.sample_rate)
+
+    @property
+    def quality(self):
+        self.scan()
+        return self._quality
+
+    @property
+    def max_amplitude(self):
+        return self.quality.peak
+
+    @property
+    def rms_energy(self):
+        return self.quality.rms_energy
+
+    def silence_ratio(self, threshold=SILENCE_THRESHOLD):
+        if threshold != SILENCE_THRESHOLD:
+            raise ValueError(f"streamed audio counts silence below {SILENCE_THRESHOLD} only")
+        return self.quality.silence_ratio
+
+    def trimmed(self, mode=None):
+        """Streamed recordings are not trimmed: pass 1 has already averaged every frame"""
+        n_frames = -(-self.n_samples // VAD_FRAME_LENGTH)
+        return self, {"mode": "off", "frames": n_frames, "frames_dropped": 0, "seconds_dropped": 0.0}
+
+    def _open_target(self):
+        return io.BytesIO(self._data) if self._data is not None else self._path
+
+    def _sample_blocks(self):
+        """Mono float32 blocks, downmixed like decode_audio_bytes"""
+        import soundfile as sf
+        blocksize = int(self.block_frames * HOP_LENGTH * self.sample_rate / self.analysis_rate)
+        with sf.SoundFile(self._open_target()) as f:
+            for block in f.blocks(blocksize=blocksize, dtype='float32', always_2d=True):
+                yield block[:, 0] if block.shape[1] == 1 else np.mean(block, axis=1, dtype=np.float32)
+
+    def _analysis_blocks(self, on_samples=None):
+        """Blocks at the analysis rate; on_samples sees the native samples first"""
+        resampler = None
+        if self.analysis_rate != self.sample_rate:
+            resampler = stream_resampler(self.sample_rate, self.analysis_rate)
+        for samples in self._sample_blocks():
+            if on_samples is not None:
+                on_samples(samples)
+            yield samples if resampler is None else resampler.push(samples)
+        if resampler is not None:
+            yield resampler.finish()
+
+    def _magnitude_blocks(self, on_samples=None):
+        """|STFT| frames identical to librosa.stft(center=True), one block at a time"""
+        pad = np.zeros(N_FFT // 2, dtype=np.float32)
+        pending = pad
+        for samples in self._analysis_blocks(on_samples):
+            pending = np.concatenate([pending, samples])
+            if len(pending) < N_FFT:
+                continue
+            n_frames = 1 + (len(pending) - N_FFT) // HOP_LENGTH
+            yield self.banks.stft_magnitude(pending[:(n_frames - 1) * HOP_LENGTH + N_FFT], center=False)
+            pending = pending[n_frames * HOP_LENGTH:]
+        pending = np.concatenate([pending, pad])
+        if len(pending) >= N_FFT:
+            yield self.banks.stft_magnitude(pending, center=False)
+
+    def scan(self):
+        """Pass 1: quality statistics plus the mel, MFCC, contrast and tuning accumulators"""
+        if self._scanned:
+            return
+        quality = QualityStats()
+        self.frames = 0
+        self._mel_sum = np.zeros(N_MELS)
+        self._mel_db = ClippedDbMean(N_MELS)
+        self._contrast_peak = ClippedDbMean(7)
+        self._contrast_valley = ClippedDbMean(7)
+        self._tuning = TuningEstimate(self.analysis_rate)
+
+        for S in self._magnitude_blocks(quality.add):
+            mel_power = self.banks.mel_basis @ S ** 2
+            self._mel_sum += mel_power.sum(axis=1)
+            self._mel_db.add(mel_power)
+            if self.banks.contrast_bands is not None:
+                peak, valley = self.banks.contrast_peak_valley(S)
+                self._contrast_peak.add(peak)
+                self._contrast_valley.add(valley)
+            self._tuning.add(S)
+            self.frames += S.shape[1]
+
+        self._quality = quality
+        self._scanned = True
+
+    def _tonal_means(self, chroma, tonnetz):
+        """Pass 2: chroma and fast tonnetz frame means with the clip-wide tuning"""
+        chroma_sum, tonnetz_sum = np.zeros(12), np.zeros(6)
+        tonnetz_frames = 0
+        if not (chroma or tonnetz):
+            return chroma_sum, tonnetz_sum
+        tuning = self._tuning.tuning()
+
+        decimation = max(1, TONNETZ_DECIMATION)
+        kernel_size = HPSS_KERNEL if decimation == 1 else max(3, (HPSS_KERNEL // decimation) | 1)
+        harmonic_stream = HarmonicStream(kernel_size)
+        frame_offset = 0
+
+        def add_tonnetz(harmonic):
+            nonlocal tonnetz_sum, tonnetz_frames
+            if harmonic is None or harmonic.shape[1] == 0:
+                return
+            harmonic_chroma = self.banks.chroma_from(harmonic, tuning)
+            tonnetz_sum += librosa.feature.tonnetz(chroma=harmonic_chroma, sr=self.analysis_rate).sum(axis=1)
+            tonnetz_frames += harmonic.shape[1]
+
+        for S in self._magnitude_blocks():
+            if chroma:
+                chroma_sum += self.banks.chroma_from(S, tuning).sum(axis=1)
+            if tonnetz:
+                # Keep every decimation-th frame of the whole clip, as fast_tonnetz_features does
+                first = (-frame_offset) % decimation
+                add_tonnetz(harmonic_stream.push(S[:, first::decimation]))
+            frame_offset += S.shape[1]
+        if tonnetz:
+            add_tonnetz(harmonic_stream.finish())
+
+        return chroma_sum / max(self.frames, 1), tonnetz_sum / max(tonnetz_frames, 1)
+
+    def _contrast_mean(self):
+        if self.banks.contrast_bands is None:
+            raise librosa.ParameterError("Frequency band exceeds Nyquist. Reduce either fmin or n_bands.")
+        return self._contrast_peak.mean() - self._contrast_valley.mean()
+
+    def extract(self, **kwargs):
+        """The 193-dim vector in FEATURE_LAYOUT order, like feature_engine.extract_features"""
+        # The scan decodes, resamples and accumulates every family; the finals below are cheap
+        with stage("features.scan"):
+            self.scan()
+        families = {}
+        try:
+            with stage("features.tonal"):
+                chroma, tonnetz = self._tonal_means(kwargs.get("chroma"), kwargs.get("tonnetz"))
+            families["chroma"], families["tonnetz"] = chroma, tonnetz
+        except Exception as e:
+            print(f"Error extracting chroma/tonnetz features: {e}")
+
+        finals = {
+            "mfcc": lambda: self.banks.dct @ self._mel_db.mean(),
+            "chroma": lambda: families["chroma"],
+            "mel": lambda: self._mel_sum / max(self.frames, 1),
+            "contrast": self._contrast_mean,
+            "tonnetz": lambda: families["tonnetz"],
+        }
+        parts = []
+        for name, size in FEATURE_LAYOUT:
+            if not kwargs.get(name):
+                continue
+            try:
+                with stage(f"features.{name}"):
+                    values = finals[name]()
+                print(f"{name.capitalize()} features shape: {values.shape}, range: {np.min(values):.4f} to {np.max(values):.4f}")
+            except Exception as e:
+                print(f"Error extracting {name} features: {e}")
+                values = np.zeros(size)
+            parts.append(values)
+
+        return np.hstack(parts).astype(np.float64) if parts else np.array([])
+
+
+def should_stream(source):
+    """True when streaming is enabled and the header says the recording is long enough"""
+    if FEATURE_STREAMING_MIN_SECONDS <= 0:
+        return False
+    if TONNETZ_MODE != "fast":
+        return False  # the exact tonnetz needs the whole waveform
+    if ANALYSIS_SAMPLE_RATE and RESAMPLE_TYPE != "polyphase" and RESAMPLE_TYPE not in SOXR_QUALITIES:
+        return False  # librosa resamplers need the whole signal
+    import soundfile as sf
+    target = io.BytesIO(bytes(source)) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        info = sf.info(target)
+    except Exception:
+        return False  # not readable by soundfile: decode in full
+    return info.frames / info.samplerate >= FEATURE_STREAMING_MIN_SECONDS
+
+
+def open_audio(source):
+    """StreamedAudio for long recordings when streaming is enabled, else fully decoded audio"""
+    if should_stream(source):
+        return StreamedAudio(source)
+    return load_audio(source)
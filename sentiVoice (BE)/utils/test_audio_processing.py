@@ -115,18 +115,14 @@ def test_model_with_real_features(features):
     print("\n🧪 Testing model with real features...")
     
     try:
-        import joblib
         import pandas as pd
-        from tensorflow.keras.models import load_model
-        from pathlib import Path
-        
-        script_dir = Path(__file__).parent
-        output_dir = script_dir / "audio_feature_extracted"
+        from model_registry import get_artifacts
         
         # Load model components
-        scaler = joblib.load(output_dir / 'scaler.pkl')
-        encoder = joblib.load(output_dir / 'encoder.pkl')
-        model = load_model(output_dir / 'model.h5', compile=False)
+        artifacts = get_artifacts()
+        scaler = artifacts.scaler
+        encoder = artifacts.encoder
+        model = artifacts.model
         
         # Prepare features
         features_df = pd.DataFrame([features], columns=[f'feature_{i}' for i in range(len(features))])
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the one-pass quality statistics (audio_quality.py).
+The blockwise results must equal the separate full-length NumPy passes the
+quality gate used before, whatever the block size, and the VAD statistics must
+find the speech and clipped portions of constructed signals.
+"""
+
+import numpy as np
+
+from audio_quality import QualityStats, SILENCE_THRESHOLD, VAD_FRAME_LENGTH, VAD_TRIM_PAD_FRAMES
+from audio_pipeline import DecodedAudio
+
+def naive_stats(X):
+    """The previous quality gate: one full-length pass per metric"""
+    return {
+        "peak": float(np.max(np.abs(X))),
+        "rms_energy": float(np.sqrt(np.mean(X.astype(np.float64) ** 2))),
+        "silence_ratio": float(np.sum(np.abs(X) < SILENCE_THRESHOLD) / len(X)),
+    }
+
+def test_matches_separate_passes():
+    """Peak, RMS and silence ratio must not depend on the block size"""
+    print("🔍 Comparing one-pass statistics with separate passes...")
+    rng = np.random.default_rng(0)
+    all_ok = True
+    # Odd lengths leave a partial VAD frame at the end
+    for length in (1000, 22050 * 3 + 17, 48000 * 10 + 311):
+        X = (rng.standard_normal(length) * 0.1).astype(np.float32)
+        X[length // 3:length // 2] = 0.0
+        expected = naive_stats(X)
+        for block_samples in (VAD_FRAME_LENGTH, 1000, 64 * VAD_FRAME_LENGTH, length):
+            stats = QualityStats.from_samples(X, block_samples=block_samples)
+            ok = (stats.peak == expected["peak"]
+                  and np.isclose(stats.rms_energy, expected["rms_energy"], rtol=1e-6)
+                  and stats.silence_ratio == expected["silence_ratio"]
+                  and len(stats.frame_rms) == length // VAD_FRAME_LENGTH)
+            print(f"   {length} samples, blocks of {block_samples}: {'✅' if ok else '❌'}")
+            all_ok = all_ok and ok
+    return all_ok
+
+def test_vad_statistics():
+    """Speech and clipping ratios of signals with a known layout"""
+    print("🔍 Checking VAD statistics...")
+    sample_rate = 22050
+    rng = np.random.default_rng(1)
+    t = np.arange(sample_rate * 4) / sample_rate
+    # 1 s of faint noise, 2 s of tone, 1 s of faint noise
+    X = (rng.standard_normal(len(t)) * 1e-4).astype(np.float32)
+    X[sample_rate:3 * sample_rate] += (0.3 * np.sin(2 * np.pi * 220 * t[:2 * sample_rate])).astype(np.float32)
+    stats = QualityStats.from_samples(X)
+    speech_ok = abs(stats.speech_ratio - 0.5) < 0.01
+    print(f"   speech ratio {stats.speech_ratio:.3f} (expected ~0.5) {'✅' if speech_ok else '❌'}")
+
+    loud = np.clip(1.5 * np.sin(2 * np.pi * 220 * t), -1.0, 1.0).astype(np.float32)
+    expected_clipped = float(np.mean(np.abs(loud) >= 0.999))
+    clipped = QualityStats.from_samples(loud).clipping_ratio
+    clipping_ok = clipped == expected_clipped and clipped > 0.3
+    print(f"   clipping ratio {clipped:.3f} (expected {expected_clipped:.3f}) {'✅' if clipping_ok else '❌'}")
+
+    silent = QualityStats.from_samples(np.zeros(sample_rate, dtype=np.float32))
+    silent_ok = silent.speech_ratio == 0.0 and silent.silence_ratio == 1.0
+    print(f"   digital silence has no speech: {'✅' if silent_ok else '❌'}")
+    return speech_ok and clipping_ok and silent_ok
+
+def test_vad_trim():
+    """Trim modes drop the quiet lead-in, tail and pause but keep the padded speech"""
+    print("🔍 Checking VAD trim...")
+    sample_rate = 22050
+    rng = np.random.default_rng(2)
+    quiet = lambda frames: (rng.standard_normal(frames * VAD_FRAME_LENGTH) * 1e-4).astype(np.float32)
+    tone = lambda frames: (0.3 * np.sin(np.arange(frames * VAD_FRAME_LENGTH) * 0.05)).astype(np.float32)
+    # 100 quiet, 200 speech, 80 quiet, 200 speech, 60 quiet frames, plus a partial tail frame
+    X = np.concatenate([quiet(100), tone(200), quiet(80), tone(200), quiet(60), quiet(1)[:100]])
+    audio = DecodedAudio(X, sample_rate)
+    pad = VAD_TRIM_PAD_FRAMES
+    expected = {
+        "off": 0,
+        "edges": (100 - pad) + (60 - pad) + 1,
+        "all": (100 - pad) + (80 - 2 * pad) + (60 - pad) + 1,
+    }
+    all_ok = True
+    for mode, dropped in expected.items():
+        trimmed, report = audio.trimmed(mode)
+        ok = (report["frames"] == 641 and report["frames_dropped"] == dropped
+              and abs(len(trimmed) - (len(X) - report["seconds_dropped"] * sample_rate)) < 1)
+        print(f"   {mode:<5} dropped {report['frames_dropped']} frames (expected {dropped}) {'✅' if ok else '❌'}")
+        all_ok = all_ok and ok
+
+    # Nothing is trimmed when too little speech would remain
+    short = DecodedAudio(np.concatenate([quiet(200), tone(10), quiet(200)]), sample_rate)
+    kept_ok = short.trimmed("all")[0] is short
+    print(f"   too little speech left untrimmed: {'✅' if kept_ok else '❌'}")
+    return all_ok and kept_ok
+
+def main():
+    """Main test function"""
+    print("🔧 Audio Quality Statistics Test")
+    print("=" * 40)
+
+    passes_ok = test_matches_separate_passes()
+    vad_ok = test_vad_statistics()
+    trim_ok = test_vad_trim()
+
+    print("\n" + "=" * 40)
+    print(f"One-pass statistics: {'✅ OK' if passes_ok else '❌ FAILED'}")
+    print(f"VAD statistics: {'✅ OK' if vad_ok else '❌ FAILED'}")
+    print(f"VAD trim: {'✅ OK' if trim_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return passes_ok and vad_ok and trim_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Regression test for the shared spectral front-end in feature_engine.py.
+Compares the 193-dim vector against the original per-feature librosa calls that
+extract_feature used before the front-end was shared.
+"""
+
+import numpy as np
+import librosa
+
+from audio_pipeline import DecodedAudio
+from feature_engine import extract_features, FEATURE_LAYOUT, N_FEATURES
+from quick_test import create_good_test_audio
+from test_audio_processing import create_test_audio
+
+# Relative tolerance per family; the spectra are identical, only float32 rounding differs
+RTOL = 1e-4
+ATOL = 1e-4
+
+def reference_extract_feature(X, sample_rate):
+    """The original extract_feature computation, one librosa call per family"""
+    stft = np.abs(librosa.stft(X))
+    result = np.array([])
+    result = np.hstack((result, np.mean(librosa.feature.mfcc(y=X, sr=sample_rate, n_mfcc=40).T, axis=0)))
+    result = np.hstack((result, np.mean(librosa.feature.chroma_stft(S=stft, sr=sample_rate).T, axis=0)))
+    result = np.hstack((result, np.mean(librosa.feature.melspectrogram(y=X, sr=sample_rate).T, axis=0)))
+    result = np.hstack((result, np.mean(librosa.feature.spectral_contrast(S=stft, sr=sample_rate).T, axis=0)))
+    result = np.hstack((result, np.mean(librosa.feature.tonnetz(y=librosa.effects.harmonic(X), sr=sample_rate).T, axis=0)))
+    return result
+
+def synthetic_corpus(seed=None):
+    """Speech-like clips at the sample rates browsers typically record; seed fixes the generators' noise"""
+    if seed is not None:
+        np.random.seed(seed)
+    clips = []
+    for create in (create_test_audio, create_good_test_audio):
+        signal, sample_rate = create()
+        signal = signal.astype(np.float32)
+        clips.append((f"{create.__name__}@{sample_rate}", signal, sample_rate))
+        for target_rate in (44100, 48000):
+            resampled = librosa.resample(signal, orig_sr=sample_rate, target_sr=target_rate)
+            clips.append((f"{create.__name__}@{target_rate}", resampled, target_rate))
+    return clips
+
+def compare_families(name, expected, actual):
+    """Print the worst deviation per feature family and return True when all are within tolerance"""
+    ok = True
+    offset = 0
+    for family, size in FEATURE_LAYOUT:
+        e = expected[offset:offset + size]
+        a = actual[offset:offset + size]
+        max_abs = float(np.max(np.abs(e - a)))
+        within = np.allclose(a, e, rtol=RTOL, atol=ATOL)
+        ok = ok and within
+        print(f"   {family:<9} max |Δ| = {max_abs:.3e} {'✅' if within else '❌'}")
+        offset += size
+    return ok
+
+def test_matches_reference():
+    """Shared front-end output must match the original extractor"""
+    print("🔍 Comparing shared front-end with the original extractor...")
+    all_ok = True
+    for name, signal, sample_rate in synthetic_corpus():
+        expected = reference_extract_feature(signal, sample_rate)
+        actual = extract_features(
+            DecodedAudio(signal, sample_rate),
+            mfcc=True,
+            chroma=True,
+            mel=True,
+            contrast=True,
+            tonnetz=True
+        )
+        print(f"📊 {name}")
+        if actual.shape != (N_FEATURES,):
+            print(f"   ❌ Unexpected shape {actual.shape}")
+            all_ok = False
+            continue
+        all_ok = compare_families(name, expected, actual) and all_ok
+    return all_ok
+
+def main():
+    """Main test function"""
+    print("🔧 Feature Engine Regression Test")
+    print("=" * 40)
+
+    ok = test_matches_reference()
+
+    print("\n" + "=" * 40)
+    print(f"Feature engine parity: {'✅ OK' if ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test the feature-vector store (feature_store.py) with small shards.
+Checks put/get round trips, slot allocation across shards (an overwrite keeps its
+slot), that vectors from other feature settings are hidden, iter_batches order and
+stale filtering, rescore with a fake model, and that a prediction stores the
+version of the artifacts that actually scored it.
+"""
+
+import os
+import tempfile
+import numpy as np
+
+import flaskapp
+import feature_store
+from feature_store import FeatureStore, rescore
+from inference_scheduler import InferenceScheduler
+
+N_FEATURES = 8
+
+def vector(i):
+    return np.arange(N_FEATURES, dtype=np.float32) + 100 * i
+
+class FakeArtifacts:
+    """Labels each row by its first feature, like a model would"""
+
+    def __init__(self, version):
+        self.version = version
+        self.calls = []
+
+    def predict(self, features):
+        self.calls.append(len(features))
+        probs = np.tile([0.25, 0.75], (len(features), 1))
+        return probs, np.array([f"row{int(row[0]) // 100}" for row in features])
+
+def test_put_get_and_slots(directory):
+    print("🔍 Storing vectors across shards...")
+    store = FeatureStore(directory, shard_rows=4, n_features=N_FEATURES)
+    for i in range(10):
+        store.put(f"h{i}", vector(i), model_version="model-A")
+    store.put("h3", vector(30), model_version="model-A")
+    db = store._connection()
+    slots = dict(db.execute("SELECT audio_hash, slot FROM vectors").fetchall())
+    shards = sorted(name for name in os.listdir(directory) if name.startswith("shard_"))
+
+    results = {
+        "vectors round-trip": all(np.array_equal(store.get(f"h{i}"), vector(i)) for i in (0, 4, 9)),
+        "slots allocated in order": [slots[f"h{i}"] for i in range(10)] == list(range(10)),
+        "overwrite keeps its slot": slots["h3"] == 3 and np.array_equal(store.get("h3"), vector(30)),
+        "4-row shards: 3 files": shards == ["shard_00000.npy", "shard_00001.npy", "shard_00002.npy"],
+        "unknown hash is None": store.get("missing") is None,
+        "reopened store reads the same rows": np.array_equal(
+            FeatureStore(directory, shard_rows=4, n_features=N_FEATURES).get("h9"), vector(9)),
+    }
+    try:
+        store.put("bad", np.zeros(N_FEATURES + 1))
+        results["wrong length rejected"] = False
+    except ValueError:
+        results["wrong length rejected"] = True
+
+    saved = feature_store.FEATURE_VERSION
+    try:
+        feature_store.FEATURE_VERSION = saved + "-other"
+        results["other feature settings are hidden"] = store.get("h0") is None and store.stats()["current_feature_version"] == 0
+    finally:
+        feature_store.FEATURE_VERSION = saved
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_batches_and_rescore(directory):
+    print("🔍 Iterating and rescoring...")
+    store = FeatureStore(directory, shard_rows=4, n_features=N_FEATURES)
+    for i in range(10):
+        store.put(f"h{i}", vector(i), model_version="model-A" if i % 2 else "model-B")
+    results = {}
+
+    batches = list(store.iter_batches(4))
+    hashes = [audio_hash for chunk, _ in batches for audio_hash in chunk]
+    results["batches of 4 in slot order"] = (
+        [len(chunk) for chunk, _ in batches] == [4, 4, 2] and hashes == [f"h{i}" for i in range(10)]
+        and np.array_equal(np.vstack([matrix for _, matrix in batches]), np.vstack([vector(i) for i in range(10)])))
+    stale = [audio_hash for chunk, _ in store.iter_batches(4, stale_for="model-B") for audio_hash in chunk]
+    results["stale_for skips rows that model scored"] = stale == [f"h{i}" for i in range(1, 10, 2)]
+
+    artifacts = FakeArtifacts("model-B")
+    count = rescore(store, artifacts, batch_size=3)
+    rows = store._connection().execute("SELECT audio_hash, model_version, emotion FROM vectors").fetchall()
+    results["rescore only runs stale rows, in batches"] = count == 5 and artifacts.calls == [3, 2]
+    results["rescored rows record the new model and label"] = all(
+        version == "model-B" and emotion == f"row{int(audio_hash[1:])}"
+        for audio_hash, version, emotion in rows if int(audio_hash[1:]) % 2)
+    results["nothing stale afterwards"] = store.stats(model_version="model-B")["stale_scores"] == 0
+    results["--all rescores every row"] = rescore(store, FakeArtifacts("model-B"), rescore_all=True) == 10
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_prediction_stores_scoring_version(directory):
+    print("🔍 Storing the version that scored a prediction...")
+    store = FeatureStore(directory)
+    scoring = FakeArtifacts("scoring-model")
+    scheduler = InferenceScheduler(
+        lambda features: scoring.predict(features) + ([scoring.version] * len(features),), window_ms=1)
+    prepared = {"features": np.full(store.n_features, 100.0), "quality_analysis": {}}
+
+    saved = flaskapp.get_feature_store, flaskapp.get_scheduler, flaskapp.get_loaded_artifacts
+    try:
+        flaskapp.get_feature_store = lambda: store
+        flaskapp.get_scheduler = lambda: scheduler
+        # The artifacts checked before inference are not the ones the scheduler runs
+        flaskapp.get_loaded_artifacts = lambda: (FakeArtifacts("older-model"), None)
+        result = flaskapp.predict_prepared(prepared, audio_hash="upload")
+    finally:
+        flaskapp.get_feature_store, flaskapp.get_scheduler, flaskapp.get_loaded_artifacts = saved
+
+    row = store._connection().execute("SELECT model_version, emotion FROM vectors WHERE audio_hash = 'upload'").fetchone()
+    ok = "error" not in result and row == ("scoring-model", "row1")
+    print(f"   stored with the scoring model's version: {'✅' if ok else '❌ ' + str(row)}")
+    return ok
+
+def main():
+    """Main test function"""
+    print("🔧 Feature Store Test")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as directory:
+        slots_ok = test_put_get_and_slots(os.path.join(directory, "slots"))
+        rescore_ok = test_batches_and_rescore(os.path.join(directory, "rescore"))
+        version_ok = test_prediction_stores_scoring_version(os.path.join(directory, "predict"))
+
+    print("\n" + "=" * 40)
+    print(f"Put/get and slot allocation: {'✅ OK' if slots_ok else '❌ FAILED'}")
+    print(f"Batches and rescore: {'✅ OK' if rescore_ok else '❌ FAILED'}")
+    print(f"Scoring version stored: {'✅ OK' if version_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return slots_ok and rescore_ok and version_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
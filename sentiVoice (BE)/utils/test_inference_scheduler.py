@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the micro-batching scheduler (inference_scheduler.py) with a fake model.
+The fake records the size of every call and how many calls run at once. Requests
+that arrive while a direct call holds the model must be batched together once it
+returns, batches must respect max_batch, every caller must get its own row back and
+no two model calls may overlap, including whole batches sent through predict_many.
+"""
+
+import time
+import threading
+import numpy as np
+
+from inference_scheduler import InferenceScheduler
+
+class FakeModel:
+    """predict_fn that sleeps, echoes each row's id and tracks overlapping calls"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.sizes = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, features):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.sizes.append(len(features))
+        time.sleep(self.seconds)
+        with self._lock:
+            self.running -= 1
+        return features.copy(), np.array([f"id{int(row[0])}" for row in features])
+
+def run_requests(scheduler, ids, delay=0.0):
+    """Start one request thread per id (delay seconds apart); returns {id: (probs, label)}"""
+    answers = {}
+    def caller(request_id):
+        answers[request_id] = scheduler.predict(np.full(3, request_id, dtype=float))
+    threads = []
+    for request_id in ids:
+        thread = threading.Thread(target=caller, args=(request_id,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(delay)
+    for thread in threads:
+        thread.join()
+    return answers
+
+def answers_match(answers, ids):
+    return sorted(answers) == sorted(ids) and all(
+        label == f"id{i}" and probs[0] == i for i, (probs, label) in answers.items())
+
+def test_batches_behind_a_direct_call():
+    print("🔍 Requests arriving during a direct call...")
+    model = FakeModel(0.2)
+    scheduler = InferenceScheduler(model, window_ms=5, max_batch=32)
+    results = {}
+
+    first = threading.Thread(target=run_requests, args=(scheduler, [0]))
+    first.start()
+    time.sleep(0.05)
+    answers = run_requests(scheduler, range(1, 7))
+    first.join()
+    stats = scheduler.stats()
+
+    print(f"   model call sizes: {model.sizes}")
+    results["first request runs directly"] = model.sizes[:1] == [1] and stats["direct_calls"] == 1
+    results["the six that arrived during it form one batch"] = model.sizes[1:] == [6] and stats["batches"] == 1
+    results["each caller gets its own row"] = answers_match(answers, range(1, 7))
+    results["model calls never overlap"] = model.max_running == 1
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_steady_load():
+    print("🔍 64 requests, 1 ms apart, max_batch 8...")
+    model = FakeModel(0.01)
+    scheduler = InferenceScheduler(model, window_ms=5, max_batch=8)
+    results = {}
+
+    answers = run_requests(scheduler, range(64), delay=0.001)
+    stats = scheduler.stats()
+
+    print(f"   model calls: {len(model.sizes)}, largest: {max(model.sizes)}, direct: {stats['direct_calls']}")
+    results["every request answered with its own row"] = answers_match(answers, range(64))
+    results["batches respect max_batch"] = max(model.sizes) <= 8 and sum(model.sizes) == 64
+    results["requests were batched"] = len(model.sizes) < 64
+    results["model calls never overlap"] = model.max_running == 1
+    results["nothing left in flight"] = stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_whole_batches_share_the_lock():
+    print("🔍 predict_many alongside single predictions...")
+    model = FakeModel(0.05)
+    scheduler = InferenceScheduler(model, window_ms=5, max_batch=8)
+    batches = []
+    def batch_caller(offset):
+        batches.append(scheduler.predict_many(np.vstack([np.full(3, offset + i, dtype=float) for i in range(16)])))
+    threads = [threading.Thread(target=batch_caller, args=(100 * (n + 1),)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    answers = run_requests(scheduler, range(8), delay=0.01)
+    for thread in threads:
+        thread.join()
+
+    results = {
+        "whole batches go in one call": model.sizes.count(16) == 3,
+        "each batch gets its own rows": all(
+            list(labels) == [f"id{int(row[0])}" for row in probs] for probs, labels in batches),
+        "single callers still answered": answers_match(answers, range(8)),
+        "model calls never overlap": model.max_running == 1,
+    }
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_errors_reach_every_caller():
+    print("🔍 A failing model call...")
+    def failing(features):
+        time.sleep(0.05)
+        raise RuntimeError("model failed")
+    scheduler = InferenceScheduler(failing, window_ms=5, max_batch=8)
+    errors = []
+    def caller():
+        try:
+            scheduler.predict(np.zeros(3))
+        except RuntimeError as e:
+            errors.append(str(e))
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ok = errors == ["model failed"] * 4
+    print(f"   every caller sees the error: {'✅' if ok else '❌ ' + str(errors)}")
+    return ok
+
+def main():
+    """Main test function"""
+    print("🔧 Inference Scheduler Test")
+    print("=" * 40)
+
+    direct_ok = test_batches_behind_a_direct_call()
+    load_ok = test_steady_load()
+    many_ok = test_whole_batches_share_the_lock()
+    errors_ok = test_errors_reach_every_caller()
+
+    print("\n" + "=" * 40)
+    print(f"Batched behind a direct call: {'✅ OK' if direct_ok else '❌ FAILED'}")
+    print(f"Steady load: {'✅ OK' if load_ok else '❌ FAILED'}")
+    print(f"predict_many shares the lock: {'✅ OK' if many_ok else '❌ FAILED'}")
+    print(f"Errors propagated: {'✅ OK' if errors_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return direct_ok and load_ok and many_ok and errors_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Test script for the asynchronous job queue.
+Runs JobQueue with a stand-in prediction function, so no model is needed: submit
+and poll, the queue bound, callbacks, recovery of SQLite-persisted jobs, and that
+requeueing them never queues a job twice. Callback URLs pointing at loopback, private,
+link-local or reserved hosts must be refused.
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import job_queue as job_queue_module
+from job_queue import JobQueue, JobQueueFull, valid_callback_url, deliver_callback
+
+def fake_prediction(audio_binary):
+    return {"status": "success", "data": {"emotion": "Calm", "bytes": len(audio_binary)}}, 200
+
+def wait_for(job_queue, job_id, timeout=10.0):
+    started = time.time()
+    while time.time() - started < timeout:
+        job = job_queue.get(job_id)
+        if job and job["state"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    return job_queue.get(job_id)
+
+def test_submit_and_poll():
+    """A job is queued immediately and later carries the prediction response"""
+    job_queue = JobQueue(fake_prediction, workers=1, max_queued=4, db_path="")
+    job = job_queue.submit(b"abc")
+    job = wait_for(job_queue, job["job_id"])
+    ok = job["state"] == "done" and job["status_code"] == 200 and job["result"]["data"]["bytes"] == 3
+    print(f"{'✅' if ok else '❌'} Submit and poll: {job['state']} {job['status_code']}")
+    return ok
+
+def test_failed_job():
+    """An exception in the worker becomes a failed job with a 500 body, not a lost one"""
+    def broken(audio_binary):
+        raise RuntimeError("model exploded")
+    job_queue = JobQueue(broken, workers=1, max_queued=4, db_path="")
+    job = wait_for(job_queue, job_queue.submit(b"abc")["job_id"])
+    ok = job["state"] == "failed" and job["status_code"] == 500
+    print(f"{'✅' if ok else '❌'} Failed job: {job['state']} {job['result']}")
+    return ok
+
+def test_queue_bound():
+    """Submissions beyond max_queued are rejected instead of piling up"""
+    release = threading.Event()
+    def blocked(audio_binary):
+        release.wait()
+        return fake_prediction(audio_binary)
+    job_queue = JobQueue(blocked, workers=1, max_queued=2, db_path="")
+    accepted, rejected = 0, 0
+    for _ in range(6):
+        try:
+            job_queue.submit(b"abc")
+            accepted += 1
+        except JobQueueFull:
+            rejected += 1
+        time.sleep(0.05)
+    release.set()
+    # One job is running and two are waiting
+    ok = accepted == 3 and rejected == 3
+    print(f"{'✅' if ok else '❌'} Queue bound: {accepted} accepted, {rejected} rejected")
+    return ok
+
+def test_callback():
+    """The finished job is POSTed to the callback URL"""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Loopback is refused unless explicitly allowed
+    saved = job_queue_module.JOB_CALLBACK_ALLOWED_HOSTS
+    job_queue_module.JOB_CALLBACK_ALLOWED_HOSTS = ("127.0.0.1",)
+    try:
+        job_queue = JobQueue(fake_prediction, workers=1, max_queued=4, db_path="")
+        job = job_queue.submit(b"abcd", f"http://127.0.0.1:{server.server_port}/hook")
+        started = time.time()
+        while time.time() - started < 10 and job_queue.get(job["job_id"])["callback_status"] == "pending":
+            time.sleep(0.05)
+        job = job_queue.get(job["job_id"])
+    finally:
+        job_queue_module.JOB_CALLBACK_ALLOWED_HOSTS = saved
+        server.shutdown()
+    ok = (job["callback_status"] == "delivered" and len(received) == 1
+          and received[0]["job_id"] == job["job_id"] and received[0]["result"]["data"]["bytes"] == 4)
+    print(f"{'✅' if ok else '❌'} Callback: {job['callback_status']}, {len(received)} POST received")
+    return ok
+
+def test_callback_hosts():
+    """Callbacks to loopback, private, link-local or reserved hosts are refused"""
+    refused = [
+        "http://127.0.0.1:8080/hook", "http://localhost/hook", "http://10.0.0.5/hook",
+        "http://172.16.0.1/hook", "http://192.168.1.1/hook", "http://169.254.169.254/latest/meta-data/",
+        "http://100.64.0.1/hook", "http://0.0.0.0/hook", "http://[::1]/hook", "http://[fd00::1]/hook",
+        "http://[fe80::1]/hook", "http://[::ffff:127.0.0.1]/hook", "http://240.0.0.1/hook",
+        "http://2130706433/hook", "ftp://93.184.216.34/hook", "http:///hook", "http://93.184.216.34:99999/hook",
+        "http://no-such-host.invalid/hook",
+    ]
+    wrongly_accepted = [url for url in refused if valid_callback_url(url, allowed_hosts=())]
+    public_ok = valid_callback_url("https://93.184.216.34/hook", allowed_hosts=())
+    allowlist_ok = (valid_callback_url("https://hooks.example.com/x", allowed_hosts=("hooks.example.com",))
+                    and not valid_callback_url("https://93.184.216.34/hook", allowed_hosts=("hooks.example.com",)))
+
+    # An allowed host cannot redirect the POST somewhere else
+    hits = []
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            hits.append(self.path)
+            self.send_response(302)
+            self.send_header("Location", "/internal")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = job_queue_module.JOB_CALLBACK_ALLOWED_HOSTS
+    job_queue_module.JOB_CALLBACK_ALLOWED_HOSTS = ("127.0.0.1",)
+    try:
+        delivered = deliver_callback(f"http://127.0.0.1:{server.server_port}/hook", {}, retries=1)
+    finally:
+        job_queue_module.JOB_CALLBACK_ALLOWED_HOSTS = saved
+        server.shutdown()
+    blocked_at_delivery = not deliver_callback("http://169.254.169.254/latest/meta-data/", {}, retries=1)
+
+    ok = not wrongly_accepted and public_ok and allowlist_ok and not delivered and hits == ["/hook"] and blocked_at_delivery
+    print(f"{'✅' if ok else '❌'} Callback hosts: {len(refused) - len(wrongly_accepted)}/{len(refused)} refused"
+          f"{' (accepted: ' + str(wrongly_accepted) + ')' if wrongly_accepted else ''}, public IP "
+          f"{'accepted' if public_ok else 'refused'}, allowlist {'✅' if allowlist_ok else '❌'}, "
+          f"redirect {'followed' if len(hits) > 1 or delivered else 'not followed'}")
+    return ok
+
+def test_persistence():
+    """Jobs queued in SQLite run after a restart and can be polled from another queue"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "jobs.sqlite")
+        release = threading.Event()
+        def blocked(audio_binary):
+            release.wait()
+            return fake_prediction(audio_binary)
+
+        # The first "process" accepts jobs but never finishes them
+        first = JobQueue(blocked, workers=1, max_queued=8, db_path=db_path)
+        job_ids = [first.submit(b"x" * n)["job_id"] for n in range(1, 4)]
+        time.sleep(0.2)
+
+        # A restarted process takes them over; stale_after=0 also reclaims the one left running
+        second = JobQueue(fake_prediction, workers=2, max_queued=8, db_path=db_path, stale_after=0)
+        second.start()
+        jobs = [wait_for(second, job_id) for job_id in job_ids]
+        release.set()
+        time.sleep(0.5)  # let the first queue's worker finish before the file goes away
+    ok = all(job["state"] == "done" for job in jobs) and [job["result"]["data"]["bytes"] for job in jobs] == [1, 2, 3]
+    print(f"{'✅' if ok else '❌'} Persistence: {[job['state'] for job in jobs]}")
+    return ok
+
+def test_requeue_dedupe():
+    """Requeueing SQLite jobs skips ids this process already queued, so qsize stays true"""
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+        def blocked(audio_binary):
+            release.wait()
+            return fake_prediction(audio_binary)
+
+        job_queue = JobQueue(blocked, workers=1, max_queued=4, db_path=os.path.join(tmp, "jobs.sqlite"))
+        job_queue.submit(b"running")
+        time.sleep(0.2)
+        job_ids = [job_queue.submit(b"x")["job_id"] for _ in range(2)]
+        # start() and idle workers requeue pending jobs; they must not double the queue
+        for _ in range(3):
+            job_queue.start()
+        queued = job_queue.stats()["queued"]
+        try:
+            job_ids.append(job_queue.submit(b"x")["job_id"])
+            accepted = True
+        except JobQueueFull:
+            accepted = False
+        release.set()
+        jobs = [wait_for(job_queue, job_id) for job_id in job_ids]
+    ok = queued == 2 and accepted and all(job["state"] == "done" for job in jobs)
+    print(f"{'✅' if ok else '❌'} Requeue dedupe: {queued} queued after 3 requeues, next submit "
+          f"{'accepted' if accepted else 'rejected'}")
+    return ok
+
+def main():
+    """Main test function"""
+    print("🔧 Job Queue Test")
+    print("=" * 40)
+
+    results = [
+        test_submit_and_poll(),
+        test_failed_job(),
+        test_queue_bound(),
+        test_callback(),
+        test_callback_hosts(),
+        test_persistence(),
+        test_requeue_dedupe(),
+    ]
+
+    print("\n" + "=" * 40)
+    print(f"Job queue: {'✅ OK' if all(results) else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return all(results)
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
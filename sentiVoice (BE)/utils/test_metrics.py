@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test the per-stage timings and the /metrics endpoint (metrics.py).
+Checks the text exposition of counters and histograms, that stage timings reach the
+request from inside the request thread, from the micro-batching thread and from a
+feature process, and that the Flask endpoints count requests, rejections by
+error_type and stage latencies, and return the timings with ?timings=1.
+Without model files the good recording ends in a 500 after feature extraction, so
+the scaling and inference stages are only checked when the model is present.
+"""
+
+import io
+import time
+import base64
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from metrics import Counter, Histogram, stage, collect_timings, timed_job, STAGE_SECONDS, REJECTIONS
+from inference_scheduler import InferenceScheduler
+from audio_pipeline import decode_audio_bytes
+from startup import synthetic_recordings
+
+FEATURE_STAGES = {"precheck", "decode", "quality", "vad_trim", "features.mfcc", "features.tonnetz"}
+
+def short_clip():
+    """Two seconds of tone: rejected by the pre-check as too short"""
+    t = np.arange(2 * 16000) / 16000
+    buffer = io.BytesIO()
+    sf.write(buffer, 0.3 * np.sin(2 * np.pi * 220 * t), 16000, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+def test_exposition():
+    print("🔍 Checking the text exposition format...")
+    counter = Counter("demo_total", "Demo", ("kind",))
+    counter.inc(kind='a "quoted"\nvalue')
+    counter.inc(2, kind="b")
+    histogram = Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0, float('inf')))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="x")
+    lines = counter.render() + histogram.render()
+    expected = [
+        'demo_total{kind="a \\"quoted\\"\\nvalue"} 1',
+        'demo_total{kind="b"} 2',
+        'demo_seconds_bucket{stage="x",le="0.1"} 1',
+        'demo_seconds_bucket{stage="x",le="1"} 3',
+        'demo_seconds_bucket{stage="x",le="+Inf"} 4',
+        'demo_seconds_count{stage="x"} 4',
+        'demo_seconds_sum{stage="x"} 4.050000',
+    ]
+    missing = [line for line in expected if line not in lines]
+    ok = not missing and "# TYPE demo_seconds histogram" in lines
+    print(f"   counters, cumulative buckets, sum and label escaping: {'✅' if ok else '❌ ' + str(missing)}")
+    return ok
+
+def test_timings_reach_the_request():
+    print("🔍 Collecting stage timings across threads and processes...")
+    results = {}
+
+    with stage("outside"):
+        pass
+    with collect_timings() as timings:
+        with stage("a"):
+            time.sleep(0.01)
+        with stage("a"):
+            pass
+    results["stages add up, no-op outside a request"] = set(timings) == {"a"} and timings["a"] >= 0.01
+
+    with collect_timings() as timings:
+        try:
+            decode_audio_bytes(b"not an audio container" * 64)
+        except Exception:
+            pass
+    results["upload soundfile cannot read times its temp-file write"] = "temp_file_write" in timings
+
+    def predict_fn(features):
+        with stage("inference"):
+            time.sleep(0.02)
+        return np.zeros((len(features), 2)), np.array(["x"] * len(features))
+    scheduler = InferenceScheduler(predict_fn, window_ms=20, max_batch=8)
+    collected = []
+    def caller():
+        with collect_timings() as timings:
+            scheduler.predict(np.zeros(4))
+        collected.append(timings)
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batched = [timings for timings in collected if "queue_wait" in timings]
+    results["batched calls get the batch's inference time and their queue wait"] = (
+        len(collected) == 4 and bool(batched) and all(timings.get("inference", 0) >= 0.02 for timings in collected))
+
+    from flaskapp import prepare_recording
+    _, data = next(synthetic_recordings())
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        prepared, timings = pool.submit(timed_job, prepare_recording, data).result()
+    results["feature process returns its stages with the result"] = "features" in prepared and FEATURE_STAGES <= set(timings)
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_endpoints():
+    print("🔍 Calling the Flask endpoints...")
+    from flaskapp import app
+    from model_registry import get_registry
+    client = app.test_client()
+    results = {}
+
+    rejected_before = REJECTIONS.value(endpoint="predict", error_type="audio_quality")
+    response = client.post("/api/predict?timings=1", json={"audio_data": base64.b64encode(short_clip()).decode()})
+    body = response.get_json()
+    timings = body.get("timings", {})
+    results["short clip: 400, rejection counted"] = (
+        response.status_code == 400 and REJECTIONS.value(endpoint="predict", error_type="audio_quality") == rejected_before + 1)
+    results["?timings=1 returns the stages and the total"] = {"base64_decode", "precheck", "total"} <= set(timings)
+
+    _, data = next(synthetic_recordings())
+    response = client.post("/api/predict_upload", data=data, content_type="audio/wav")
+    results["timings are opt-in"] = "timings" not in response.get_json()
+    expected = set(FEATURE_STAGES)
+    if not get_registry().missing_files():
+        expected |= {"scale", "inference", "label_decode"}
+        results["good clip predicted"] = response.status_code == 200
+    results["every stage observed"] = all(
+        STAGE_SECONDS.count(endpoint="predict_upload", stage=name) >= 1 for name in expected)
+
+    response = client.get("/metrics")
+    text = response.get_data(as_text=True)
+    results["/metrics served as Prometheus text"] = (
+        response.status_code == 200 and response.content_type.startswith("text/plain")
+        and 'sentivoice_requests_total{endpoint="predict",status="400"}' in text
+        and 'sentivoice_stage_seconds_bucket{endpoint="predict_upload",stage="features.mfcc",le="+Inf"}' in text
+        and "sentivoice_prediction_cache_hits_total" in text)
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def main():
+    """Main test function"""
+    print("🔧 Metrics Test")
+    print("=" * 40)
+
+    exposition_ok = test_exposition()
+    timings_ok = test_timings_reach_the_request()
+    endpoints_ok = test_endpoints()
+
+    print("\n" + "=" * 40)
+    print(f"Exposition format: {'✅ OK' if exposition_ok else '❌ FAILED'}")
+    print(f"Stage timings collected: {'✅ OK' if timings_ok else '❌ FAILED'}")
+    print(f"Endpoints and /metrics: {'✅ OK' if endpoints_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return exposition_ok and timings_ok and endpoints_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
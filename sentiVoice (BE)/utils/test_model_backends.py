@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Parity, latency and memory of the model backends (model_backends.py) against Keras.
+Each backend is loaded in its own subprocess, so import time and peak RSS are not
+shared between them. Every backend scores the same feature matrix through
+ModelArtifacts.predict (scaler, model, encoder). Its all_probabilities must match
+the Keras ones within PARITY_ATOL, with the same labels. Backends whose model file
+or runtime is missing are skipped, and the summary then reports SKIPPED. With
+REQUIRE_PARITY=1 a skipped comparison fails the run instead.
+
+Usage: python test_model_backends.py
+       REQUIRE_PARITY=1 python test_model_backends.py
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import resource
+import subprocess
+import numpy as np
+
+from model_backends import BACKEND_FILES, runtime_available
+from model_registry import ARTIFACT_DIR
+
+PARITY_ATOL = 1e-5
+N_ROWS = 64
+LATENCY_CALLS = 200
+REQUIRE_PARITY = os.environ.get('REQUIRE_PARITY', '0') == '1'
+
+def child(backend, features_path, output_path):
+    """Load one backend, score the features and report timings as one JSON line"""
+    start = time.perf_counter()
+    from model_registry import ModelRegistry
+    artifacts = ModelRegistry(backend=backend).get()
+    load_seconds = time.perf_counter() - start
+
+    features = np.load(features_path)
+    probs, labels = artifacts.predict(features)
+    np.save(output_path, probs)
+
+    latency = {}
+    for batch in (1, 32):
+        rows = features[:batch]
+        artifacts.predict(rows)  # first call at this batch size may build kernels / resize tensors
+        times = []
+        for _ in range(LATENCY_CALLS if batch == 1 else LATENCY_CALLS // 10):
+            t = time.perf_counter()
+            artifacts.predict(rows)
+            times.append(time.perf_counter() - t)
+        latency[batch] = float(np.median(times))
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "latency_1": latency[1],
+        "latency_32": latency[32],
+        "labels": [str(label) for label in labels],
+    }))
+
+def run_backend(backend, features_path, workdir):
+    output_path = os.path.join(workdir, f"{backend}.npy")
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", backend, features_path, output_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "child failed")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["probs"] = np.load(output_path)
+    return report
+
+def available_backends():
+    return [backend for backend, file_name in BACKEND_FILES.items()
+            if os.path.exists(os.path.join(ARTIFACT_DIR, file_name)) and runtime_available(backend)]
+
+def test_backends_match_keras():
+    """True or False, or None when there is nothing to compare"""
+    backends = available_backends()
+    if "keras" not in backends:
+        print("⚠️  Keras reference unavailable (model.h5 or tensorflow missing): skipped")
+        return None
+    if len(backends) == 1:
+        print("⚠️  No other backend exported yet (run export_tflite.py): skipped")
+        return None
+
+    # Standard-normal rows scaled back through the scaler look like real feature vectors
+    import joblib
+    scaler = joblib.load(os.path.join(ARTIFACT_DIR, "scaler.pkl"))
+    rows = np.random.default_rng(0).standard_normal((N_ROWS, len(scaler.mean_)))
+    features = rows * scaler.scale_ + scaler.mean_
+
+    all_ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        features_path = os.path.join(workdir, "features.npy")
+        np.save(features_path, features)
+        reports = {backend: run_backend(backend, features_path, workdir) for backend in backends}
+
+    reference = reports["keras"]
+    print(f"   {'backend':<8}{'load':>9}{'peak RSS':>11}{'batch 1':>11}{'batch 32':>11}{'max |Δp|':>11}")
+    for backend, report in reports.items():
+        max_abs = float(np.max(np.abs(report["probs"] - reference["probs"])))
+        ok = max_abs <= PARITY_ATOL and report["labels"] == reference["labels"]
+        print(f"   {backend:<8}{report['load_seconds']:>8.2f}s{report['max_rss_mb']:>9.0f}MB"
+              f"{report['latency_1'] * 1000:>9.2f}ms{report['latency_32'] * 1000:>9.2f}ms{max_abs:>11.1e} "
+              f"{'✅' if ok else '❌'}")
+        all_ok = all_ok and ok
+    return all_ok
+
+def main():
+    """Main test function"""
+    print("🔧 Model Backend Parity Test")
+    print("=" * 40)
+
+    ok = test_backends_match_keras()
+
+    print("\n" + "=" * 40)
+    if ok is None:
+        print(f"Backends match Keras: ⏭️  SKIPPED{' (REQUIRE_PARITY=1: failing)' if REQUIRE_PARITY else ''}")
+    else:
+        print(f"Backends match Keras: {'✅ OK' if ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return ok if ok is not None else not REQUIRE_PARITY
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        child(*sys.argv[2:])
+    else:
+        raise SystemExit(0 if main() else 1)
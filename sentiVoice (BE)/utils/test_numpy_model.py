@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the NumPy forward pass (numpy_model.py).
+The vectorized Conv1D and pooling kernels are checked against plain loops for every
+padding mode. When TensorFlow is installed, small Keras models using each supported
+layer are exported with export_numpy.py and NumpyModel must reproduce model.predict.
+Without TensorFlow that check reports SKIPPED, or fails with REQUIRE_PARITY=1.
+The real model is compared in test_model_backends.py.
+"""
+
+import os
+import tempfile
+import importlib.util
+import numpy as np
+
+from numpy_model import conv1d, pool1d, NumpyModel
+
+ATOL = 1e-5
+REQUIRE_PARITY = os.environ.get('REQUIRE_PARITY', '0') == '1'
+
+def conv1d_loop(x, kernel, bias, stride, dilation, padding):
+    """Conv1D one output position at a time, padding as Keras documents it"""
+    n, length, _ = x.shape
+    size = kernel.shape[0]
+    span = (size - 1) * dilation + 1
+    if padding == "valid":
+        left, out = 0, (length - span) // stride + 1
+    elif padding == "causal":
+        left, out = span - 1, (length - 1) // stride + 1
+    else:
+        out = -(-length // stride)
+        left = max((out - 1) * stride + span - length, 0) // 2
+    y = np.zeros((n, out, kernel.shape[2]))
+    for position in range(out):
+        for tap in range(size):
+            source = position * stride + tap * dilation - left
+            if 0 <= source < length:
+                y[:, position] += x[:, source] @ kernel[tap]
+    return y + bias
+
+def pool1d_loop(x, size, stride, padding, reduce):
+    length = x.shape[1]
+    if padding == "valid":
+        left, out = 0, (length - size) // stride + 1
+    else:
+        out = -(-length // stride)
+        left = max((out - 1) * stride + size - length, 0) // 2
+    y = np.zeros((x.shape[0], out, x.shape[2]))
+    for position in range(out):
+        start = position * stride - left
+        window = x[:, max(start, 0):min(start + size, length)]
+        y[:, position] = window.max(axis=1) if reduce == "max" else window.mean(axis=1)
+    return y
+
+def test_kernels_match_loops():
+    print("🔍 Comparing vectorized Conv1D and pooling with plain loops...")
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((3, 37, 4)).astype(np.float32)
+    wide = rng.standard_normal((3, 37, 40)).astype(np.float32)
+    bias = rng.standard_normal(6).astype(np.float32)
+
+    all_ok = True
+    # Narrow inputs take the unrolled path, wide ones the per-tap products
+    for x_in in (x, wide):
+        kernel = rng.standard_normal((5, x_in.shape[2], 6)).astype(np.float32)
+        for padding in ("valid", "same", "causal"):
+            for stride, dilation in ((1, 1), (2, 1), (1, 2), (3, 2)):
+                error = np.max(np.abs(conv1d(x_in, kernel, bias, stride, dilation, padding)
+                                      - conv1d_loop(x_in, kernel, bias, stride, dilation, padding)))
+                ok = error <= 1e-4 * np.sqrt(x_in.shape[2])
+                if not ok:
+                    print(f"   ❌ Conv1D {x_in.shape[2]} channels {padding} stride {stride} "
+                          f"dilation {dilation}: max |Δ| {error:.1e}")
+                all_ok = all_ok and ok
+    for padding in ("valid", "same"):
+        for size, stride in ((2, 2), (8, 8), (3, 1), (4, 3)):
+            for reduce in ("max", "average"):
+                error = np.max(np.abs(pool1d(x, size, stride, padding, reduce)
+                                      - pool1d_loop(x, size, stride, padding, reduce)))
+                ok = error <= ATOL
+                if not ok:
+                    print(f"   ❌ {reduce} pooling {padding} size {size} stride {stride}: max |Δ| {error:.1e}")
+                all_ok = all_ok and ok
+    print(f"   Conv1D and pooling kernels: {'✅' if all_ok else '❌'}")
+    return all_ok
+
+def keras_models():
+    from tensorflow.keras import layers, models
+    shape = (193, 1)
+    yield "Conv1D + MaxPooling1D + Dense", models.Sequential([
+        layers.Input(shape),
+        layers.Conv1D(64, 5, padding="same", activation="relu"),
+        layers.Conv1D(32, 5, padding="same", activation="relu"),
+        layers.Dropout(0.2),
+        layers.MaxPooling1D(pool_size=8),
+        layers.Conv1D(32, 5, padding="same", activation="relu"),
+        layers.Flatten(),
+        layers.Dense(5, activation="softmax"),
+    ])
+    yield "strides, dilation, BatchNormalization", models.Sequential([
+        layers.Input(shape),
+        layers.Conv1D(16, 7, strides=2, padding="valid"),
+        layers.BatchNormalization(),
+        layers.Activation("relu"),
+        layers.Conv1D(16, 3, dilation_rate=2, padding="causal", activation="tanh"),
+        layers.AveragePooling1D(pool_size=3, strides=2, padding="same"),
+        layers.MaxPooling1D(pool_size=2, padding="same"),
+        layers.GlobalAveragePooling1D(),
+        layers.Dense(8, activation="elu"),
+        layers.Dense(5, activation="softmax"),
+    ])
+    yield "GlobalMaxPooling1D", models.Sequential([
+        layers.Input(shape),
+        layers.Conv1D(8, 3, activation="sigmoid", use_bias=False),
+        layers.GlobalMaxPooling1D(),
+        layers.Dense(5, activation="softmax"),
+    ])
+
+def test_keras_parity():
+    """True or False, or None when TensorFlow is not installed"""
+    if importlib.util.find_spec("tensorflow") is None:
+        print("⚠️  TensorFlow not installed: Keras parity skipped")
+        return None
+    print("🔍 Comparing exported Keras models with NumpyModel...")
+    from export_numpy import export
+
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((16, 193, 1)).astype(np.float32)
+    all_ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, model in keras_models():
+            # Non-trivial weights and BatchNormalization statistics
+            for weight in model.weights:
+                weight.assign(rng.normal(0.5 if "variance" in weight.name else 0.0, 0.2, weight.shape))
+            path = os.path.join(workdir, "model.npz")
+            export(model, path)
+            expected = model.predict(x, verbose=0)
+            actual = NumpyModel(path).predict(x)
+            error = float(np.max(np.abs(expected - actual)))
+            ok = error <= ATOL and actual.shape == expected.shape
+            print(f"   {name:<40} max |Δp| {error:.1e} {'✅' if ok else '❌'}")
+            all_ok = all_ok and ok
+    return all_ok
+
+def main():
+    """Main test function"""
+    print("🔧 NumPy Model Test")
+    print("=" * 40)
+
+    kernels_ok = test_kernels_match_loops()
+    keras_ok = test_keras_parity()
+
+    print("\n" + "=" * 40)
+    print(f"Kernels match loops: {'✅ OK' if kernels_ok else '❌ FAILED'}")
+    if keras_ok is None:
+        print(f"NumpyModel matches Keras: ⏭️  SKIPPED{' (REQUIRE_PARITY=1: failing)' if REQUIRE_PARITY else ''}")
+    else:
+        print(f"NumpyModel matches Keras: {'✅ OK' if keras_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return kernels_ok and (keras_ok if keras_ok is not None else not REQUIRE_PARITY)
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
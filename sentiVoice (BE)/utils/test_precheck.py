@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the quality pre-check that runs before the full decode (flaskapp.precheck_audio_quality).
+Every clip gets the pre-check verdict and the full decode + quality gate verdict:
+the pre-check must reject the obviously bad clips with the same issue, must never
+reject a clip the full gate accepts (including speech hidden between the scan
+windows), and its time is printed next to the full path.
+"""
+
+import io
+import time
+import numpy as np
+import soundfile as sf
+
+from flaskapp import precheck_audio_quality, analyze_decoded_audio_quality, PRECHECK_WINDOWS, PRECHECK_COVERAGE
+from audio_pipeline import load_audio
+
+SAMPLE_RATE = 48000
+
+def wav(signal, format='WAV'):
+    buffer = io.BytesIO()
+    sf.write(buffer, signal.astype(np.float32), SAMPLE_RATE, format=format)
+    return buffer.getvalue()
+
+def make_cases():
+    """(name, upload bytes, issue the pre-check must report or None)"""
+    rng = np.random.default_rng(0)
+    speech = lambda seconds: 0.3 * rng.standard_normal(int(seconds * SAMPLE_RATE))
+    faint = lambda seconds: 0.002 * rng.standard_normal(int(seconds * SAMPLE_RATE))
+
+    # Faint noise with one loud burst just longer than the gap between scan windows
+    duration = 60.0
+    burst = faint(duration)
+    gap = duration / PRECHECK_WINDOWS
+    start = int(0.6 * gap * SAMPLE_RATE)
+    burst[start:start + int(1.05 * gap * SAMPLE_RATE)] = speech(1.05 * gap)
+
+    # Faint noise with 1.4 s of speech entirely between two scan windows: every window is quiet
+    hidden = faint(duration)
+    window = max(0.1, PRECHECK_COVERAGE * duration / PRECHECK_WINDOWS)
+    window_starts = np.linspace(0, duration - window, PRECHECK_WINDOWS)
+    start = int((window_starts[10] + window + 0.1) * SAMPLE_RATE)
+    assert window_starts[10] + window + 0.1 + 1.4 < window_starts[11]
+    hidden[start:start + int(1.4 * SAMPLE_RATE)] = speech(1.4)
+
+    return [
+        ("5 s speech", wav(speech(5)), "Audio is too short"),
+        ("180 s speech", wav(speech(180)), "Audio is too long"),
+        ("180 s speech (FLAC)", wav(speech(180), 'FLAC'), "Audio is too long"),
+        ("60 s digital silence", wav(np.zeros(60 * SAMPLE_RATE)), "Audio is too quiet"),
+        ("60 s faint noise", wav(faint(60)), "Audio has very low energy"),
+        ("30 s speech", wav(speech(30)), None),
+        ("60 s faint + burst", wav(burst), None),
+        ("60 s faint + hidden speech", wav(hidden), None),
+    ]
+
+def test_precheck_agrees_with_full_gate():
+    print("🔍 Comparing the pre-check with the full decode + quality gate...")
+    all_ok = True
+    for name, data, expected_issue in make_cases():
+        start = time.perf_counter()
+        early = precheck_audio_quality(data)
+        t_early = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = analyze_decoded_audio_quality(load_audio(data))
+        t_full = time.perf_counter() - start
+
+        if expected_issue is None:
+            # Never reject what the full gate would accept
+            ok = early is None and full["is_good_quality"]
+        else:
+            ok = (early is not None and expected_issue in early["issues"]
+                  and not full["is_good_quality"] and expected_issue in full["issues"])
+        verdict = "decode" if early is None else expected_issue
+        print(f"   {name:<27} {verdict:<26} pre-check {t_early * 1000:>6.1f}ms, full path {t_full * 1000:>7.1f}ms "
+              f"{'✅' if ok else '❌'}")
+        all_ok = all_ok and ok
+    return all_ok
+
+def test_unreadable_container_is_decoded():
+    """Containers soundfile cannot open are left to the full decode"""
+    ok = precheck_audio_quality(b"not an audio container" * 64) is None
+    print(f"🔍 Unreadable container falls through to the full decode: {'✅' if ok else '❌'}")
+    return ok
+
+def main():
+    """Main test function"""
+    print("🔧 Quality Pre-check Test")
+    print("=" * 40)
+
+    agree_ok = test_precheck_agrees_with_full_gate()
+    fallback_ok = test_unreadable_container_is_decoded()
+
+    print("\n" + "=" * 40)
+    print(f"Pre-check agrees with the full gate: {'✅ OK' if agree_ok else '❌ FAILED'}")
+    print(f"Unreadable containers decoded: {'✅ OK' if fallback_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return agree_ok and fallback_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
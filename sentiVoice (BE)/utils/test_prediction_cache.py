@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the prediction cache (prediction_cache.py).
+Checks the LRU eviction order and TTL expiry of the in-memory tier, hits, row
+limits and expiry of the SQLite tier, that server errors are never cached, and
+that the key flaskapp builds changes with the model version and FEATURE_VERSION.
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+
+import flaskapp
+from prediction_cache import PredictionCache, cache_key, audio_digest
+
+def result(label):
+    return {"emotion": label, "confidence": 0.9}
+
+def test_memory_tier():
+    print("🔍 Checking the in-memory LRU...")
+    results = {}
+
+    cache = PredictionCache(max_items=3, ttl=0, db_path="")
+    for key in "abc":
+        cache.put(key, result(key))
+    cache.get("a")
+    cache.put("d", result("d"))
+    results["least recently used entry evicted first"] = (
+        cache.get("b") is None and all(cache.get(key) == result(key) for key in "acd"))
+    # Order is now a, c, d: touching a leaves c as the oldest
+    cache.get("a")
+    cache.put("e", result("e"))
+    results["a hit refreshes the entry"] = cache.get("a") == result("a") and cache.get("c") is None
+
+    cache = PredictionCache(max_items=8, ttl=0.05, db_path="")
+    cache.put("x", result("x"))
+    fresh = cache.get("x") == result("x")
+    time.sleep(0.1)
+    results["entries expire after the TTL"] = fresh and cache.get("x") is None and cache.stats()["entries"] == 0
+
+    cache = PredictionCache(max_items=8, ttl=0, db_path="")
+    cache.put("server", {"error": "Prediction failed"})
+    cache.put("quality", {"error": "audio_quality_issue"})
+    results["server errors are not cached"] = cache.get("server") is None and cache.get("quality") is not None
+
+    stats = cache.stats()
+    results["stats count hits and misses"] = stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_ratio"] == 0.5
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def test_sqlite_tier():
+    print("🔍 Checking the SQLite tier...")
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "cache.sqlite")
+        cache = PredictionCache(max_items=2, ttl=0, db_path=db_path, db_max_rows=3)
+        for key in "abcd":
+            cache.put(key, result(key))
+            time.sleep(0.002)
+
+        # A fresh process starts with an empty memory tier
+        restarted = PredictionCache(max_items=2, ttl=0, db_path=db_path, db_max_rows=3)
+        results["memory misses are served from disk"] = (
+            restarted.get("b") == result("b") and restarted.disk_hits == 1 and restarted.hits == 0)
+        results["a disk hit is promoted to memory"] = restarted.get("b") == result("b") and restarted.hits == 1
+        rows = sqlite3.connect(db_path).execute("SELECT key FROM predictions ORDER BY key").fetchall()
+        results["oldest rows evicted past db_max_rows"] = (
+            [row[0] for row in rows] == ["b", "c", "d"] and restarted.get("a") is None and restarted.misses == 1)
+
+        cache = PredictionCache(max_items=0, ttl=0.05, db_path=db_path, db_max_rows=3)
+        cache.put("e", result("e"))
+        fresh = cache.get("e") == result("e")
+        time.sleep(0.1)
+        results["disk entries expire after the TTL"] = fresh and cache.get("e") is None and cache.disk_hits == 1
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+class Artifacts:
+    def __init__(self, version):
+        self.version = version
+
+def test_key_invalidation():
+    print("🔍 Checking that model and feature changes invalidate keys...")
+    audio_hash = audio_digest(b"recording")
+    saved = flaskapp.get_loaded_artifacts, flaskapp.FEATURE_VERSION
+    try:
+        flaskapp.get_loaded_artifacts = lambda: (Artifacts("model-1"), None)
+        key = flaskapp.prediction_cache_key(audio_hash)
+        same = flaskapp.prediction_cache_key(audio_hash)
+        flaskapp.get_loaded_artifacts = lambda: (Artifacts("model-2"), None)
+        new_model = flaskapp.prediction_cache_key(audio_hash)
+        flaskapp.get_loaded_artifacts = lambda: (Artifacts("model-1"), None)
+        flaskapp.FEATURE_VERSION = saved[1] + "-changed"
+        new_features = flaskapp.prediction_cache_key(audio_hash)
+        flaskapp.get_loaded_artifacts = lambda: (None, {"error": "Missing required model files"})
+        no_model = flaskapp.prediction_cache_key(audio_hash)
+    finally:
+        flaskapp.get_loaded_artifacts, flaskapp.FEATURE_VERSION = saved
+
+    cache = PredictionCache(max_items=8, ttl=0, db_path="")
+    cache.put(key, result("old"))
+    results = {
+        "same upload, same key": key == same and key.endswith(audio_hash),
+        "new model version, new key": new_model != key and cache.get(new_model) is None,
+        "new FEATURE_VERSION, new key": new_features != key and cache.get(new_features) is None,
+        "no key without a model": no_model is None,
+        "cache_key joins version and hash": cache_key("h", "v") == "v:h",
+    }
+
+    for name, ok in results.items():
+        print(f"   {name}: {'✅' if ok else '❌'}")
+    return all(results.values())
+
+def main():
+    """Main test function"""
+    print("🔧 Prediction Cache Test")
+    print("=" * 40)
+
+    memory_ok = test_memory_tier()
+    sqlite_ok = test_sqlite_tier()
+    keys_ok = test_key_invalidation()
+
+    print("\n" + "=" * 40)
+    print(f"In-memory LRU and TTL: {'✅ OK' if memory_ok else '❌ FAILED'}")
+    print(f"SQLite tier: {'✅ OK' if sqlite_ok else '❌ FAILED'}")
+    print(f"Key invalidation: {'✅ OK' if keys_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return memory_ok and sqlite_ok and keys_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
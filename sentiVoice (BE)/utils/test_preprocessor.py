@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the compiled scaler + encoder (preprocessor.py) against the sklearn calls it replaces.
+Feature vectors are scaled with scaler.transform on a one-row-per-vector DataFrame and
+decoded with encoder.inverse_transform, as predict_emotion used to. The compiled path
+must give the same scaled values (float32 rounding aside) and the same labels for
+single vectors and batches, and both timings are printed.
+"""
+
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+
+from model_registry import ARTIFACT_DIR
+from preprocessor import Preprocessor
+
+BATCH_SIZES = (1, 7, 64, 1024)
+RTOL = 1e-5
+TIMING_CALLS = 200
+
+def load_artifacts():
+    scaler = joblib.load(os.path.join(ARTIFACT_DIR, "scaler.pkl"))
+    encoder = joblib.load(os.path.join(ARTIFACT_DIR, "encoder.pkl"))
+    return scaler, encoder
+
+def sklearn_path(scaler, encoder, features, probabilities):
+    features_df = pd.DataFrame(features, columns=[f'feature_{i}' for i in range(features.shape[1])])
+    return scaler.transform(features_df), encoder.inverse_transform(probabilities).flatten()
+
+def test_matches_sklearn():
+    print("🔍 Comparing the compiled path with scaler.transform / encoder.inverse_transform...")
+    scaler, encoder = load_artifacts()
+    preprocessor = Preprocessor.from_artifacts(scaler, encoder)
+    rng = np.random.default_rng(0)
+    n_classes = len(preprocessor.classes)
+
+    all_ok = True
+    for batch in BATCH_SIZES:
+        # Rows that look like real feature vectors, and softmax-like model outputs
+        features = (rng.standard_normal((batch, preprocessor.n_features)) * scaler.scale_ + scaler.mean_).astype(np.float32)
+        logits = rng.standard_normal((batch, n_classes))
+        probabilities = (np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)).astype(np.float32)
+
+        expected_scaled, expected_labels = sklearn_path(scaler, encoder, features, probabilities)
+        scaled = preprocessor.scale(features)
+        labels = preprocessor.decode(probabilities)
+
+        error = float(np.max(np.abs(scaled - expected_scaled) / (np.abs(expected_scaled) + 1)))
+        ok = (scaled.dtype == np.float32 and scaled.flags.c_contiguous and error <= RTOL
+              and list(labels) == list(expected_labels))
+        print(f"   batch {batch:>5}: max relative |Δ| {error:.1e}, labels {'match' if list(labels) == list(expected_labels) else 'differ'} "
+              f"{'✅' if ok else '❌'}")
+        all_ok = all_ok and ok
+
+    # A single 1-D vector, as the streaming and per-request paths pass it
+    vector = features[0]
+    single_ok = preprocessor.scale(vector).shape == (1, preprocessor.n_features) and np.array_equal(vector, features[0])
+    print(f"   single vector scaled as one row, input left untouched: {'✅' if single_ok else '❌'}")
+    return all_ok and single_ok
+
+def test_rejects_wrong_width():
+    scaler, encoder = load_artifacts()
+    preprocessor = Preprocessor.from_artifacts(scaler, encoder)
+    try:
+        preprocessor.scale(np.zeros(60))
+        ok = False
+    except ValueError:
+        ok = True
+    print(f"🔍 Vectors of the wrong length are rejected: {'✅' if ok else '❌'}")
+    return ok
+
+def test_timing():
+    print("⏱️  Timing per call...")
+    scaler, encoder = load_artifacts()
+    preprocessor = Preprocessor.from_artifacts(scaler, encoder)
+    rng = np.random.default_rng(1)
+    for batch in (1, 32):
+        features = rng.standard_normal((batch, preprocessor.n_features)).astype(np.float32)
+        probabilities = rng.random((batch, len(preprocessor.classes))).astype(np.float32)
+        timings = []
+        for run in (lambda: sklearn_path(scaler, encoder, features, probabilities),
+                    lambda: (preprocessor.scale(features), preprocessor.decode(probabilities))):
+            run()
+            start = time.perf_counter()
+            for _ in range(TIMING_CALLS):
+                run()
+            timings.append((time.perf_counter() - start) / TIMING_CALLS)
+        print(f"   batch {batch:>3}: sklearn + pandas {timings[0] * 1e6:>7.0f}µs, compiled {timings[1] * 1e6:>5.0f}µs")
+    return True
+
+def main():
+    """Main test function"""
+    print("🔧 Preprocessor Test")
+    print("=" * 40)
+
+    match_ok = test_matches_sklearn()
+    width_ok = test_rejects_wrong_width()
+    test_timing()
+
+    print("\n" + "=" * 40)
+    print(f"Matches sklearn: {'✅ OK' if match_ok else '❌ FAILED'}")
+    print(f"Wrong width rejected: {'✅ OK' if width_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return match_ok and width_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -4,11 +4,9 @@ Simple test script to verify model files and basic functionality.
 This helps identify if the issue is with the model files or audio processing.
 """
 
-import os
 import numpy as np
-import joblib
 import pandas as pd
-from tensorflow.keras.models import load_model
+from model_registry import get_registry
 from pathlib import Path
 
 def test_model_with_dummy_data():
@@ -16,23 +14,19 @@ def test_model_with_dummy_data():
     print("🧪 Testing model with dummy data...")
     
     try:
-        script_dir = Path(__file__).parent
-        output_dir = script_dir / "audio_feature_extracted"
+        registry = get_registry()
         
         # Check if files exist
-        scaler_path = output_dir / 'scaler.pkl'
-        encoder_path = output_dir / 'encoder.pkl'
-        model_path = output_dir / 'model.h5'
-        
-        if not all([scaler_path.exists(), encoder_path.exists(), model_path.exists()]):
+        if registry.missing_files():
             print("❌ Model files missing!")
             return False
         
         # Load model components
         print("Loading model components...")
-        scaler = joblib.load(scaler_path)
-        encoder = joblib.load(encoder_path)
-        model = load_model(model_path, compile=False)
+        artifacts = registry.get()
+        scaler = artifacts.scaler
+        encoder = artifacts.encoder
+        model = artifacts.model
         
         print(f"✅ Model components loaded")
         print(f"   Scaler type: {type(scaler)}")
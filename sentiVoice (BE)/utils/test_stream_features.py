@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tolerance test for streaming feature extraction (stream_features.py).
+Each synthetic clip is written to a float WAV, extracted once fully decoded and
+once streamed block by block, and the families are compared:
+
+- mfcc, chroma, mel, contrast: must match the full-load extractor within
+  RTOL / ATOL (only float rounding and the threshold bin of the dB histogram differ)
+- tonnetz: streamed tonnetz is the spectrogram-based "fast" variant; it must match
+  fast_tonnetz_features within TONNETZ_ATOL (the harmonic part's tuning is taken
+  from the full spectrogram). The distance to the exact waveform tonnetz is
+  printed for reference.
+
+The corpus is generated with several noise seeds, since the chroma tuning depends on
+the noise. Streaming must also stay off while TONNETZ_MODE is exact, and PolyphaseStream
+must give the output of one resample_poly call bit for bit, whatever the block sizes.
+"""
+
+import io
+from math import gcd
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from audio_pipeline import decode_audio_bytes
+from feature_engine import (
+    extract_features, fast_tonnetz_features, tonnetz_features, SpectralFrontEnd,
+    FEATURE_LAYOUT, N_FEATURES, TONNETZ_DECIMATION
+)
+import stream_features
+from stream_features import StreamedAudio, PolyphaseStream, should_stream
+from test_feature_engine import synthetic_corpus
+
+RTOL = 1e-5
+ATOL = 1e-4
+TONNETZ_ATOL = 2e-2
+
+# Small blocks exercise block boundaries, the default is what production uses
+BLOCK_SIZES = (16, 256)
+SEEDS = (1, 2, 3, 4, 5)
+
+FLAGS = dict(mfcc=True, chroma=True, mel=True, contrast=True, tonnetz=True)
+
+def float_wav(signal, sample_rate):
+    buffer = io.BytesIO()
+    sf.write(buffer, signal, sample_rate, format='WAV', subtype='FLOAT')
+    return buffer.getvalue()
+
+def test_stream_matches_full_load():
+    """Streamed features must stay within the documented tolerance of the full-load ones"""
+    print("🔍 Comparing streamed and full-load features...")
+    all_ok = True
+    corpus = [(f"{name}, seed {seed}", signal, sample_rate)
+              for seed in SEEDS for name, signal, sample_rate in synthetic_corpus(seed)]
+    for name, signal, sample_rate in corpus:
+        # 20 s clips so the default block size spans several blocks too
+        wav = float_wav(np.tile(signal, 4), sample_rate)
+        audio = decode_audio_bytes(wav)
+        front = SpectralFrontEnd(audio)
+        expected = extract_features(audio, **FLAGS)
+        exact_tonnetz = tonnetz_features(front)
+        expected[-6:] = fast_tonnetz_features(front, decimation=TONNETZ_DECIMATION)
+
+        for block_frames in BLOCK_SIZES:
+            streamed = StreamedAudio(wav, block_frames=block_frames)
+            actual = streamed.extract(**FLAGS)
+            print(f"📊 {name}, {block_frames} frames per block")
+            if actual.shape != (N_FEATURES,):
+                print(f"   ❌ Unexpected shape {actual.shape}")
+                all_ok = False
+                continue
+
+            quality_ok = (np.isclose(streamed.max_amplitude, audio.max_amplitude)
+                          and np.isclose(streamed.rms_energy, audio.rms_energy, rtol=1e-6)
+                          and streamed.silence_ratio(0.001) == audio.silence_ratio(0.001)
+                          and streamed.quality.speech_ratio == audio.quality.speech_ratio
+                          and streamed.quality.clipping_ratio == audio.quality.clipping_ratio)
+            print(f"   quality   {'✅' if quality_ok else '❌'}")
+            all_ok = all_ok and quality_ok
+
+            offset = 0
+            for family, size in FEATURE_LAYOUT:
+                e = expected[offset:offset + size]
+                a = actual[offset:offset + size]
+                max_abs = float(np.max(np.abs(e - a)))
+                if family == "tonnetz":
+                    within = max_abs <= TONNETZ_ATOL
+                    exact_abs = float(np.max(np.abs(exact_tonnetz - a)))
+                    print(f"   {family:<9} max |Δ| = {max_abs:.3e} {'✅' if within else '❌'}  (vs exact tonnetz {exact_abs:.3e})")
+                else:
+                    within = np.allclose(a, e, rtol=RTOL, atol=ATOL)
+                    print(f"   {family:<9} max |Δ| = {max_abs:.3e} {'✅' if within else '❌'}")
+                all_ok = all_ok and within
+                offset += size
+    return all_ok
+
+def test_exact_tonnetz_is_not_streamed():
+    """Only the fast tonnetz can be streamed, so exact mode must decode in full"""
+    wav = float_wav(np.zeros(16000 * 20, dtype=np.float32), 16000)
+    saved = stream_features.FEATURE_STREAMING_MIN_SECONDS, stream_features.TONNETZ_MODE
+    try:
+        stream_features.FEATURE_STREAMING_MIN_SECONDS = 10
+        stream_features.TONNETZ_MODE = "exact"
+        exact = should_stream(wav)
+        stream_features.TONNETZ_MODE = "fast"
+        fast = should_stream(wav)
+    finally:
+        stream_features.FEATURE_STREAMING_MIN_SECONDS, stream_features.TONNETZ_MODE = saved
+    ok = not exact and fast
+    print(f"🔍 Streamed only with TONNETZ_MODE=fast: {'✅' if ok else '❌'}")
+    return ok
+
+def test_polyphase_stream_is_exact():
+    """PolyphaseStream over random block sizes gives the one-shot resample_poly output bit for bit"""
+    print("🔍 Streamed polyphase resampling vs one resample_poly call...")
+    rng = np.random.default_rng(0)
+    ok = True
+    for orig_sr, target_sr in ((48000, 22050), (44100, 16000), (16000, 22050), (8000, 16000)):
+        divisor = gcd(orig_sr, target_sr)
+        worst = 0.0
+        for trial in range(3):
+            samples = (0.3 * rng.standard_normal(orig_sr * 2 + int(rng.integers(0, orig_sr)))).astype(np.float32)
+            expected = resample_poly(samples, target_sr // divisor, orig_sr // divisor)
+            stream = PolyphaseStream(orig_sr, target_sr)
+            # Tiny blocks on the first trial, up to half a second on the others
+            high = 64 if trial == 0 else orig_sr // 2
+            blocks, start = [], 0
+            while start < len(samples):
+                size = int(rng.integers(1, high))
+                blocks.append(stream.push(samples[start:start + size]))
+                start += size
+            blocks.append(stream.finish())
+            streamed = np.concatenate(blocks)
+            if len(streamed) != len(expected):
+                worst = float('inf')
+                break
+            worst = max(worst, float(np.max(np.abs(streamed - expected))))
+        print(f"   {orig_sr} -> {target_sr} Hz: max |Δ| = {worst:.1e} {'✅' if worst == 0 else '❌'}")
+        ok = ok and worst == 0
+    return ok
+
+def main():
+    """Main test function"""
+    print("🔧 Streaming Feature Extraction Test")
+    print("=" * 40)
+
+    ok = test_stream_matches_full_load()
+    mode_ok = test_exact_tonnetz_is_not_streamed()
+    polyphase_ok = test_polyphase_stream_is_exact()
+
+    print("\n" + "=" * 40)
+    print(f"Streaming within tolerance: {'✅ OK' if ok else '❌ FAILED'}")
+    print(f"Exact tonnetz not streamed: {'✅ OK' if mode_ok else '❌ FAILED'}")
+    print(f"Polyphase stream bit-identical: {'✅ OK' if polyphase_ok else '❌ FAILED'}")
+    print("\n🏁 Test completed!")
+    return ok and mode_ok and polyphase_ok
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
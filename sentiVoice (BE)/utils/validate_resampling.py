@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Validation report: how a canonical analysis rate changes features and predictions
+compared with the current native-rate behaviour.
+Every synthetic corpus clip is extracted at its native rate and at each candidate
+(rate, resampler) setting. Feature drift is reported in scaler standard deviations
+(median per family and the worst single column). When the model files are present,
+the change in predicted label and probabilities is reported too.
+
+Usage: python validate_resampling.py [rate:resampler ...]
+       e.g. python validate_resampling.py 22050:polyphase 22050:soxr_hq 16000:polyphase
+"""
+
+import sys
+import numpy as np
+import joblib
+
+from audio_pipeline import DecodedAudio
+from feature_engine import extract_features, to_analysis_rate, FEATURE_LAYOUT
+from model_registry import get_registry
+from test_feature_engine import synthetic_corpus
+
+DEFAULT_SETTINGS = ("22050:polyphase", "22050:soxr_hq", "16000:polyphase")
+FLAGS = dict(mfcc=True, chroma=True, mel=True, contrast=True, tonnetz=True)
+
+def family_drift(native, candidate, scale):
+    """Median |Δ| / σ per feature family, plus the largest over all 193 columns"""
+    delta = np.abs(native - candidate) / scale
+    drift = {}
+    offset = 0
+    for family, size in FEATURE_LAYOUT:
+        drift[family] = float(np.median(delta[offset:offset + size]))
+        offset += size
+    drift["max"] = float(np.max(delta))
+    return drift
+
+def main():
+    settings = [setting.split(":") for setting in (sys.argv[1:] or DEFAULT_SETTINGS)]
+    registry = get_registry()
+    scale = joblib.load(registry.paths()["scaler"]).scale_
+    artifacts = None if registry.missing_files() else registry.get()
+
+    print("🔧 Canonical analysis rate validation")
+    print("=" * 60)
+    if artifacts is None:
+        print(f"⚠️  Model files missing ({', '.join(registry.missing_files())}): reporting feature drift only")
+
+    corpus = [(name, np.tile(signal, 3), rate) for name, signal, rate in synthetic_corpus()]
+    native = {name: extract_features(DecodedAudio(signal, rate), **FLAGS) for name, signal, rate in corpus}
+    native_predictions = {}
+    if artifacts is not None:
+        probs, labels = artifacts.predict(np.vstack(list(native.values())))
+        native_predictions = {name: (p, l) for name, p, l in zip(native, probs, labels)}
+
+    for target_rate, res_type in settings:
+        target_rate = int(target_rate)
+        print(f"\n📊 {target_rate}Hz with {res_type}")
+        header = f"   {'clip (median |Δ|/σ)':<30}" + "".join(f"{family:>9}" for family, _ in FEATURE_LAYOUT) + f"{'max':>9}"
+        if artifacts is not None:
+            header += f"{'label':>18}{'max |Δp|':>10}"
+        print(header)
+
+        candidates = {}
+        for name, signal, rate in corpus:
+            audio = to_analysis_rate(DecodedAudio(signal, rate), target_rate, res_type)
+            candidates[name] = extract_features(audio, **FLAGS)
+
+        agree = 0
+        if artifacts is not None:
+            probs, labels = artifacts.predict(np.vstack(list(candidates.values())))
+        for i, (name, features) in enumerate(candidates.items()):
+            drift = family_drift(native[name], features, scale)
+            line = f"   {name:<30}" + "".join(f"{drift[family]:>9.3f}" for family, _ in FEATURE_LAYOUT) + f"{drift['max']:>9.1f}"
+            if artifacts is not None:
+                native_probs, native_label = native_predictions[name]
+                same = labels[i] == native_label
+                agree += int(same)
+                line += f"{native_label + ' → ' + labels[i]:>18}{float(np.max(np.abs(probs[i] - native_probs))):>10.3f}"
+            print(line)
+        if artifacts is not None:
+            print(f"   Label agreement with native rate: {agree}/{len(candidates)}")
+
+    print("\n🏁 Validation completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for production serving.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+preload() runs once in the gunicorn master before workers fork, init_worker()
+and shutdown_worker() run in every worker (see gunicorn.conf.py). With
+STARTUP_WARMUP=blocking the master imports and warms the feature engine before
+forking, so workers share those pages; otherwise each worker warms itself up
+after it starts serving (startup.py).
+"""
+
+import os
+import sys
+
+from flaskapp import app, job_queue
+from model_registry import get_registry
+from startup import STARTUP_WARMUP, start_warmup, warm_imports
+import feature_pool
+
+
+def uses_tensorflow():
+    return get_registry().backend == "keras"
+
+
+def preload():
+    """With a blocking start-up, import librosa (and TensorFlow for Keras) and warm the feature engine before workers fork"""
+    if STARTUP_WARMUP != "blocking":
+        return
+    warm_imports()
+    if uses_tensorflow():
+        import tensorflow  # noqa: F401
+    feature_pool.warm_worker()
+    print("Preload complete: librosa and feature engine ready")
+
+
+def init_worker(intra_op_threads, inter_op_threads):
+    """Cap TensorFlow's thread pools for this worker, start its job workers, then warm up"""
+    if uses_tensorflow() and "tensorflow" in sys.modules:
+        import tensorflow as tf
+
+        # Must happen before the first TensorFlow op runs in this process
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    elif uses_tensorflow():
+        # Not imported yet: TensorFlow reads these when it builds its thread pools, so the import can wait for the warm-up
+        os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra_op_threads)
+        os.environ["TF_NUM_INTEROP_THREADS"] = str(inter_op_threads)
+
+    job_queue.start()
+    start_warmup()
+    if STARTUP_WARMUP == "blocking" and get_registry().is_loaded:
+        print(f"Worker ready with model {get_registry().get().version} "
+              f"(TF intra-op threads: {intra_op_threads}, inter-op threads: {inter_op_threads})")
+
+
+def shutdown_worker():
+    """Stop this worker's feature processes on graceful shutdown"""
+    feature_pool.shutdown(wait=False)